@@ -0,0 +1,7 @@
+"""Benchmarks and load harnesses for the NLB MCP server (run with `python -m benchmarks.<name>`)."""
+
+import os
+
+# Benchmarks import nlb_mcp, whose settings require credentials; provide dummies.
+os.environ.setdefault("NLB_API_KEY", "bench-key")
+os.environ.setdefault("NLB_APP_CODE", "bench-app")
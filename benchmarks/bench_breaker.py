@@ -0,0 +1,98 @@
+"""Tool behaviour during an upstream outage, with and without the circuit breaker.
+
+Warms the response cache through `search_titles` for `--seen` queries, lets the entries
+expire, then makes the fake upstream answer 500/503 to everything and replays those
+queries plus `--unseen` new ones. Reports per-call latency and upstream attempts
+during the outage, how many calls were answered stale, and whether the breaker closes
+again once upstream recovers. Exits non-zero if a check fails.
+
+Usage: python -m benchmarks.bench_breaker [--seen 8] [--unseen 4]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Dict, List
+
+
+async def _outage(seen: int, unseen: int, threshold: int) -> Dict[str, Any]:
+    from benchmarks import fake_nlb
+    from nlb_mcp import nlb_client
+    from nlb_mcp.breaker import breakers
+    from nlb_mcp.config import settings
+    from nlb_mcp.http_client import aclose_client
+    from nlb_mcp.server import _instrumented, health_check, tool_search_titles
+
+    # Wrapped as create_server() registers it, which is where stale records get flagged.
+    search = _instrumented("search_titles", tool_search_titles)
+
+    upstream, fake = fake_nlb.build(titles=200)
+    async with upstream:
+        settings.nlb_api_base = upstream.base_url  # type: ignore[assignment]
+        settings.breaker_failure_threshold = threshold
+        settings.breaker_reset_s = 0.5
+        settings.cache_titles_ttl_s = 0.05
+        settings.cache_titles_stale_s = 0.0
+        breakers._breakers.clear()
+        nlb_client.get_response_cache().clear()
+        brns = [str(b) for b in fake.catalogue.brns]
+        for brn in brns[:seen]:
+            await search(brn)
+        await asyncio.sleep(0.1)
+
+        fake.error_rate = 1.0
+        before = upstream.requests
+        latencies: List[float] = []
+        stale = errors = 0
+        for brn in brns[:seen] + brns[seen : seen + unseen]:
+            start = time.perf_counter()
+            try:
+                result = await search(brn)
+                stale += bool(result and result[0].get("stale"))
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+        attempts = upstream.requests - before
+        during = (await health_check())["breakers"].get("/SearchTitles", {})
+
+        fake.error_rate = 0.0
+        await asyncio.sleep(settings.breaker_reset_s)
+        recovered = not (await search(brns[0]))[0].get("stale")
+        after = (await health_check())["breakers"].get("/SearchTitles", {})
+        await aclose_client()
+    return {
+        "breaker": threshold > 0,
+        "calls": len(latencies),
+        "upstreamAttempts": attempts,
+        "servedStale": stale,
+        "errors": errors,
+        "p50Ms": round(statistics.median(latencies), 1),
+        "maxMs": round(max(latencies), 1),
+        "stateDuringOutage": during.get("state"),
+        "stateAfterRecovery": after.get("state"),
+        "recovered": recovered,
+    }
+
+
+async def main(seen: int, unseen: int) -> Dict[str, Any]:
+    without = await _outage(seen, unseen, 0)
+    with_breaker = await _outage(seen, unseen, 5)
+    report = {"withoutBreaker": without, "withBreaker": with_breaker}
+    for run in (without, with_breaker):
+        assert run["servedStale"] == seen and run["errors"] == unseen and run["recovered"], report
+    assert with_breaker["stateDuringOutage"] == "open", report
+    assert with_breaker["stateAfterRecovery"] == "closed", report
+    assert with_breaker["upstreamAttempts"] < without["upstreamAttempts"], report
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seen", type=int, default=8)
+    parser.add_argument("--unseen", type=int, default=4)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.seen, args.unseen)), indent=2))
@@ -0,0 +1,77 @@
+"""Count real upstream hits for bursts of identical concurrent get_json calls.
+
+Fires `--callers` identical requests at a local stand-in server and checks that
+single-flight coalescing collapses them, that errors reach every caller and that
+cancelling callers behaves. Exits non-zero if any check fails.
+
+Usage: python -m benchmarks.bench_coalescing [--callers 50] [--distinct 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from typing import Any, Dict, List
+
+from benchmarks.standin import StandInServer
+
+
+async def main(callers: int, distinct: int) -> Dict[str, Any]:
+    from nlb_mcp import http_client
+    from nlb_mcp.config import settings
+
+    report: Dict[str, Any] = {}
+    async with StandInServer(latency_s=0.05) as upstream:
+        settings.nlb_api_base = upstream.base_url  # type: ignore[assignment]
+
+        # Burst: `callers` requests spread over `distinct` keys (param order shuffled).
+        calls = []
+        for i in range(callers):
+            n = i % distinct
+            params = {"Keywords": f"title-{n}", "Limit": "5"} if i % 2 else {"Limit": "5", "Keywords": f"title-{n}"}
+            calls.append(http_client.get_json("/SearchTitles", params))
+        await asyncio.gather(*calls)
+        report["burst"] = {"callers": callers, "upstreamHits": upstream.requests, "expected": distinct}
+        assert upstream.requests == distinct, report
+
+        # Errors propagate to every waiter (4xx is not retried).
+        upstream.handler = lambda path, params: (404, {"statusCode": 404, "error": "Not Found"})
+        upstream.requests = 0
+        results: List[Any] = await asyncio.gather(
+            *(http_client.get_json("/GetTitles", {"BRN": "1"}) for _ in range(callers)), return_exceptions=True
+        )
+        failed = sum(isinstance(r, Exception) for r in results)
+        report["errors"] = {"callersFailed": failed, "upstreamHits": upstream.requests}
+        assert failed == callers and upstream.requests == 1, report
+
+        # Cancelling one waiter leaves the others (and the shared request) intact.
+        upstream.handler = lambda path, params: (200, {"ok": True})
+        upstream.requests = 0
+        tasks = [asyncio.ensure_future(http_client.get_json("/GetTitles", {"BRN": "2"})) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        tasks[0].cancel()
+        done = await asyncio.gather(*tasks, return_exceptions=True)
+        report["cancelOne"] = {"others": done[1:], "upstreamHits": upstream.requests}
+        assert isinstance(done[0], asyncio.CancelledError) and done[1] == done[2] == {"ok": True}, report
+
+        # Cancelling every waiter cancels the upstream request and clears the flight.
+        tasks = [asyncio.ensure_future(http_client.get_json("/GetTitles", {"BRN": "3"})) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.sleep(0)
+        report["cancelAll"] = {"inflightLeft": len(http_client._inflight)}
+        assert not http_client._inflight, report
+
+        await http_client.aclose_client()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--callers", type=int, default=50)
+    parser.add_argument("--distinct", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.callers, args.distinct)), indent=2, default=str))
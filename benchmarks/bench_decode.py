@@ -0,0 +1,82 @@
+"""Decode + normalize throughput: stdlib json vs orjson vs msgspec (generic and typed).
+
+Decodes representative /SearchTitles and /GetAvailabilityInfo bodies from bytes and
+runs them through the same normalization the tools use. Parsers that are not
+installed are skipped.
+
+Usage: python -m benchmarks.bench_decode [--titles 200] [--items 500] [--repeat 30]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.payloads import availability_payload, search_titles_payload
+
+
+def _decoders(path: str) -> Dict[str, Optional[Callable[[bytes], Any]]]:
+    from nlb_mcp import decode
+
+    typed = decode._decoders().get(path)
+    return {
+        "json": json.loads,
+        "orjson": decode.orjson.loads if decode.orjson is not None else None,
+        "msgspec": decode.msgspec.json.decode if decode.msgspec is not None else None,
+        "msgspec-typed": typed.decode if typed is not None else None,
+    }
+
+
+def _run(body: bytes, path: str, normalize: Callable[[Any], Any], repeat: int) -> List[Dict[str, Any]]:
+    rows = []
+    for name, decoder in _decoders(path).items():
+        if decoder is None:
+            continue
+        decoder(body)
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            decoder(body)
+        decode_s = (time.perf_counter() - start) / repeat
+        value = decoder(body)
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            normalize(value)
+        normalize_s = (time.perf_counter() - start) / repeat
+        rows.append(
+            {
+                "path": path,
+                "decoder": name,
+                "bodyBytes": len(body),
+                "decodeMs": round(decode_s * 1000, 3),
+                "normalizeMs": round(normalize_s * 1000, 3),
+                "totalMBps": round(len(body) / (decode_s + normalize_s) / 1e6, 1),
+            }
+        )
+    return rows
+
+
+def main(titles: int, items: int, repeat: int) -> List[Dict[str, Any]]:
+    from nlb_mcp.models import BASIC_RECORD_FIELDS, normalize_titles
+    from nlb_mcp.server import _basic_availability as basic_availability
+
+    titles_body = json.dumps(search_titles_payload(titles)).encode()
+    items_body = json.dumps(availability_payload(items)).encode()
+    return (
+        _run(titles_body, "/SearchTitles", lambda v: normalize_titles(v), repeat)
+        + _run(titles_body, "/SearchTitles", lambda v: normalize_titles(v, BASIC_RECORD_FIELDS, 5), repeat)
+        + _run(items_body, "/GetAvailabilityInfo", lambda v: basic_availability(v, None), repeat)
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--titles", type=int, default=200)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+    print(json.dumps(main(args.titles, args.items, args.repeat), indent=2))
@@ -0,0 +1,102 @@
+"""Restart and multi-process behaviour of the SQLite disk cache tier.
+
+Runs each phase in a fresh interpreter (so the in-memory cache is always cold):
+`warm` fills CACHE_DISK_PATH through nlb_client against the fake upstream. `restart`
+replays the same calls and must be served entirely from disk; it reports per-call
+latency. `readers` processes replay in parallel with a writer process to check that
+concurrent workers share the file without errors. `unusable` points CACHE_DISK_PATH below a
+regular file: every call must still succeed from upstream, with the tier turned off after
+one error. Exits non-zero if a check fails.
+
+Usage: python -m benchmarks.bench_disk_cache [--keys 200] [--readers 4]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+
+async def _worker(phase: str, keys: int) -> Dict[str, Any]:
+    from benchmarks import fake_nlb
+    from nlb_mcp import nlb_client
+    from nlb_mcp.config import settings
+    from nlb_mcp.http_client import aclose_client
+
+    upstream, _fake = fake_nlb.build(titles=300, latency="fixed:5")
+    async with upstream:
+        settings.nlb_api_base = upstream.base_url  # type: ignore[assignment]
+        # Same namespace in every process regardless of the fake's random port.
+        nlb_client.response_cache.store.namespace = "bench"  # type: ignore[union-attr]
+        offset = keys if phase == "writer" else 0
+        latencies: List[float] = []
+        for n in range(offset, offset + keys):
+            start = time.perf_counter()
+            await nlb_client.search_titles(keywords=f"term{n}", limit=5)
+            latencies.append(time.perf_counter() - start)
+        await nlb_client.response_cache.store.flush()  # type: ignore[union-attr]
+        await aclose_client()
+    latencies.sort()
+    return {
+        "phase": phase,
+        "pid": os.getpid(),
+        "calls": keys,
+        "upstreamHits": upstream.requests,
+        "p50Ms": round(statistics.median(latencies) * 1000, 3),
+        "p99Ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+        "disk": nlb_client.response_cache.stats()["disk"],
+    }
+
+
+def _spawn(phase: str, db: str, keys: int) -> "subprocess.Popen[str]":
+    env = dict(os.environ, CACHE_DISK_PATH=db, LOG_LEVEL="WARNING", UPSTREAM_RATE_PER_S="0")
+    return subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_disk_cache", "--worker", phase, "--keys", str(keys)],
+        env=env,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+
+
+def _result(proc: "subprocess.Popen[str]") -> Dict[str, Any]:
+    out, _ = proc.communicate()
+    assert proc.returncode == 0, f"worker exited with {proc.returncode}"
+    return json.loads(out)
+
+
+def main(keys: int, readers: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "nlb-cache.sqlite")
+        warm = _result(_spawn("warm", db, keys))
+        restart = _result(_spawn("restart", db, keys))
+        assert restart["upstreamHits"] == 0, restart
+        procs = [_spawn("reader", db, keys) for _ in range(readers)] + [_spawn("writer", db, keys)]
+        shared = [_result(p) for p in procs]
+        assert all(r["upstreamHits"] == 0 for r in shared if r["phase"] == "reader"), shared
+        assert all(r["disk"]["errors"] == 0 for r in shared), shared
+        blocker = os.path.join(tmp, "not-a-directory")
+        open(blocker, "w").close()
+        unusable = _result(_spawn("unusable", os.path.join(blocker, "nlb-cache.sqlite"), 20))
+        assert unusable["upstreamHits"] == 20, unusable
+        assert unusable["disk"]["errors"] == 1 and unusable["disk"].get("disabled"), unusable
+    return {"warm": warm, "restart": restart, "concurrent": shared, "unusable": unusable}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--keys", type=int, default=200)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--worker", choices=["warm", "restart", "reader", "writer", "unusable"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        print(json.dumps(asyncio.run(_worker(args.worker, args.keys))))
+    else:
+        print(json.dumps(main(args.keys, args.readers), indent=2))
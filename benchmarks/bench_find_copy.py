@@ -0,0 +1,128 @@
+"""find_copy against the chained tool flow in resources/usage.md, with a fixed upstream latency.
+
+For `--queries` distinct searches per flow, times the chain search_titles -> list_branches ->
+availability_at_branch (first book record, one branch), a find_copy call with a cold
+response cache, and a find_copy call after an earlier search_titles for the same keywords
+(the search is cached, availability is not). All calls go through the server's tool
+wrappers and the default upstream limiter; lookups are spaced so the token bucket refills
+between them, as an agent's would be. Reports wall-clock p50/p95, tool calls and upstream
+requests per lookup (mean and max). Chain timings leave out the model's turn between calls.
+
+A cold find_copy needs two sequential round trips (search, then availability), a cached
+search one; a round trip is the p50 of the untimed search_titles calls, which carry the
+same in-process cost of the fake server. Exits non-zero unless find_copy is one tool call,
+uses about 1 + _FIND_MAX_RECORDS requests per lookup, and its p50 stays within half an
+upstream latency of that floor. Titles with hundreds of copies need more availability
+pages, so the p95 can be a round trip higher.
+
+Usage: python -m benchmarks.bench_find_copy [--queries 20] [--latency-ms 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List
+
+
+def _pct(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+
+async def main(queries: int, latency_ms: float) -> Dict[str, Any]:
+    from benchmarks import fake_nlb
+    from benchmarks.payloads import WORDS
+    from nlb_mcp import server
+    from nlb_mcp.config import settings
+    from nlb_mcp.http_client import aclose_client
+    from nlb_mcp.nlb_client import get_response_cache
+    from nlb_mcp.ratelimit import upstream_limiter
+
+    tools = {
+        name: server._instrumented(name, handler)
+        for name, handler in (
+            ("search_titles", server.tool_search_titles),
+            ("list_branches", server.tool_list_branches),
+            ("availability_at_branch", server.tool_availability_at_branch),
+            ("find_copy", server.tool_find_copy),
+        )
+    }
+    rng = random.Random(4)
+    names = ("chain", "findCopy", "findCopyCachedSearch")
+    pool = sorted({" ".join(sorted(rng.sample(WORDS, 2))) for _ in range(queries * 3 * 3)})
+    rng.shuffle(pool)
+    picked = {name: pool[i * queries : (i + 1) * queries] for i, name in enumerate(names)}
+    branch = "Tampines"
+    upstream, _ = fake_nlb.build(latency=f"fixed:{latency_ms}")
+    flows: Dict[str, Dict[str, List[float]]] = {name: {"ms": [], "requests": []} for name in names}
+    calls = dict.fromkeys(names, 0)
+    round_trip_ms: List[float] = []
+
+    async def chain(query: str) -> None:
+        titles = await tools["search_titles"](keywords=query)
+        code = (await tools["list_branches"](filter=branch))[0]["code"]
+        calls["chain"] += 2
+        brn = next((r["brn"] for t in titles for r in t.get("records", []) if r.get("format") in ("Book", "BOOKS")), None)
+        if brn is not None:
+            await tools["availability_at_branch"](branch_id=code, brn=str(brn))
+            calls["chain"] += 1
+
+    async def find_copy(name: str, query: str) -> None:
+        await tools["find_copy"](title=query, branch_ids=[branch])
+        calls[name] += 1
+
+    async with upstream:
+        settings.nlb_api_base = upstream.base_url  # type: ignore[assignment]
+        await tools["find_copy"](title="warm up")
+        for i in range(queries):
+            for name in names:
+                query = picked[name][i]
+                get_response_cache().clear()
+                if name == "findCopyCachedSearch":
+                    start = time.perf_counter()
+                    await tools["search_titles"](keywords=query)
+                    round_trip_ms.append((time.perf_counter() - start) * 1000)
+                    await asyncio.sleep(1 / settings.upstream_rate_per_s)
+                before, start = upstream.requests, time.perf_counter()
+                await (chain(query) if name == "chain" else find_copy(name, query))
+                flows[name]["ms"].append((time.perf_counter() - start) * 1000)
+                used = upstream.requests - before
+                flows[name]["requests"].append(used)
+                # Let the token bucket refill before the next lookup.
+                await asyncio.sleep(used / settings.upstream_rate_per_s)
+        await aclose_client()
+    report: Dict[str, Any] = {
+        "latencyMs": latency_ms,
+        "queries": queries,
+        # One search_titles call through the same stack: the unit the targets are measured in.
+        "roundTripP50Ms": _pct(round_trip_ms, 0.5),
+        "limiter": {"ratePerSec": settings.upstream_rate_per_s, "burst": settings.upstream_burst},
+    }
+    for name, flow in flows.items():
+        report[name] = {
+            "p50Ms": _pct(flow["ms"], 0.5),
+            "p95Ms": _pct(flow["ms"], 0.95),
+            "toolCallsPerLookup": round(calls[name] / queries, 2),
+            "upstreamRequestsPerLookup": round(sum(flow["requests"]) / queries, 2),
+            "maxUpstreamRequests": max(flow["requests"]),
+        }
+    report["limiter"]["throttled"] = upstream_limiter.stats()["throttled"]
+    for name, round_trips in (("findCopy", 2), ("findCopyCachedSearch", 1)):
+        flow = report[name]
+        assert flow["toolCallsPerLookup"] == 1, report
+        # One request per record checked (plus the search when cold); bestsellers add the odd page.
+        assert flow["upstreamRequestsPerLookup"] <= round_trips - 1 + server._FIND_MAX_RECORDS + 0.5, report
+        assert flow["p50Ms"] < round_trips * report["roundTripP50Ms"] + latency_ms / 2, report
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.queries, args.latency_ms)), indent=2))
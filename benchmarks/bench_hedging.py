@@ -0,0 +1,117 @@
+"""Tail latency with and without hedged GETs, and deadline enforcement.
+
+The stand-in upstream answers most requests in 10-20 ms but `--slow-fraction` of them
+take `--slow-ms`. Runs `--requests` distinct get_json calls (`--concurrency` at a time)
+with HEDGE_ENABLED off, then on, and reports p50/p95/p99 plus the upstream request count
+(the load hedging adds). A final phase points at an upstream that never answers in time
+and checks that a call under a 1 s deadline gives up within it instead of retrying.
+Exits non-zero if a check fails.
+
+Usage: python -m benchmarks.bench_hedging [--requests 600] [--concurrency 8]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Any, Dict, List
+
+from benchmarks.standin import StandInServer
+
+
+def _pct(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+
+async def _run(requests: int, concurrency: int, slow_fraction: float, slow_ms: float, hedge: bool) -> Dict[str, Any]:
+    from nlb_mcp import http_client
+    from nlb_mcp.config import settings
+    from nlb_mcp.metrics import UPSTREAM_SECONDS
+
+    rng = random.Random(11)
+    upstream = StandInServer(
+        lambda path, params: (200, {"titles": []}),
+        latency_s=lambda: slow_ms / 1000 if rng.random() < slow_fraction else rng.uniform(0.01, 0.02),
+    )
+    async with upstream:
+        settings.nlb_api_base = upstream.base_url  # type: ignore[assignment]
+        settings.hedge_enabled = hedge
+        UPSTREAM_SECONDS.values.clear()
+        # Warm-up so the hedge delay has enough samples to work from.
+        for n in range(settings.hedge_min_samples):
+            await http_client.get_json("/SearchTitles", {"Keywords": f"warm-{hedge}-{n}"})
+        before = upstream.requests
+        gate = asyncio.Semaphore(concurrency)
+        latencies: List[float] = []
+
+        async def call(n: int) -> None:
+            async with gate:
+                start = time.perf_counter()
+                await http_client.get_json("/SearchTitles", {"Keywords": f"q-{hedge}-{n}"})
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        await asyncio.gather(*(call(n) for n in range(requests)))
+        sent = upstream.requests - before
+        await http_client.aclose_client()
+    return {
+        "hedging": hedge,
+        "p50Ms": _pct(latencies, 0.5),
+        "p95Ms": _pct(latencies, 0.95),
+        "p99Ms": _pct(latencies, 0.99),
+        "maxMs": round(max(latencies), 1),
+        "meanMs": round(statistics.mean(latencies), 1),
+        "upstreamRequests": sent,
+        "extraLoad": round(sent / requests - 1, 3),
+    }
+
+
+async def _deadline_check(budget_s: float) -> Dict[str, Any]:
+    from nlb_mcp import http_client
+    from nlb_mcp.config import settings
+    from nlb_mcp.deadline import deadline
+
+    upstream = StandInServer(lambda path, params: (503, {"error": "Service Unavailable"}), latency_s=0.4)
+    async with upstream:
+        settings.nlb_api_base = upstream.base_url  # type: ignore[assignment]
+        settings.hedge_enabled = False
+        start = time.perf_counter()
+        try:
+            with deadline(budget_s):
+                await http_client.get_json("/SearchTitles", {"Keywords": "deadline"})
+            error = None
+        except http_client.UpstreamError as exc:
+            error = type(exc).__name__
+        elapsed = time.perf_counter() - start
+        await http_client.aclose_client()
+    return {"budgetS": budget_s, "elapsedS": round(elapsed, 3), "error": error, "upstreamRequests": upstream.requests}
+
+
+async def main(requests: int, concurrency: int, slow_fraction: float, slow_ms: float) -> Dict[str, Any]:
+    from nlb_mcp.config import settings
+
+    # No client-side throttling or breaker: this measures latency only.
+    settings.upstream_rate_per_s = 0
+    settings.breaker_failure_threshold = 0
+    off = await _run(requests, concurrency, slow_fraction, slow_ms, hedge=False)
+    on = await _run(requests, concurrency, slow_fraction, slow_ms, hedge=True)
+    bounded = await _deadline_check(1.0)
+    report = {"slowFraction": slow_fraction, "slowMs": slow_ms, "off": off, "on": on, "deadline": bounded}
+    assert on["p99Ms"] < off["p99Ms"] / 2, report
+    assert on["extraLoad"] <= 0.1, report
+    assert bounded["error"] and bounded["elapsedS"] < bounded["budgetS"] + 0.1, report
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--slow-fraction", type=float, default=0.03)
+    parser.add_argument("--slow-ms", type=float, default=400)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.requests, args.concurrency, args.slow_fraction, args.slow_ms)), indent=2))
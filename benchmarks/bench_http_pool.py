@@ -0,0 +1,80 @@
+"""Compare per-call httpx clients with the shared pooled client against a local stand-in.
+
+Usage: python -m benchmarks.bench_http_pool [--requests 500] [--concurrency 10]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+
+from benchmarks.standin import StandInServer
+
+
+async def _drive(call: Callable[[], Awaitable[Any]], total: int, concurrency: int) -> List[float]:
+    latencies: List[float] = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with sem:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    return latencies
+
+
+def _summary(name: str, latencies: List[float], wall: float, upstream: StandInServer) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "mode": name,
+        "requests": len(latencies),
+        "wallSeconds": round(wall, 4),
+        "throughputRps": round(len(latencies) / wall, 1),
+        "p50Ms": round(statistics.median(ordered) * 1000, 3),
+        "p95Ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 3),
+        "upstreamConnections": upstream.connections,
+    }
+
+
+async def main(total: int, concurrency: int) -> List[Dict[str, Any]]:
+    from nlb_mcp import http_client
+    from nlb_mcp.config import settings
+
+    results = []
+    async with StandInServer() as upstream:
+        settings.nlb_api_base = upstream.base_url  # type: ignore[assignment]
+        url = upstream.base_url + "/SearchTitles"
+
+        async def per_call() -> Any:
+            # Mirrors the previous behaviour: a fresh client (and connection) per request.
+            async with httpx.AsyncClient(timeout=settings.request_timeout_ms / 1000) as client:
+                response = await client.get(url, params={"Keywords": "bench"})
+                return response.json()
+
+        start = time.perf_counter()
+        lat = await _drive(per_call, total, concurrency)
+        results.append(_summary("per-call", lat, time.perf_counter() - start, upstream))
+
+        upstream.connections = 0
+        await http_client.get_json("/SearchTitles", {"Keywords": "warmup"})
+        start = time.perf_counter()
+        lat = await _drive(lambda: http_client.get_json("/SearchTitles", {"Keywords": "bench"}), total, concurrency)
+        results.append(_summary("pooled", lat, time.perf_counter() - start, upstream))
+        await http_client.aclose_client()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.requests, args.concurrency)), indent=2))
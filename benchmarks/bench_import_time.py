@@ -0,0 +1,82 @@
+"""Import-time budget for the server module, measured with `python -X importtime`.
+
+Imports `nlb_mcp.server` in a fresh interpreter and fails if its cumulative import time
+exceeds `--budget-ms`, if settings were loaded, or if any module in `DEFERRED` (pulled
+in by create_server() or the first upstream call instead) was imported. Also reports
+the time to build the server afterwards, which is what a cold start pays in total.
+
+Usage: python -m benchmarks.bench_import_time [--budget-ms 350] [--runs 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+# Heavy dependencies that must not load when the module is merely imported.
+DEFERRED = ("fastmcp", "mcp", "httpx", "tenacity", "anyio", "starlette", "sqlite3", "urllib.request")
+
+_PROBE = """
+import json, sys, time
+import nlb_mcp.server as s
+import nlb_mcp.config as c
+loaded = [m for m in {deferred!r} if m in sys.modules]
+settings_loaded = c._settings is not None
+start = time.perf_counter()
+s.create_server()
+print("PROBE " + json.dumps([loaded, settings_loaded, time.perf_counter() - start]))
+"""
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def _probe() -> Dict[str, Any]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(deferred=DEFERRED)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = 0
+    own: List[Dict[str, Any]] = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, total_us, indent, name = int(match[1]), int(match[2]), match[3], match[4]
+        if name == "nlb_mcp.server" and len(indent) <= 1:
+            cumulative_us = total_us
+        if name.startswith("nlb_mcp"):
+            own.append({"module": name, "selfMs": round(self_us / 1000, 2)})
+    probe = next(line for line in proc.stdout.splitlines() if line.startswith("PROBE"))
+    loaded, settings_loaded, build_s = json.loads(probe[len("PROBE ") :])
+    return {
+        "importMs": round(cumulative_us / 1000, 1),
+        "createServerMs": round(build_s * 1000, 1),
+        "deferredLoaded": loaded,
+        "settingsLoadedAtImport": settings_loaded,
+        "ownModules": own,
+    }
+
+
+def main(budget_ms: float, runs: int) -> Dict[str, Any]:
+    # Best of `runs` to smooth out disk cache and scheduler noise.
+    results = [_probe() for _ in range(runs)]
+    best = min(results, key=lambda r: r["importMs"])
+    report = {"budgetMs": budget_ms, **best}
+    assert not best["deferredLoaded"], report
+    assert not best["settingsLoadedAtImport"], report
+    assert best["importMs"] <= budget_ms, report
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget-ms", type=float, default=350)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(main(args.budget_ms, args.runs), indent=2))
@@ -0,0 +1,114 @@
+"""Initial and incremental syncs of the local title mirror against the fake upstream.
+
+The first sync has no checkpoint and reads the Quarterly window. An immediate second
+sync only needs the Weekly window, and one "ten days later" (checkpoint moved back)
+needs the Monthly window. Reports upstream requests, titles seen/added and duration per
+run, checks the mirror holds every title the fake acquired in the last quarter, and
+times point lookups from the store. A sync into a fresh mirror capped at one page must
+keep its checkpoint unadvanced, and of four workers starting run_sync on one file at
+once only one may sync. While another connection holds the write lock, a lease attempt
+waits on the mirror thread and must not stall the event loop. Exits non-zero if a check fails.
+
+Usage: python -m benchmarks.bench_mirror [--titles 3000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Any, Dict
+
+# Measure the sync, not the client-side quota.
+os.environ.setdefault("UPSTREAM_RATE_PER_S", "0")
+
+
+async def main(titles: int) -> Dict[str, Any]:
+    from benchmarks import fake_nlb
+    from nlb_mcp.config import settings
+    from nlb_mcp.http_client import aclose_client
+    from nlb_mcp import mirror as mirror_module
+    from nlb_mcp.mirror import TitleMirror, run_sync, sync_once
+
+    upstream, fake = fake_nlb.build(titles=titles)
+    quarter = {brn for brn, days in fake.catalogue.acquired_days.items() if days < 91}
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        mirror = TitleMirror(os.path.join(tmp, "mirror.db"))
+        async with upstream:
+            settings.nlb_api_base = upstream.base_url  # type: ignore[assignment]
+            capped = TitleMirror(os.path.join(tmp, "capped.db"))
+            truncated = await sync_once(capped, max_pages=1)
+            assert truncated.get("truncated") and "lastSync" not in capped.checkpoint(), truncated
+            # Separate TitleMirror objects stand in for worker processes sharing the file.
+            # Identical in-flight requests coalesce within a process, so count syncs, not requests.
+            shared_path = os.path.join(tmp, "shared.db")
+            shared_syncs = 0
+
+            async def counted(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+                nonlocal shared_syncs
+                shared_syncs += 1
+                return await sync_once(*args, **kwargs)
+
+            mirror_module.sync_once = counted  # type: ignore[assignment]
+            workers = [asyncio.create_task(run_sync(TitleMirror(shared_path), 3600.0)) for _ in range(4)]
+            while "lastSync" not in TitleMirror(shared_path).checkpoint():
+                await asyncio.sleep(0.05)
+            await asyncio.sleep(0.2)
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            mirror_module.sync_once = sync_once  # type: ignore[assignment]
+            blocker = sqlite3.connect(shared_path, isolation_level=None)
+            blocker.execute("BEGIN IMMEDIATE")
+            waiter = TitleMirror(shared_path)
+            lease = asyncio.create_task(waiter.run(waiter.try_lease, "bench"))
+            stall_s, tick = 0.0, time.perf_counter()
+            for _ in range(50):
+                await asyncio.sleep(0.01)
+                stall_s, tick = max(stall_s, time.perf_counter() - tick), time.perf_counter()
+            blocker.execute("ROLLBACK")
+            blocker.close()
+            assert await lease
+            for label, rewind_s in (("initial", None), ("immediate", 0.0), ("after10Days", 10 * 86400.0)):
+                if rewind_s:
+                    checkpoint = mirror.checkpoint()
+                    checkpoint["lastSync"] -= rewind_s
+                    mirror.save_checkpoint(checkpoint)
+                before = upstream.requests
+                result = await sync_once(mirror)
+                runs.append({"run": label, "upstreamRequests": upstream.requests - before, **result})
+            await aclose_client()
+        stored = mirror.count()
+        start = time.perf_counter()
+        for brn in list(quarter)[:500]:
+            assert mirror.get(brn) is not None, brn
+        lookup_us = (time.perf_counter() - start) / min(len(quarter), 500) * 1e6
+        size = mirror.used_bytes()
+    report = {
+        "catalogueRecords": len(fake.catalogue.acquired_days),
+        "acquiredLastQuarter": len(quarter),
+        "stored": stored,
+        "storeBytes": size,
+        "lookupUs": round(lookup_us, 1),
+        "runs": runs,
+        "sharedStartSyncs": shared_syncs,
+        "lockedLoopStallMs": round(stall_s * 1000, 1),
+    }
+    assert stored == len(quarter), report
+    assert [r["window"] for r in runs] == ["Quarterly", "Weekly", "Monthly"], report
+    assert runs[1]["upstreamRequests"] < runs[0]["upstreamRequests"] and runs[1]["added"] == 0, report
+    assert shared_syncs == 1, report
+    assert stall_s < 0.1, report
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--titles", type=int, default=3000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.titles)), indent=2))
@@ -0,0 +1,73 @@
+"""Per-record CPU and allocation cost of title/availability normalization.
+
+Covers full vs projected title records, camelCase vs PascalCase upstream keys (both
+go through the compiled key resolvers in nlb_mcp.keys) and `_basic_availability`.
+
+Usage: python -m benchmarks.bench_normalize [--titles 200] [--records 5] [--repeat 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+
+from benchmarks.payloads import availability_payload, search_titles_payload
+
+
+def _pascal(value: Any) -> Any:
+    # Legacy-style payload: PascalCase keys everywhere.
+    if isinstance(value, dict):
+        return {k[:1].upper() + k[1:]: _pascal(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_pascal(v) for v in value]
+    return value
+
+
+def _measure(name: str, fn: Callable[[], Any], records: int, repeat: int) -> Dict[str, Any]:
+    fn()  # warm caches
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "case": name,
+        "usPerRecord": round(elapsed / repeat / records * 1e6, 3),
+        "peakBytesPerRecord": round(peak / records, 1),
+    }
+
+
+def main(titles: int, records_per_title: int, repeat: int) -> Dict[str, Any]:
+    from nlb_mcp.models import BASIC_RECORD_FIELDS, normalize_titles
+    from nlb_mcp.server import _basic_availability as basic_availability
+
+    payload = search_titles_payload(titles, records_per_title)
+    pascal = {"titles": [dict(t, records=_pascal(t["records"])) for t in payload["titles"]]}
+    items = availability_payload(titles * records_per_title)
+    records = titles * records_per_title
+    return {
+        "titles": titles,
+        "records": records,
+        "results": [
+            _measure("full", lambda: normalize_titles(payload), records, repeat),
+            _measure("full-pascal", lambda: normalize_titles(pascal), records, repeat),
+            _measure("projected", lambda: normalize_titles(payload, fields=BASIC_RECORD_FIELDS), records, repeat),
+            _measure("projected-pascal", lambda: normalize_titles(pascal, fields=BASIC_RECORD_FIELDS), records, repeat),
+            _measure("basic-availability", lambda: basic_availability(items, None), records, repeat),
+        ],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--titles", type=int, default=200)
+    parser.add_argument("--records", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(main(args.titles, args.records, args.repeat), indent=2))
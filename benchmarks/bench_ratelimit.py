@@ -0,0 +1,120 @@
+"""Drive a burst of distinct requests at a quota-enforcing stand-in upstream.
+
+The stand-in answers 429 with Retry-After once more than `--quota` requests arrive
+within a one-second window. Reports achieved rate, 429s seen and failures, so the
+client-side limiter settings (UPSTREAM_RATE_PER_S etc.) can be tuned to the quota.
+Then cancels a queue of callers waiting on an empty bucket (as a tool deadline would)
+and checks their reservations were returned, and has a burst of parallel requests all
+come back overloaded: the concurrency limit must halve once for the burst, and again only
+for a failure a round trip later. Exits non-zero if a check fails.
+
+Usage: python -m benchmarks.bench_ratelimit [--requests 60] [--quota 10]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any, Deque, Dict
+
+from benchmarks.standin import StandInServer
+
+
+async def main(total: int, quota: int) -> Dict[str, Any]:
+    from nlb_mcp import http_client
+    from nlb_mcp.config import settings
+    from nlb_mcp.ratelimit import upstream_limiter
+
+    window: Deque[float] = deque()
+    throttled = 0
+
+    def handler(path: str, params: Dict[str, str]) -> Any:
+        nonlocal throttled
+        now = time.monotonic()
+        while window and now - window[0] > 1.0:
+            window.popleft()
+        if len(window) >= quota:
+            throttled += 1
+            return 429, {"statusCode": 429, "error": "API calls quota exceeded"}, {"Retry-After": "1"}
+        window.append(now)
+        return 200, {"titles": []}
+
+    async with StandInServer(handler) as upstream:
+        settings.nlb_api_base = upstream.base_url  # type: ignore[assignment]
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(http_client.get_json("/SearchTitles", {"Keywords": f"q{i}"}) for i in range(total)),
+            return_exceptions=True,
+        )
+        wall = time.perf_counter() - start
+        await http_client.aclose_client()
+
+    failures = sum(isinstance(r, Exception) for r in results)
+    return {
+        "requests": total,
+        "quotaPerSec": quota,
+        "clientRatePerSec": settings.upstream_rate_per_s,
+        "wallSeconds": round(wall, 2),
+        "achievedRps": round((total - failures) / wall, 2),
+        "upstream429s": throttled,
+        "failures": failures,
+        "limiter": upstream_limiter.stats(),
+    }
+
+
+async def cancelled_waiters(waiters: int = 20) -> Dict[str, Any]:
+    from nlb_mcp.ratelimit import TokenBucket
+
+    bucket = TokenBucket(rate=10, burst=1)
+    await bucket.acquire()
+    tasks = [asyncio.create_task(bucket.acquire()) for _ in range(waiters)]
+    await asyncio.sleep(0.01)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    start = time.perf_counter()
+    await bucket.acquire()
+    report = {"cancelledWaiters": waiters, "nextAcquireS": round(time.perf_counter() - start, 3)}
+    # Without refunds the next caller would queue behind all 20 cancelled reservations (~2 s).
+    assert report["nextAcquireS"] < 0.2, report
+    return report
+
+
+async def overload_burst(parallel: int = 8, rtt_s: float = 0.05) -> Dict[str, Any]:
+    from nlb_mcp.ratelimit import AdaptiveConcurrency
+
+    limiter = AdaptiveConcurrency(initial=16, minimum=1, maximum=20)
+
+    async def attempt() -> None:
+        await limiter.acquire()
+        started = time.monotonic()
+        await asyncio.sleep(rtt_s)
+        limiter.release(time.monotonic() - started)
+        limiter.on_overload()
+
+    await asyncio.gather(*(attempt() for _ in range(parallel)))
+    after_burst = limiter.limit
+    await attempt()
+    report = {"parallel": parallel, "limitAfterBurst": after_burst, "limitAfterNextRoundTrip": limiter.limit}
+    # Halving per failure would take the burst from 16 to the floor of 1.
+    assert after_burst == 8 and limiter.limit == 4, report
+    return report
+
+
+async def run(total: int, quota: int) -> Dict[str, Any]:
+    return {
+        **await main(total, quota),
+        "cancellation": await cancelled_waiters(),
+        "overloadBurst": await overload_burst(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--quota", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.requests, args.quota)), indent=2))
@@ -0,0 +1,252 @@
+"""Local BM25 search index: build, snapshot and query cost at scale, and search_titles with/without it.
+
+Scale phase: indexes `--titles` synthetic titles whose words follow a Zipf distribution
+(closer to a real catalogue than the fake's 20-word vocabulary), then reports insert
+rate, snapshot size and save/load time, and query latency percentiles for one-word,
+two-word and ISBN queries drawn from indexed titles.
+
+Live phase: runs the same `--queries` search_titles calls (wrapped as the server wraps
+them) against the fake upstream with SEARCH_INDEX_ENABLED off, then on with the index
+seeded from the fake catalogue. Reports latency and upstream requests, and checks every
+locally answered title really matches its query and its records carry the same fields
+as an upstream answer. Then looks up ISBNs of the catalogue:
+with the index on, each must be answered locally with its own record. Exits non-zero if
+a check fails.
+
+Compaction check: replaced titles leave tombstones that their old ISBNs still point at;
+after a snapshot round trip every ISBN must find its current title. Sampling check: a
+popular query repeated 200 times must not raise the coverage estimate past a handful of
+distinct queries that found nothing held.
+
+Usage: python -m benchmarks.bench_search_index [--titles 1000000] [--queries 300]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import string
+import tempfile
+import time
+from typing import Any, Dict, List
+
+# Measure the search path, not the client-side quota.
+os.environ.setdefault("UPSTREAM_RATE_PER_S", "0")
+
+
+def _pct(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+
+def _corpus(titles: int, seed: int = 5) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    vocab = ["".join(rng.choices(string.ascii_lowercase, k=rng.randrange(3, 10))) for _ in range(50_000)]
+    names = ["".join(rng.choices(string.ascii_lowercase, k=rng.randrange(4, 9))).title() for _ in range(20_000)]
+    weights = [1 / (rank + 1) ** 1.07 for rank in range(len(vocab))]
+    cumulative = [0.0] * len(weights)
+    running = 0.0
+    for i, w in enumerate(weights):
+        running += w
+        cumulative[i] = running
+    out = []
+    brn = 300_000_000
+    for _ in range(titles):
+        words = rng.choices(vocab, cum_weights=cumulative, k=rng.randrange(2, 7))
+        subject = " ".join(rng.choices(vocab, cum_weights=cumulative, k=2))
+        records = []
+        for _ in range(rng.randrange(1, 3)):
+            brn += 1
+            isbn = "978" + "".join(rng.choices(string.digits, k=10))
+            records.append({"brn": brn, "isbns": [isbn], "format": {"code": "BK", "name": "Book"}, "subjects": [subject]})
+        out.append({"title": " ".join(words).title(), "author": f"{rng.choice(names)} {rng.choice(names)}", "records": records})
+    return out
+
+
+def scale(titles: int, queries: int) -> Dict[str, Any]:
+    from nlb_mcp.search_index import SearchIndex, tokenize
+
+    corpus = _corpus(titles)
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.add_titles(corpus)
+    build_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.bin")
+        start = time.perf_counter()
+        index.save(path)
+        save_s = time.perf_counter() - start
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        loaded = SearchIndex.load(path)
+        load_s = time.perf_counter() - start
+    assert len(loaded) == len(index) == titles
+
+    rng = random.Random(9)
+    report: Dict[str, Any] = {}
+    for kind in ("oneWord", "twoWords", "isbn"):
+        batch = []
+        for _ in range(queries):
+            title = rng.choice(corpus)
+            words = tokenize(title["title"])
+            if kind == "isbn":
+                batch.append(title["records"][0]["isbns"][0])
+            else:
+                batch.append(" ".join(rng.sample(words, min(len(words), 1 if kind == "oneWord" else 2))))
+        # The first pass includes building the (tf, length) groups of common terms.
+        for label in ("cold", "warm"):
+            latencies, found = [], 0
+            for query in batch:
+                t0 = time.perf_counter()
+                top = loaded.search(query, 5)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                assert top, query
+                found += len(top)
+            report[f"{kind}{label.title()}"] = {
+                "p50Ms": _pct(latencies, 0.5),
+                "p95Ms": _pct(latencies, 0.95),
+                "p99Ms": _pct(latencies, 0.99),
+                "meanResults": round(found / queries, 2),
+            }
+    return {
+        "titles": titles,
+        "terms": loaded.stats()["terms"],
+        "buildS": round(build_s, 2),
+        "insertsPerS": round(titles / build_s),
+        "snapshotBytes": size,
+        "saveS": round(save_s, 3),
+        "loadS": round(load_s, 3),
+        "queries": report,
+    }
+
+
+def compaction() -> Dict[str, Any]:
+    from nlb_mcp.search_index import SearchIndex
+
+    def book(brn: int, title: str, isbn: str) -> Dict[str, Any]:
+        return {"title": title, "author": "Tan", "records": [{"brn": brn, "isbns": [isbn], "format": {"code": "BK"}}]}
+
+    names = ["zero", "one", "two", "three", "four"]
+    index = SearchIndex()
+    index.add_titles(book(100 + i, f"Book number {names[i]}", f"978000000000{i}") for i in range(5))
+    index.add_title(book(100, "Book zero revised", "9781111111111"))
+    # One title replaced repeatedly: its tombstone ids end up past the compacted doc count.
+    for n in range(5):
+        index.add_title(book(104, f"Book four edition {n}", f"978222222222{n}"))
+    expected = {"9780000000000": "Book zero revised", "9781111111111": "Book zero revised"}
+    expected.update({f"978000000000{i}": f"Book number {names[i]}" for i in (1, 2, 3)})
+    expected.update({f"978222222222{n}": "Book four edition 4" for n in range(5)})
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.bin")
+        index.save(path)
+        loaded = SearchIndex.load(path)
+    wrong = {}
+    for label, idx in (("compacted", index), ("loaded", loaded)):
+        for isbn, title in expected.items():
+            titles = [t["title"] for t in idx.search(isbn, 1)]
+            if titles != [title]:
+                wrong[f"{label} {isbn}"] = titles
+    report = {"titles": len(loaded), "isbns": len(expected), "wrong": wrong}
+    assert not wrong and len(loaded) == 5, report
+    return report
+
+
+def sampling() -> Dict[str, Any]:
+    from nlb_mcp.search_index import SearchIndex
+
+    def response(brns: range) -> Dict[str, Any]:
+        return {"titles": [{"title": f"Title {b}", "records": [{"brn": b, "format": {"code": "BK"}}]} for b in brns]}
+
+    index = SearchIndex()
+    for i in range(12):
+        index.observe(f"distinct query {i}", response(range(1000 + i * 5, 1005 + i * 5)))
+    before = index.coverage()
+    for _ in range(200):
+        index.observe("popular query", response(range(1000, 1002)))
+    report = {"coverageDistinct": before, "coverageAfterRepeats": round(index.coverage() or 0.0, 3)}
+    assert report["coverageAfterRepeats"] < 0.1, report
+    return report
+
+
+async def _live_run(queries: List[str], enabled: bool) -> Dict[str, Any]:
+    from benchmarks import fake_nlb
+    from nlb_mcp import search_index
+    from nlb_mcp.config import settings
+    from nlb_mcp.http_client import aclose_client
+    from nlb_mcp.models import normalize_titles
+    from nlb_mcp.nlb_client import get_response_cache
+    from nlb_mcp.server import _instrumented, tool_search_titles
+
+    upstream, fake = fake_nlb.build(titles=2000, latency="lognormal:40:0.5")
+    settings.search_index_enabled = enabled
+    get_response_cache().clear()
+    search_index._index = search_index.SearchIndex()
+    if enabled:
+        groups = [fake.catalogue.public(g) for g in fake.catalogue.groups]
+        search_index._index.add_titles(normalize_titles({"titles": groups}, fields=search_index.INDEX_RECORD_FIELDS)[0]["titles"])
+    tool = _instrumented("search_titles", tool_search_titles)
+    latencies: List[float] = []
+    wrong = missing = 0
+    async with upstream:
+        settings.nlb_api_base = upstream.base_url  # type: ignore[assignment]
+        for query in queries:
+            before = search_index._index.local_answers
+            start = time.perf_counter()
+            result = await tool(keywords=query)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if search_index._index.local_answers > before:
+                expected = {r["brn"] for g in fake._match_groups(query) for r in g["records"]}
+                wrong += sum(1 for t in result for r in t["records"] if r["brn"] not in expected)
+                missing += sum(1 for t in result for r in t["records"] if {"brn", "format", "availability"} - r.keys())
+        isbn_local = 0
+        for isbn in random.Random(6).sample(sorted(fake.catalogue.by_isbn), 20):
+            before = search_index._index.local_answers
+            result = await tool(keywords=isbn)
+            if search_index._index.local_answers > before:
+                isbn_local += 1
+                wrong += fake.catalogue.by_isbn[isbn] not in {r["brn"] for t in result for r in t["records"]}
+        await aclose_client()
+    return {
+        "indexEnabled": enabled,
+        "p50Ms": _pct(latencies, 0.5),
+        "p99Ms": _pct(latencies, 0.99),
+        "upstreamRequests": upstream.requests,
+        "index": search_index._index.stats(),
+        "isbnLocalAnswers": isbn_local,
+        "wrongTitles": wrong,
+        "recordsMissingFields": missing,
+    }
+
+
+async def live(queries: int) -> Dict[str, Any]:
+    from benchmarks.payloads import WORDS
+
+    rng = random.Random(3)
+    # Distinct queries, so the response cache cannot answer any of them.
+    pairs = sorted({tuple(sorted(rng.sample(WORDS, 2))) for _ in range(queries * 4)})
+    triples = sorted({tuple(sorted(rng.sample(WORDS, 3))) for _ in range(queries * 4)})
+    picked = [" ".join(p) for p in (pairs + triples)][:queries]
+    rng.shuffle(picked)
+    return {"off": await _live_run(picked, False), "on": await _live_run(picked, True)}
+
+
+def main(titles: int, queries: int) -> Dict[str, Any]:
+    report = {"compaction": compaction(), "sampling": sampling(), "scale": scale(titles, queries), "live": asyncio.run(live(queries))}
+    on, off = report["live"]["on"], report["live"]["off"]
+    assert on["wrongTitles"] == 0 and on["recordsMissingFields"] == 0, report
+    assert on["upstreamRequests"] < off["upstreamRequests"] / 2, report
+    assert on["p50Ms"] < off["p50Ms"], report
+    assert on["isbnLocalAnswers"] == 20, report
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--titles", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+    print(json.dumps(main(args.titles, args.queries), indent=2))
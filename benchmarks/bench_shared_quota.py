@@ -0,0 +1,102 @@
+"""Aggregate upstream rate of several worker processes, with and without a shared quota file.
+
+Starts one stand-in upstream in this process and `--workers` subprocesses that each
+fire `--requests` distinct get_json calls at it with UPSTREAM_RATE_PER_S=`--rate`.
+With per-process buckets the host sends roughly workers x rate; with
+UPSTREAM_QUOTA_FILE the aggregate must stay within rate (plus the initial burst).
+Exits non-zero if the shared run exceeds the budget.
+
+Usage: python -m benchmarks.bench_shared_quota [--workers 4] [--requests 30] [--rate 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks.standin import StandInServer
+
+_BURST = 5
+
+
+async def _worker(requests: int) -> None:
+    from nlb_mcp import http_client
+
+    await asyncio.gather(
+        *(http_client.get_json("/SearchTitles", {"Keywords": f"p{os.getpid()}-{n}"}) for n in range(requests))
+    )
+    await http_client.aclose_client()
+
+
+def _max_in_window(stamps: List[float], window: float = 1.0) -> int:
+    best, start = 0, 0
+    for end, stamp in enumerate(stamps):
+        while stamp - stamps[start] >= window:
+            start += 1
+        best = max(best, end - start + 1)
+    return best
+
+
+async def _run(workers: int, requests: int, rate: float, quota_file: Optional[str]) -> Dict[str, Any]:
+    stamps: List[float] = []
+
+    def handler(path: str, params: Dict[str, str]) -> Any:
+        stamps.append(time.monotonic())
+        return 200, {"titles": []}
+
+    async with StandInServer(handler) as upstream:
+        env = dict(
+            os.environ,
+            NLB_API_BASE=upstream.base_url,
+            UPSTREAM_RATE_PER_S=str(rate),
+            UPSTREAM_BURST=str(_BURST),
+            UPSTREAM_CONCURRENCY_MAX="50",
+            CACHE_ENABLED="false",
+            LOG_LEVEL="WARNING",
+        )
+        env.pop("UPSTREAM_QUOTA_FILE", None)
+        if quota_file:
+            env["UPSTREAM_QUOTA_FILE"] = quota_file
+        cmd = [sys.executable, "-m", "benchmarks.bench_shared_quota", "--worker", "--requests", str(requests)]
+        procs = [await asyncio.create_subprocess_exec(*cmd, env=env) for _ in range(workers)]
+        codes = [await p.wait() for p in procs]
+    assert not any(codes), codes
+    elapsed = stamps[-1] - stamps[0] if len(stamps) > 1 else 0.0
+    return {
+        "shared": bool(quota_file),
+        "requests": len(stamps),
+        "elapsedS": round(elapsed, 2),
+        # Excluding the initial burst, which the bucket is allowed to release at once.
+        "sustainedRatePerS": round((len(stamps) - _BURST) / elapsed, 2) if elapsed else None,
+        "maxIn1s": _max_in_window(stamps),
+    }
+
+
+async def main(workers: int, requests: int, rate: float) -> Dict[str, Any]:
+    per_process = await _run(workers, requests, rate, None)
+    with tempfile.TemporaryDirectory() as tmp:
+        shared = await _run(workers, requests, rate, os.path.join(tmp, "quota"))
+    report = {"budgetPerS": rate, "burst": _BURST, "perProcess": per_process, "shared": shared}
+    # Small allowance for request-arrival jitter at the stand-in.
+    assert shared["sustainedRatePerS"] <= rate * 1.05, report
+    assert shared["maxIn1s"] <= rate * 1.1 + _BURST, report
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--rate", type=float, default=20)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        asyncio.run(_worker(args.requests))
+    else:
+        print(json.dumps(asyncio.run(main(args.workers, args.requests, args.rate)), indent=2))
@@ -0,0 +1,182 @@
+"""Load/latency suite: drive every registered MCP tool against the local fake NLB upstream.
+
+Each tool is called through an in-memory FastMCP client at the given concurrency and
+reported as throughput plus p50/p95/p99 latency. CPU-only microbenchmarks for
+normalize_titles and _basic_availability run afterwards. Results are written as JSON
+(`--output`) so runs can be compared across releases.
+
+The upstream is benchmarks.fake_nlb, so latency distributions, 5xx rates and 429
+quotas can be injected to exercise retries, caching and concurrency limits.
+
+Usage: python -m benchmarks.bench_tools [--requests 200] [--concurrency 16]
+       [--latency lognormal:20:0.4] [--error-rate 0] [--quota-per-s 0]
+       [--distinct 0] [--tools search_titles,list_branches] [--output bench-results.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks import fake_nlb
+from benchmarks.payloads import WORDS
+
+# Measure the server, not the client-side quota: no token bucket unless asked for.
+os.environ.setdefault("UPSTREAM_RATE_PER_S", "0")
+
+# BRNs known to the fake catalogue; filled in once it is built.
+_BRNS: List[int] = []
+
+
+def _keywords(i: int) -> str:
+    return f"{WORDS[i % len(WORDS)]} {WORDS[(i * 7 + 3) % len(WORDS)]}"
+
+
+def _brn(i: int) -> str:
+    return str(_BRNS[i % len(_BRNS)])
+
+
+# Tool name -> arguments for the i-th call (i is folded onto `--distinct` argument sets).
+TOOL_ARGS: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    "health_check": lambda i: {},
+    "search_titles": lambda i: {"keywords": _keywords(i)},
+    "search_titles_advanced": lambda i: {"title": WORDS[i % len(WORDS)], "author": WORDS[(i * 3) % len(WORDS)]},
+    "availability_by_title": lambda i: {"brn": _brn(i)},
+    "availability_at_branch": lambda i: {"branch_id": "AMKPL", "brn": _brn(i)},
+    "availability_bulk": lambda i: {"brns": [_brn(i * 10 + k) for k in range(10)]},
+    "title_details": lambda i: {"brns": [_brn(i * 10 + k) for k in range(10)]},
+    "find_copy": lambda i: {"title": WORDS[i % len(WORDS)], "branch_ids": ["AMKPL"]},
+    "checkout_trends": lambda i: {"location": ("AMKPL", "tampines", "WRL")[i % 3], "duration": ("past30days", "pastmonth")[i % 2]},
+    "list_branches": lambda i: {"filter": ("tampines", "orchard lib", "pl", "woodlands")[i % 4]},
+}
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _latency_summary(latencies: List[float], wall: float, errors: int) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "wallSeconds": round(wall, 4),
+        "throughputRps": round(len(latencies) / wall, 1) if wall else 0.0,
+        "p50Ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95Ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99Ms": round(percentile(ordered, 99) * 1000, 3),
+        "maxMs": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+async def run_tool(client: Any, name: str, total: int, concurrency: int, distinct: int) -> Dict[str, Any]:
+    make_args = TOOL_ARGS[name]
+    latencies: List[float] = []
+    errors = 0
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with sem:
+            start = time.perf_counter()
+            try:
+                await client.call_tool(name, make_args(i % distinct if distinct else i))
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return {"tool": name, "concurrency": concurrency, **_latency_summary(latencies, time.perf_counter() - start, errors)}
+
+
+async def main(
+    total: int,
+    concurrency: int,
+    latency: str,
+    error_rate: float,
+    quota_per_s: int,
+    distinct: int,
+    tools: Optional[List[str]],
+) -> Dict[str, Any]:
+    from fastmcp import Client
+
+    from nlb_mcp import server as server_module
+    from nlb_mcp.config import settings
+    from nlb_mcp.http_client import aclose_client
+
+    from benchmarks import bench_normalize
+
+    results: List[Dict[str, Any]] = []
+    upstream, fake = fake_nlb.build(latency=latency, error_rate=error_rate, quota_per_s=quota_per_s)
+    _BRNS[:] = fake.catalogue.brns
+    async with upstream:
+        settings.nlb_api_base = upstream.base_url  # type: ignore[assignment]
+        server = server_module.create_server()
+        async with Client(server) as client:
+            registered = [tool.name for tool in await client.list_tools()]
+            for name in tools or registered:
+                if name not in TOOL_ARGS:
+                    continue
+                before = upstream.requests
+                row = await run_tool(client, name, total, concurrency, distinct)
+                row["upstreamRequests"] = upstream.requests - before
+                results.append(row)
+        await aclose_client()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": total,
+            "concurrency": concurrency,
+            "upstreamLatency": latency,
+            "upstreamErrorRate": error_rate,
+            "upstreamQuotaPerSec": quota_per_s,
+            "upstreamInjectedErrors": fake.injected_errors,
+            "upstreamThrottled": fake.throttled,
+            "distinctArgs": distinct or total,
+            "cacheEnabled": settings.cache_enabled,
+        },
+        "tools": results,
+        "micro": bench_normalize.main(titles=200, records_per_title=5, repeat=10)["results"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", default="lognormal:20:0.4", help="fake upstream latency (see benchmarks.fake_nlb)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream 500/503 responses")
+    parser.add_argument("--quota-per-s", type=int, default=0, help="fake upstream 429 quota (0 = unlimited)")
+    parser.add_argument("--distinct", type=int, default=0, help="distinct argument sets (0 = every call unique)")
+    parser.add_argument("--tools", default="", help="comma-separated tool names (default: all registered)")
+    parser.add_argument("--output", default="", help="write JSON results to this path")
+    args = parser.parse_args()
+    report = asyncio.run(
+        main(
+            args.requests,
+            args.concurrency,
+            args.latency,
+            args.error_rate,
+            args.quota_per_s,
+            args.distinct,
+            [t for t in args.tools.split(",") if t] or None,
+        )
+    )
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+    print(text)
@@ -0,0 +1,107 @@
+"""Checkout-trend snapshots: background refresh cost and per-call latency served from them.
+
+Refreshes every branch in resources/branches.json for both durations against the fake
+upstream (`--latency`, `--concurrency` requests at a time), then makes `--calls`
+checkout_trends calls (wrapped as the server wraps them). Compares them with the same
+calls when no snapshot exists yet and each one goes upstream. Exits non-zero if a
+served call reached upstream, or if a branch name resolves to the wrong branch (an
+unknown or ambiguous name must be rejected, not matched to the nearest branch).
+
+Usage: python -m benchmarks.bench_trends [--calls 2000] [--concurrency 4] [--latency lognormal:40:0.5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+# Measure the refresh, not the client-side quota.
+os.environ.setdefault("UPSTREAM_RATE_PER_S", "0")
+
+
+def _pct(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+
+async def _calls(tool: Any, keys: List[Tuple[str, str]], calls: int) -> List[float]:
+    latencies = []
+    for i in range(calls):
+        code, duration = keys[i % len(keys)]
+        start = time.perf_counter()
+        result = await tool(location=code, duration=duration)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert result["trends"] and result["asOf"], result
+    return latencies
+
+
+async def main(calls: int, concurrency: int, latency: str) -> Dict[str, Any]:
+    from benchmarks import fake_nlb
+    from nlb_mcp import trends
+    from nlb_mcp.config import settings
+    from nlb_mcp.http_client import aclose_client
+    from nlb_mcp.server import _instrumented, tool_checkout_trends
+
+    upstream, _ = fake_nlb.build(latency=latency)
+    tool = _instrumented("checkout_trends", tool_checkout_trends)
+    async with upstream:
+        settings.nlb_api_base = upstream.base_url  # type: ignore[assignment]
+        snapshots = trends.get_trends()
+        codes = list(snapshots.locations)
+        keys = [(code, duration) for code in codes for duration in trends.DURATIONS]
+
+        # No snapshots yet: the first call per location/duration goes upstream.
+        cold = await _calls(tool, keys, len(keys))
+        cold_requests = upstream.requests
+        trends._trends = None
+        snapshots = trends.get_trends()
+
+        before = upstream.requests
+        refresh = await snapshots.refresh_all(concurrency)
+        refresh_requests = upstream.requests - before
+
+        before = upstream.requests
+        served = await _calls(tool, keys, calls)
+        served_requests = upstream.requests - before
+
+        names = {"tampines": "TRL", "Ang Mo Kio": "AMKPL", "Nowhere Public Library": None, "jurong": None}
+        resolved: Dict[str, Any] = {}
+        for name in names:
+            try:
+                resolved[name] = (await tool(location=name))["location"]
+            except ValueError:
+                resolved[name] = None
+        await aclose_client()
+    report = {
+        "locations": len(codes),
+        "refresh": {**refresh, "upstreamRequests": refresh_requests, "concurrency": concurrency},
+        "upstreamPerCall": {
+            "calls": len(cold),
+            "upstreamRequests": cold_requests,
+            "p50Ms": _pct(cold, 0.5),
+            "p99Ms": _pct(cold, 0.99),
+        },
+        "fromSnapshot": {
+            "calls": calls,
+            "upstreamRequests": served_requests,
+            "p50Ms": _pct(served, 0.5),
+            "p99Ms": _pct(served, 0.99),
+        },
+    }
+    assert refresh["failed"] == 0 and refresh_requests == len(keys), report
+    assert served_requests == 0, report
+    assert resolved == names, resolved
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", default="lognormal:40:0.5")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.calls, args.concurrency, args.latency)), indent=2))
@@ -0,0 +1,488 @@
+"""Swagger-driven fake of the NLB Catalogue API for load tests without touching the real quota.
+
+Response bodies are generated from the component schemas in help/nlb-swagger.json
+(seeded, so runs are reproducible); query parameters are validated against the
+operation definitions. Every endpoint is served with the upstream paging semantics
+(Limit/Offset/SetId, hasMoreRecords/nextRecordsOffset), plus configurable latency,
+5xx injection and a 429 quota window.
+
+Run standalone and point the server at it:
+
+    python -m benchmarks.fake_nlb --port 8765 --latency lognormal:40:0.5 --error-rate 0.02 --quota-per-s 15
+    NLB_API_BASE=http://127.0.0.1:8765/api/v2/Catalogue fastmcp run nlb_mcp/server.py:create_server
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+import zlib
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from benchmarks.payloads import WORDS
+from benchmarks.standin import StandInServer
+
+SWAGGER_PATH = Path(__file__).resolve().parent.parent / "help" / "nlb-swagger.json"
+BRANCHES_PATH = Path(__file__).resolve().parent.parent / "resources" / "branches.json"
+
+_FORMATS = (("BK", "Book"), ("BK", "Book"), ("BK", "Book"), ("EBK", "eBook"), ("AB", "Audiobook"), ("DVD", "DVD"))
+_STATUSES = (("I", "Not on Loan"), ("C", "On Loan"), ("T", "In Transit"), ("R", "Reserved"))
+_BRN_BASE = 200_000_000
+
+
+def parse_latency(spec: str, rng: random.Random) -> Callable[[], float]:
+    """`fixed:MS`, `uniform:LO_MS:HI_MS` or `lognormal:MEDIAN_MS:SIGMA` -> sampler in seconds."""
+    kind, _, rest = spec.partition(":")
+    args = [float(a) for a in rest.split(":") if a]
+    if kind == "fixed":
+        return lambda: args[0] / 1000
+    if kind == "uniform":
+        return lambda: rng.uniform(args[0], args[1]) / 1000
+    if kind == "lognormal":
+        mu, sigma = math.log(args[0]), args[1]
+        return lambda: rng.lognormvariate(mu, sigma) / 1000
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+class SchemaFaker:
+    """Build seeded objects from swagger component schemas, with per-field overrides."""
+
+    def __init__(self, spec: Dict[str, Any], rng: random.Random) -> None:
+        self.schemas: Dict[str, Any] = spec["components"]["schemas"]
+        self.rng = rng
+
+    def words(self, n: int) -> str:
+        return " ".join(self.rng.choice(WORDS) for _ in range(n)).title()
+
+    def make(self, name: str, overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        overrides = overrides or {}
+        out: Dict[str, Any] = {}
+        for prop, schema in self.schemas[name].get("properties", {}).items():
+            if prop in overrides:
+                out[prop] = overrides[prop]
+            else:
+                out[prop] = self.value(prop, schema)
+        return out
+
+    def value(self, prop: str, schema: Dict[str, Any]) -> Any:
+        if "$ref" in schema:
+            return self.make(schema["$ref"].rsplit("/", 1)[-1])
+        kind = schema.get("type")
+        if kind == "array":
+            if prop.startswith("native"):
+                return []
+            item = dict(schema.get("items", {}), nullable=False)
+            return [self.value(prop, item) for _ in range(self.rng.randrange(0, 3))]
+        if schema.get("nullable") and self.rng.random() < 0.3:
+            return None
+        if kind == "boolean":
+            return self.rng.random() < 0.5
+        if kind == "integer":
+            return self.rng.randrange(0, 100)
+        if kind == "number":
+            return round(self.rng.uniform(5, 60), 2)
+        if prop.startswith("native"):
+            return None
+        return self.words(self.rng.randrange(1, 5))
+
+
+class FakeCatalogue:
+    """Seeded catalogue of title groups (records sharing title/author) plus derived indexes."""
+
+    def __init__(self, spec: Dict[str, Any], size: int = 2000, seed: int = 7) -> None:
+        self.spec = spec
+        self.seed = seed
+        self.faker = SchemaFaker(spec, random.Random(seed))
+        self.branches: List[Dict[str, str]] = json.loads(BRANCHES_PATH.read_text())
+        self.groups: List[Dict[str, Any]] = []
+        self.records: Dict[int, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        self.by_isbn: Dict[str, int] = {}
+        # Days since each record was acquired, for /GetNewTitles DateRange windows.
+        self.acquired_days: Dict[int, int] = {}
+        rng = self.faker.rng
+        brn = _BRN_BASE
+        for _ in range(size):
+            title, author = self.faker.words(rng.randrange(2, 5)), self.faker.words(2)
+            subjects = [self.faker.words(2) for _ in range(rng.randrange(1, 4))]
+            group = self.faker.make(
+                "TitleSummary",
+                {
+                    "title": title,
+                    "nativeTitle": None,
+                    "seriesTitle": [],
+                    "nativeSeriesTitle": [],
+                    "author": author,
+                    "nativeAuthor": None,
+                    "records": [],
+                },
+            )
+            for _ in range(rng.randrange(1, 4)):
+                brn += 1
+                isbn = "978" + "".join(str(rng.randrange(10)) for _ in range(10))
+                code, name = rng.choice(_FORMATS)
+                record = self.faker.make(
+                    "TitleRecord",
+                    {
+                        "brn": brn,
+                        "digitalId": None if code != "EBK" else f"D{brn}",
+                        "isbns": [isbn],
+                        "issns": [],
+                        "format": {"code": code, "name": name},
+                        "publishDate": str(rng.randrange(1990, 2027)),
+                        "subjects": subjects,
+                        "language": ["English"],
+                        "availability": rng.random() < 0.6,
+                        "source": "overdrive" if code == "EBK" else "sierra",
+                    },
+                )
+                group["records"].append(record)
+                self.records[brn] = (group, record)
+                self.by_isbn[isbn] = brn
+                self.acquired_days[brn] = rng.randrange(0, 365)
+            group["_haystack"] = " ".join([title, author, *subjects]).lower()
+            self.groups.append(group)
+
+    @property
+    def brns(self) -> List[int]:
+        return list(self.records)
+
+    @staticmethod
+    def flat(group: Dict[str, Any], record: Dict[str, Any]) -> Dict[str, Any]:
+        # `Title`/`NewArrivalTitle` shape: record fields plus the group's title fields.
+        out = dict(record)
+        for key in ("title", "nativeTitle", "seriesTitle", "nativeSeriesTitle", "author", "nativeAuthor"):
+            out[key] = group.get(key)
+        return out
+
+    def public(self, group: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in group.items() if not k.startswith("_")}
+
+    def items_for(self, brn: int) -> List[Dict[str, Any]]:
+        # Deterministic per BRN; a few "bestsellers" have hundreds of copies to exercise paging.
+        rng = random.Random(self.seed * 1_000_003 + brn)
+        count = rng.randrange(150, 400) if brn % 97 == 0 else rng.randrange(0, 30)
+        items = []
+        for i in range(count):
+            branch = rng.choice(self.branches)
+            code, name = rng.choice(_STATUSES)
+            items.append(
+                self.faker.make(
+                    "Item",
+                    {
+                        "irn": brn * 1000 + i,
+                        "itemId": f"B{brn}{i:04d}",
+                        "brn": brn,
+                        "callNumber": f"English {rng.randrange(100, 999)} {branch['code'][:3]}",
+                        "location": {"code": branch["code"], "name": branch["name"]},
+                        "media": {"code": "BOOK", "name": "Book"},
+                        "status": {"code": code, "name": name, "setDate": None},
+                        "transactionStatus": None,
+                        "courseCode": None,
+                    },
+                )
+            )
+        return items
+
+
+class FakeNLB:
+    """Request handler for StandInServer implementing the swagger's endpoints."""
+
+    def __init__(
+        self,
+        catalogue: FakeCatalogue,
+        *,
+        error_rate: float = 0.0,
+        quota_per_s: int = 0,
+        retry_after_s: int = 1,
+        seed: int = 7,
+    ) -> None:
+        self.catalogue = catalogue
+        self.spec = catalogue.spec
+        self.error_rate = error_rate
+        self.quota_per_s = quota_per_s
+        self.retry_after_s = retry_after_s
+        self.rng = random.Random(seed + 1)
+        self._window: Deque[float] = deque()
+        self.injected_errors = 0
+        self.throttled = 0
+        self._routes: Dict[str, Callable[[Dict[str, str]], Tuple[Any, ...]]] = {
+            "/SearchTitles": self.search_titles,
+            "/GetTitles": self.get_titles,
+            "/GetTitleDetails": self.get_title_details,
+            "/GetAvailabilityInfo": self.get_availability,
+            "/GetNewTitles": self.get_new_titles,
+            "/GetMostCheckoutsTrendsTitles": self.get_trends,
+        }
+        missing = set(self.spec["paths"]) - set(self._routes)
+        if missing:
+            raise RuntimeError(f"Fake does not implement swagger paths: {sorted(missing)}")
+
+    @property
+    def auth_headers(self) -> List[str]:
+        return [s["name"] for s in self.spec["components"].get("securitySchemes", {}).values()]
+
+    # --- plumbing -------------------------------------------------------------------
+
+    @staticmethod
+    def error(status: int, error: str, message: str) -> Tuple[Any, ...]:
+        return status, {"statusCode": status, "error": error, "message": message}
+
+    def validate(self, path: str, params: Dict[str, str]) -> Optional[Tuple[Any, ...]]:
+        """Check query params against the swagger operation (known, required, type, pattern, range)."""
+        declared = self.spec["paths"][path]["get"].get("parameters", [])
+        unknown = sorted(set(params) - {p["name"] for p in declared})
+        if unknown:
+            return self.error(400, "Bad Request", f"Unknown parameter {unknown[0]}")
+        for param in declared:
+            name, schema = param["name"], param.get("schema", {})
+            value = params.get(name)
+            if value is None:
+                if param.get("required"):
+                    return self.error(400, "Bad Request", f"{name} is required")
+                continue
+            if schema.get("type") == "integer":
+                try:
+                    number = int(value)
+                except ValueError:
+                    return self.error(400, "Bad Request", f"{name} must be an integer")
+                if "minimum" in schema and number < schema["minimum"]:
+                    return self.error(400, "Bad Request", f"{name} must be >= {schema['minimum']}")
+                if "maximum" in schema and number > schema["maximum"]:
+                    return self.error(400, "Bad Request", f"{name} must be <= {schema['maximum']}")
+            if "pattern" in schema and not re.match(schema["pattern"], value):
+                return self.error(400, "Bad Request", f"{name} is invalid")
+            if "maxLength" in schema and len(value) > schema["maxLength"]:
+                return self.error(400, "Bad Request", f"{name} is too long")
+        return None
+
+    def _default_limit(self, path: str) -> int:
+        for param in self.spec["paths"][path]["get"].get("parameters", []):
+            if param["name"] == "Limit":
+                return int(param.get("schema", {}).get("default", 20))
+        return 20
+
+    def page(self, path: str, params: Dict[str, str], rows: List[Any], key: str) -> Dict[str, Any]:
+        limit = int(params.get("Limit") or self._default_limit(path))
+        offset = int(params.get("Offset") or 0)
+        chunk = rows[offset : offset + limit]
+        has_more = offset + len(chunk) < len(rows)
+        body: Dict[str, Any] = {
+            "totalRecords": len(rows),
+            "count": len(chunk),
+            "hasMoreRecords": has_more,
+            "nextRecordsOffset": offset + len(chunk) if has_more else 0,
+            key: chunk,
+        }
+        if path != "/SearchTitles":
+            # Stable per query so follow-up pages can be requested with SetId.
+            query = sorted((k, v) for k, v in params.items() if k not in ("Offset", "Limit", "SetId"))
+            body["setId"] = int(params.get("SetId") or 0) or zlib.crc32(repr(query).encode()) % 100_000 + 1
+        return body
+
+    def __call__(self, path: str, params: Dict[str, str]) -> Tuple[Any, ...]:
+        route = self._routes.get(path)
+        if route is None:
+            return self.error(404, "Not Found", f"Unknown path {path}")
+        if self.quota_per_s:
+            now = time.monotonic()
+            while self._window and now - self._window[0] > 1.0:
+                self._window.popleft()
+            if len(self._window) >= self.quota_per_s:
+                self.throttled += 1
+                status, body = self.error(429, "Too Many Requests", "API calls quota exceeded")
+                return status, body, {"Retry-After": str(self.retry_after_s)}
+            self._window.append(now)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.injected_errors += 1
+            if self.rng.random() < 0.5:
+                return self.error(500, "Internal Server Error", "Injected failure")
+            return self.error(503, "Service Unavailable", "Injected failure")
+        invalid = self.validate(path, params)
+        if invalid is not None:
+            return invalid
+        return route(params)
+
+    # --- endpoints ------------------------------------------------------------------
+
+    def _match_groups(self, keywords: str) -> List[Dict[str, Any]]:
+        terms = keywords.lower().split()
+        if len(terms) == 1 and terms[0].isdigit():
+            hit = self.catalogue.records.get(int(terms[0])) or self.catalogue.records.get(
+                self.catalogue.by_isbn.get(terms[0], -1)
+            )
+            return [hit[0]] if hit else []
+        return [g for g in self.catalogue.groups if all(t in g["_haystack"] for t in terms)]
+
+    def search_titles(self, params: Dict[str, str]) -> Tuple[Any, ...]:
+        groups = self._match_groups(params["Keywords"])
+        body = self.page("/SearchTitles", params, [self.catalogue.public(g) for g in groups], "titles")
+        counts: Dict[Tuple[str, str], int] = {}
+        for group in groups:
+            for rec in group["records"]:
+                fmt = (rec["format"]["code"], rec["format"]["name"])
+                counts[fmt] = counts.get(fmt, 0) + 1
+        body["facets"] = [
+            {"id": "formats", "name": "Format", "values": [{"id": c, "data": n, "count": k} for (c, n), k in counts.items()]}
+        ]
+        return 200, body
+
+    def get_titles(self, params: Dict[str, str]) -> Tuple[Any, ...]:
+        fields = {k: params.get(k) for k in ("Keywords", "Title", "Author", "Subject", "ISBN")}
+        if not any(fields.values()):
+            return self.error(400, "Bad Request", "One of Keywords, Title, Author, Subject or ISBN is required")
+        if fields["Keywords"]:
+            groups = self._match_groups(fields["Keywords"])
+        else:
+            groups = self.catalogue.groups
+            if fields["Title"]:
+                groups = [g for g in groups if fields["Title"].lower() in g["title"].lower()]
+            if fields["Author"]:
+                groups = [g for g in groups if fields["Author"].lower() in g["author"].lower()]
+            if fields["Subject"]:
+                groups = [g for g in groups if fields["Subject"].lower() in g["_haystack"]]
+            if fields["ISBN"]:
+                brn = self.catalogue.by_isbn.get(fields["ISBN"])
+                groups = [self.catalogue.records[brn][0]] if brn else []
+        rows = [self.catalogue.flat(g, r) for g in groups for r in g["records"]]
+        return 200, self.page("/GetTitles", params, rows, "titles")
+
+    def _lookup(self, params: Dict[str, str]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        if params.get("BRN"):
+            return self.catalogue.records.get(int(params["BRN"]))
+        if params.get("ISBN"):
+            brn = self.catalogue.by_isbn.get(params["ISBN"])
+            return self.catalogue.records.get(brn) if brn else None
+        return None
+
+    def get_title_details(self, params: Dict[str, str]) -> Tuple[Any, ...]:
+        if not (params.get("BRN") or params.get("ISBN")):
+            return self.error(400, "Bad Request", "BRN or ISBN is required")
+        hit = self._lookup(params)
+        if hit is None:
+            return self.error(404, "Not Found", "Title not found")
+        return 200, self.catalogue.flat(*hit)
+
+    def get_availability(self, params: Dict[str, str]) -> Tuple[Any, ...]:
+        if not (params.get("BRN") or params.get("ISBN")):
+            return self.error(400, "Bad Request", "BRN or ISBN is required")
+        hit = self._lookup(params)
+        if hit is None:
+            return self.error(404, "Not Found", "Title not found")
+        items = self.catalogue.items_for(hit[1]["brn"])
+        location = params.get("LocationCode")
+        if location:
+            items = [i for i in items if i["location"]["code"] == location.upper()]
+        return 200, self.page("/GetAvailabilityInfo", params, items, "items")
+
+    def get_new_titles(self, params: Dict[str, str]) -> Tuple[Any, ...]:
+        window = {"Weekly": 7, "Monthly": 30, "Quarterly": 91}[params["DateRange"]]
+        days = self.catalogue.acquired_days
+        rows = [
+            self.catalogue.flat(g, r) for g in self.catalogue.groups for r in g["records"] if days[r["brn"]] < window
+        ]
+        if params.get("DateFrom"):
+            rows = [r for r in rows if int(r["publishDate"]) >= int(params["DateFrom"])]
+        if params.get("DateTo"):
+            rows = [r for r in rows if int(r["publishDate"]) <= int(params["DateTo"])]
+        rows.sort(key=lambda r: (days[r["brn"]], -r["brn"]))
+        body = self.page("/GetNewTitles", params, rows, "titles")
+        body.pop("setId", None)  # SearchNewTitlesResponseV2 has no setId
+        return 200, body
+
+    def get_trends(self, params: Dict[str, str]) -> Tuple[Any, ...]:
+        location, duration = params["LocationCode"], params.get("Duration") or "past30days"
+        rng = random.Random(zlib.crc32(f"{self.catalogue.seed}:{location}:{duration}".encode()))
+        trends = []
+        for language, age, fiction in (("English", "A", True), ("English", "A", False), ("English", "J", True)):
+            picks = rng.sample(self.catalogue.groups, k=min(10, len(self.catalogue.groups)))
+            titles = [
+                self.catalogue.faker.make(
+                    "CheckoutsTitle",
+                    {
+                        "title": g["title"],
+                        "nativeTitle": None,
+                        "author": g["author"],
+                        "nativeAuthor": None,
+                        "isbns": [i for r in g["records"] for i in r.get("isbns") or []],
+                        "checkoutsCount": rng.randrange(5, 200),
+                    },
+                )
+                for g in picks
+            ]
+            titles.sort(key=lambda t: t["checkoutsCount"], reverse=True)
+            trends.append(
+                {"language": language, "ageLevel": age, "fiction": fiction, "singaporeCollection": False, "checkoutsTitles": titles}
+            )
+        return 200, {"checkoutsTrends": trends}
+
+
+def build(
+    *,
+    titles: int = 2000,
+    seed: int = 7,
+    latency: str = "fixed:0",
+    error_rate: float = 0.0,
+    quota_per_s: int = 0,
+    retry_after_s: int = 1,
+    port: int = 0,
+) -> Tuple[StandInServer, FakeNLB]:
+    """Create an (unstarted) StandInServer serving a FakeNLB; use it as an async context manager."""
+    spec = json.loads(SWAGGER_PATH.read_text())
+    fake = FakeNLB(
+        FakeCatalogue(spec, size=titles, seed=seed),
+        error_rate=error_rate,
+        quota_per_s=quota_per_s,
+        retry_after_s=retry_after_s,
+        seed=seed,
+    )
+    server = StandInServer(
+        fake, latency_s=parse_latency(latency, random.Random(seed + 2)), port=port, auth_headers=fake.auth_headers
+    )
+    return server, fake
+
+
+async def _serve_forever(args: argparse.Namespace) -> None:
+    server, fake = build(
+        titles=args.titles,
+        seed=args.seed,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        quota_per_s=args.quota_per_s,
+        retry_after_s=args.retry_after,
+        port=args.port,
+    )
+    async with server:
+        print(f"NLB_API_BASE={server.base_url}", flush=True)
+        try:
+            while True:
+                await asyncio.sleep(10)
+                print(
+                    json.dumps(
+                        {"requests": server.requests, "hits": server.hits, "errors": fake.injected_errors, "throttled": fake.throttled}
+                    ),
+                    flush=True,
+                )
+        except asyncio.CancelledError:
+            pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--titles", type=int, default=2000, help="number of title groups in the catalogue")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--latency", default="fixed:0", help="fixed:MS | uniform:LO:HI | lognormal:MEDIAN_MS:SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 500/503")
+    parser.add_argument("--quota-per-s", type=int, default=0, help="requests per second before 429 (0 = unlimited)")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429")
+    try:
+        asyncio.run(_serve_forever(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,130 @@
+"""Seeded synthetic upstream payloads shaped like the NLB v2 swagger responses."""
+
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, List
+
+WORDS = (
+    "river tiger garden harbour lantern monsoon island market orchard kampong "
+    "merlion spice voyage shadow memory letters city night rain stories"
+).split()
+_FORMATS = (("BK", "Book"), ("EBK", "eBook"), ("AB", "Audiobook"), ("DVD", "DVD"))
+_BRANCHES = ("AMKPL", "BBPL", "BIPL", "CSPL", "CMPL", "JWPL", "JRL", "TPPL", "WRPL", "SBPL")
+
+
+def _words(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n)).title()
+
+
+def title_record(rng: random.Random, brn: int) -> Dict[str, Any]:
+    code, name = rng.choice(_FORMATS)
+    isbn = "978" + "".join(str(rng.randrange(10)) for _ in range(10))
+    return {
+        "brn": brn,
+        "digitalId": None,
+        "otherTitles": [_words(rng, 3)],
+        "nativeOtherTitles": [],
+        "variantTitles": [],
+        "nativeVariantTitles": [],
+        "otherAuthors": [_words(rng, 2)],
+        "nativeOtherAuthors": [],
+        "isbns": [isbn],
+        "issns": [],
+        "format": {"code": code, "name": name},
+        "edition": ["First edition"],
+        "nativeEdition": [],
+        "publisher": [_words(rng, 2) + " Press"],
+        "nativePublisher": [],
+        "publishDate": str(rng.randrange(1980, 2026)),
+        "subjects": [_words(rng, 2) for _ in range(3)],
+        "physicalDescription": [f"{rng.randrange(80, 600)} pages"],
+        "nativePhysicalDescription": [],
+        "summary": [_words(rng, 40)],
+        "nativeSummary": [],
+        "contents": [],
+        "nativeContents": [],
+        "thesis": [],
+        "nativeThesis": [],
+        "notes": [_words(rng, 6)],
+        "nativeNotes": [],
+        "allowReservation": rng.random() < 0.8,
+        "isRestricted": False,
+        "activeReservationsCount": rng.randrange(0, 40),
+        "audience": ["Adult"],
+        "audienceImda": [],
+        "language": ["English"],
+        "serial": False,
+        "volumeNote": [],
+        "nativeVolumeNote": [],
+        "frequency": [],
+        "nativeFrequency": [],
+        "credits": [],
+        "nativeCredits": [],
+        "performers": [],
+        "nativePerformers": [],
+        "availability": rng.random() < 0.6,
+        "source": "NLB",
+        "volumes": [],
+    }
+
+
+def search_titles_payload(titles: int = 200, records_per_title: int = 5, seed: int = 7) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    brn = 200_000_000
+    out: List[Dict[str, Any]] = []
+    for _ in range(titles):
+        recs = []
+        for _ in range(records_per_title):
+            brn += 1
+            recs.append(title_record(rng, brn))
+        out.append(
+            {
+                "title": _words(rng, 4),
+                "nativeTitle": None,
+                "seriesTitle": [],
+                "nativeSeriesTitle": [],
+                "author": _words(rng, 2),
+                "nativeAuthor": None,
+                "coverUrl": {"small": "https://example.invalid/s.jpg", "medium": None, "large": None},
+                "records": recs,
+            }
+        )
+    return {
+        "totalRecords": titles,
+        "count": titles,
+        "hasMoreRecords": False,
+        "nextRecordsOffset": 0,
+        "titles": out,
+        "facets": [{"id": "formats", "name": "Format", "values": [{"id": c, "data": n, "count": 1} for c, n in _FORMATS]}],
+    }
+
+
+def availability_payload(items: int = 100, brn: int = 200_000_001, seed: int = 7) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    out = []
+    for i in range(items):
+        branch = rng.choice(_BRANCHES)
+        on_shelf = rng.random() < 0.5
+        out.append(
+            {
+                "irn": 90_000 + i,
+                "itemId": f"B{rng.randrange(10**9):09d}",
+                "brn": brn,
+                "volumeName": None,
+                "callNumber": f"English {rng.randrange(100, 999)} ABC",
+                "formattedCallNumber": None,
+                "media": {"code": "BOOK", "name": "Book"},
+                "usageLevel": {"code": "001", "name": "Adult"},
+                "location": {"code": branch, "name": branch + " Library"},
+                "courseCode": None,
+                "language": "English",
+                "suffix": None,
+                "donor": None,
+                "price": 25.0,
+                "status": {"code": "I" if on_shelf else "C", "name": "Not on Loan" if on_shelf else "On Loan", "setDate": None},
+                "transactionStatus": None,
+                "minAgeLimit": 0,
+            }
+        )
+    return {"setId": 0, "totalRecords": items, "count": items, "hasMoreRecords": False, "nextRecordsOffset": 0, "items": out}
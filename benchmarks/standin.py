@@ -0,0 +1,95 @@
+"""Minimal local stand-in for the NLB upstream (stdlib asyncio, HTTP/1.1 keep-alive)."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+
+# Handlers return (status, payload) or (status, payload, extra_headers); payload may be pre-encoded bytes.
+Handler = Callable[[str, Dict[str, str]], Tuple[Any, ...]]
+
+
+def _default_handler(path: str, params: Dict[str, str]) -> Tuple[Any, ...]:
+    return 200, {"totalRecords": 0, "count": 0, "hasMoreRecords": False, "titles": []}
+
+
+class StandInServer:
+    """
+    Serve JSON for any GET; counts requests and accepted connections.
+
+    `latency_s` is a fixed delay or a callable sampled per request. Requests missing any
+    of `auth_headers` get a 401 before reaching the handler.
+    """
+
+    def __init__(
+        self,
+        handler: Optional[Handler] = None,
+        latency_s: Union[float, Callable[[], float]] = 0.0,
+        port: int = 0,
+        auth_headers: Sequence[str] = (),
+    ) -> None:
+        self.handler = handler or _default_handler
+        self.latency_s = latency_s
+        self.auth_headers = tuple(h.lower() for h in auth_headers)
+        self.requests = 0
+        self.connections = 0
+        self.hits: Dict[str, int] = {}
+        self._server: Optional[asyncio.base_events.Server] = None
+        self.port = port
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/api/v2/Catalogue"
+
+    async def __aenter__(self) -> "StandInServer":
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers: Dict[str, str] = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                _method, target, _version = request_line.decode("latin-1").split(" ", 2)
+                parts = urlsplit(target)
+                path = "/" + parts.path.rstrip("/").rsplit("/", 1)[-1]
+                params = dict(parse_qsl(parts.query))
+                self.requests += 1
+                self.hits[path] = self.hits.get(path, 0) + 1
+                delay = self.latency_s() if callable(self.latency_s) else self.latency_s
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if any(not headers.get(h) for h in self.auth_headers):
+                    result: Tuple[Any, ...] = (401, {"statusCode": 401, "error": "Unauthorized", "message": "Missing API key"})
+                else:
+                    result = self.handler(path, params)
+                status, payload = result[0], result[1]
+                headers: Dict[str, str] = result[2] if len(result) > 2 else {}
+                extra = "".join(f"{k}: {v}\r\n" for k, v in headers.items()).encode()
+                body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n".encode()
+                    + extra
+                    + b"\r\n"
+                    + body
+                )
+                await writer.drain()
+        except (ConnectionError, ValueError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
@@ -1,5 +1,15 @@
 """NLB MCP server package."""
 
-from .server import app, create_server, mcp, server  # re-export for FastMCP discovery
+from typing import Any
 
-__all__ = ["app", "create_server", "mcp", "server"]
+__all__ = ["app", "create_server", "mcp"]
+
+
+def __getattr__(name: str) -> Any:
+    # Re-exported lazily for FastMCP discovery; importing the package does not build the server.
+    # (`nlb_mcp.server` is the submodule; use `nlb_mcp.mcp`/`nlb_mcp.app` for the instance.)
+    if name in __all__:
+        from nlb_mcp import server
+
+        return getattr(server, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,8 +2,10 @@
 from __future__ import annotations
 
 import json
+import re
+from collections import Counter
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Set
 
 BRANCHES_PATH = Path(__file__).resolve().parent.parent / "resources" / "branches.json"
 
@@ -12,10 +14,117 @@ try:
 except Exception:
     BRANCHES = []
 
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _grams(token: str) -> Set[str]:
+    padded = f" {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class BranchDirectory:
+    """
+    Load-once branch directory: code -> entry, plus prefix and trigram indexes over names.
+
+    `search` accepts codes, name prefixes ("orchard lib") and misspellings ("tampnes").
+    """
+
+    # Minimum share of a term's trigrams an indexed token must contain to count as a fuzzy hit.
+    FUZZY_THRESHOLD = 0.5
+
+    def __init__(self, entries: Iterable[Dict[str, str]]) -> None:
+        self.entries: List[Dict[str, str]] = [e for e in entries if e.get("code")]
+        self.by_code: Dict[str, Dict[str, str]] = {e["code"].upper(): e for e in self.entries}
+        self._prefixes: Dict[str, Set[int]] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._token_ids: Dict[str, Set[int]] = {}
+        for idx, entry in enumerate(self.entries):
+            code = entry["code"].lower()
+            # Any substring of a code (e.g. "pl" for public libraries) and any name-token prefix.
+            for i in range(len(code)):
+                for j in range(i + 1, len(code) + 1):
+                    self._prefixes.setdefault(code[i:j], set()).add(idx)
+            for token in _tokens(entry.get("name", "")) + [code]:
+                self._token_ids.setdefault(token, set()).add(idx)
+                for j in range(1, len(token) + 1):
+                    self._prefixes.setdefault(token[:j], set()).add(idx)
+        for token in self._token_ids:
+            for gram in _grams(token):
+                self._grams.setdefault(gram, set()).add(token)
+        # Pre-serialized resource payload; served as-is on every read.
+        self.resource_json = json.dumps({"branches": self.entries})
+
+    def find(self, code: str) -> Optional[Dict[str, str]]:
+        return self.by_code.get(code.strip().upper())
+
+    def _fuzzy(self, term: str) -> Set[int]:
+        grams = _grams(term)
+        overlap: Counter = Counter()
+        for gram in grams:
+            for token in self._grams.get(gram, ()):
+                overlap[token] += 1
+        ids: Set[int] = set()
+        for token, hits in overlap.items():
+            if hits / len(grams) >= self.FUZZY_THRESHOLD:
+                ids |= self._token_ids[token]
+        return ids
+
+    def resolve(self, query: str) -> Optional[Dict[str, str]]:
+        """
+        The one branch `query` names, or None.
+
+        A code matches directly. A name needs every term to match (by prefix, or fuzzily)
+        and exactly one branch to fit; a full name wins over longer ones ("Jurong Regional
+        Library" vs "Jurong West Public Library" for "jurong" is ambiguous, so None).
+        """
+        exact = self.find(query)
+        if exact is not None:
+            return exact
+        terms = _tokens(query)
+        ids: Optional[Set[int]] = None
+        for term in terms:
+            hits = self._prefixes.get(term)
+            if hits is None:
+                hits = self._fuzzy(term)
+            ids = set(hits) if ids is None else ids & hits
+            if not ids:
+                return None
+        if not ids:
+            return None
+        if len(ids) > 1:
+            ids = {idx for idx in ids if _tokens(self.entries[idx].get("name", "")) == terms}
+        return self.entries[ids.pop()] if len(ids) == 1 else None
+
+    def search(self, query: Optional[str], limit: Optional[int] = None) -> List[Dict[str, str]]:
+        if not query or not query.strip():
+            return self.entries[:limit] if limit else list(self.entries)
+        terms = _tokens(query)
+        scores: Counter = Counter()
+        for term in terms:
+            ids = self._prefixes.get(term)
+            if ids is None:
+                ids = self._fuzzy(term)
+            for idx in ids:
+                scores[idx] += 1
+        if not scores:
+            return []
+        # Prefer entries matching every term; otherwise the best partial matches.
+        best = max(scores.values())
+        matched = [idx for idx, score in scores.items() if score == best]
+        matched.sort()
+        exact = self.by_code.get(query.strip().upper())
+        results = [self.entries[idx] for idx in matched]
+        if exact is not None:
+            results = [exact] + [e for e in results if e is not exact]
+        return results[:limit] if limit else results
+
+
+DIRECTORY = BranchDirectory(BRANCHES)
+
 
 def find_branch(code: str) -> Dict[str, str] | None:
-    code_lower = code.lower()
-    for entry in BRANCHES:
-        if entry.get("code", "").lower() == code_lower:
-            return entry
-    return None
+    return DIRECTORY.find(code)
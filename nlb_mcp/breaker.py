@@ -0,0 +1,121 @@
+"""Per-endpoint circuit breakers for upstream calls (closed -> open -> half-open)."""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Iterable, Tuple
+
+from nlb_mcp.config import settings
+from nlb_mcp.logging import get_logger
+from nlb_mcp.metrics import REGISTRY
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """
+    Trips after `failure_threshold` consecutive failures and rejects calls for `reset_s`.
+
+    Then one probe is let through (half-open): success closes the breaker, failure
+    re-opens it for another `reset_s`. A threshold of 0 disables the breaker.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_s: float) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_s = reset_s
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.changed_at = time.time()
+        self.rejected = 0
+        self.transitions = 0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """Whether a call may proceed; a True in half-open claims the single probe slot."""
+        if self.failure_threshold <= 0 or self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_s:
+                self.rejected += 1
+                return False
+            self._transition(HALF_OPEN)
+        if self._probing:
+            self.rejected += 1
+            return False
+        self._probing = True
+        return True
+
+    def retry_in(self) -> float:
+        return max(0.0, self.reset_s - (time.monotonic() - self.opened_at)) if self.state == OPEN else 0.0
+
+    def record_success(self) -> None:
+        self._probing = False
+        self.failures = 0
+        if self.state != CLOSED:
+            self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        self._probing = False
+        self.failures += 1
+        if self.failure_threshold <= 0:
+            return
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+            self._transition(OPEN)
+
+    def release(self) -> None:
+        # The probe ended without an outcome (e.g. cancelled); let another caller probe.
+        self._probing = False
+
+    def _transition(self, state: str) -> None:
+        previous, self.state = self.state, state
+        self.changed_at = time.time()
+        self.transitions += 1
+        get_logger().warning(
+            "circuit breaker state change",
+            extra={"endpoint": self.name, "from": previous, "to": state, "failures": self.failures},
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutiveFailures": self.failures,
+            "rejected": self.rejected,
+            "transitions": self.transitions,
+            "since": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.changed_at)),
+            **({"retryInS": round(self.retry_in(), 1)} if self.state == OPEN else {}),
+        }
+
+
+class BreakerSet:
+    """One breaker per upstream path, created on first use from settings."""
+
+    def __init__(self) -> None:
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, path: str) -> CircuitBreaker:
+        breaker = self._breakers.get(path)
+        if breaker is None:
+            breaker = self._breakers[path] = CircuitBreaker(
+                path, settings.breaker_failure_threshold, settings.breaker_reset_s
+            )
+        return breaker
+
+    def stats(self) -> Dict[str, Any]:
+        return {path: breaker.stats() for path, breaker in sorted(self._breakers.items())}
+
+    def collect(self) -> Iterable[Tuple[str, str, Dict[str, str], float]]:
+        for path, breaker in self._breakers.items():
+            yield (
+                "nlb_breaker_state",
+                "Circuit breaker state per endpoint (0 closed, 1 half-open, 2 open)",
+                {"path": path},
+                float(_STATE_VALUES[breaker.state]),
+            )
+
+
+breakers = BreakerSet()
+REGISTRY.add_collector(breakers.collect)
@@ -0,0 +1,181 @@
+"""In-memory TTL/LRU response cache with stale-while-revalidate."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+from nlb_mcp.decode import encode_json
+from nlb_mcp.logging import get_logger
+
+if TYPE_CHECKING:
+    from nlb_mcp.disk_cache import DiskCache
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    fresh_until: float
+    stale_until: float
+
+
+def _estimate_size(value: Any) -> int:
+    # Serialized size is a good proxy for the memory a decoded JSON payload holds.
+    try:
+        return len(encode_json(value))
+    except (TypeError, ValueError):
+        return 1024
+
+
+class ResponseCache:
+    """
+    Async cache bounded by entry count and approximate bytes.
+
+    Entries are fresh for `ttl` seconds, then served stale for up to `stale_ttl`
+    more seconds while a single background task refreshes them. Past that they are
+    refetched, but kept (until replaced or evicted) as the last known value for
+    `last_known`. Cached values are shared between callers and must be treated as
+    read-only. An optional `store` (a `DiskCache`) is consulted on memory misses and
+    written through (in the background) on every fetch.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, store: Optional["DiskCache"] = None) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.store = store
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._refreshing: Set[Hashable] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refresh_errors = 0
+        self.fallbacks = 0
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        return entry.value if entry is not None else None
+
+    def set(self, key: Hashable, value: Any, ttl: float, stale_ttl: float = 0.0) -> None:
+        now = time.monotonic()
+        size = _estimate_size(value)
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        if size > self.max_bytes:
+            return
+        self._entries[key] = _Entry(value, size, now + ttl, now + ttl + stale_ttl)
+        self._bytes += size
+        self._evict()
+
+    def invalidate(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    async def get_or_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: float,
+        stale_ttl: float = 0.0,
+    ) -> Any:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now < entry.fresh_until:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            if now < entry.stale_until:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                self._schedule_refresh(key, fetch, ttl, stale_ttl)
+                return entry.value
+
+        if self.store is not None:
+            stored = await self.store.aget(key)
+            if stored is not None:
+                # Keep the remaining lifetime of the disk entry rather than restarting the TTL.
+                value, fresh_for, stale_for = stored
+                self.set(key, value, fresh_for, stale_for)
+                if fresh_for <= 0:
+                    self.stale_hits += 1
+                    self._schedule_refresh(key, fetch, ttl, stale_ttl)
+                else:
+                    self.hits += 1
+                return value
+
+        self.misses += 1
+        value = await fetch()
+        self._remember(key, value, ttl, stale_ttl)
+        return value
+
+    async def last_known(self, key: Hashable) -> Optional[Any]:
+        """Most recent value for `key` whatever its age (memory, then disk); the outage fallback."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value = entry.value
+        else:
+            stored = await self.store.aget(key, include_expired=True) if self.store is not None else None
+            if stored is None:
+                return None
+            value = stored[0]
+        self.fallbacks += 1
+        return value
+
+    def _remember(self, key: Hashable, value: Any, ttl: float, stale_ttl: float) -> None:
+        self.set(key, value, ttl, stale_ttl)
+        if self.store is not None:
+            self.store.set_later(key, value, ttl, stale_ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "maxEntries": self.max_entries,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "staleHits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "refreshErrors": self.refresh_errors,
+            "fallbacks": self.fallbacks,
+            **({"disk": self.store.stats()} if self.store is not None else {}),
+        }
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+
+    def _schedule_refresh(
+        self, key: Hashable, fetch: Callable[[], Awaitable[Any]], ttl: float, stale_ttl: float
+    ) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh() -> None:
+            try:
+                self._remember(key, await fetch(), ttl, stale_ttl)
+            except Exception as exc:  # keep serving stale; next access retries
+                self.refresh_errors += 1
+                get_logger().warning("cache refresh failed", extra={"error": repr(exc)})
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
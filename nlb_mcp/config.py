@@ -1,5 +1,7 @@
 """Environment configuration for the NLB MCP server."""
 
+from typing import Any, Optional
+
 from pydantic import AnyUrl, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -12,8 +14,121 @@ class Settings(BaseSettings):
     )
     request_timeout_ms: int = Field(10_000, alias="REQUEST_TIMEOUT_MS", gt=0)
 
+    # Shared upstream connection pool (one per process, lives as long as the server).
+    http_max_connections: int = Field(20, alias="HTTP_MAX_CONNECTIONS", gt=0)
+    http_max_keepalive_connections: int = Field(10, alias="HTTP_MAX_KEEPALIVE_CONNECTIONS", ge=0)
+    http_keepalive_expiry_s: float = Field(30.0, alias="HTTP_KEEPALIVE_EXPIRY_S", gt=0)
+    http2_enabled: bool = Field(False, alias="HTTP2_ENABLED")
+
+    # Response cache: bibliographic data changes rarely, availability changes often.
+    cache_enabled: bool = Field(True, alias="CACHE_ENABLED")
+    cache_max_entries: int = Field(2048, alias="CACHE_MAX_ENTRIES", gt=0)
+    cache_max_bytes: int = Field(32 * 1024 * 1024, alias="CACHE_MAX_BYTES", gt=0)
+    cache_titles_ttl_s: float = Field(6 * 3600, alias="CACHE_TITLES_TTL_S", ge=0)
+    cache_titles_stale_s: float = Field(24 * 3600, alias="CACHE_TITLES_STALE_S", ge=0)
+    cache_availability_ttl_s: float = Field(30, alias="CACHE_AVAILABILITY_TTL_S", ge=0)
+    cache_availability_stale_s: float = Field(30, alias="CACHE_AVAILABILITY_STALE_S", ge=0)
+    cache_details_ttl_s: float = Field(7 * 24 * 3600, alias="CACHE_DETAILS_TTL_S", ge=0)
+    cache_details_stale_s: float = Field(24 * 3600, alias="CACHE_DETAILS_STALE_S", ge=0)
+    # Optional SQLite file shared by all workers on the host (unset = memory only).
+    cache_disk_path: Optional[str] = Field(None, alias="CACHE_DISK_PATH")
+    cache_disk_max_bytes: int = Field(256 * 1024 * 1024, alias="CACHE_DISK_MAX_BYTES", gt=0)
+
+    # Client-side upstream budgets: token bucket plus AIMD concurrency limit.
+    upstream_rate_per_s: float = Field(10.0, alias="UPSTREAM_RATE_PER_S", ge=0)
+    upstream_burst: int = Field(10, alias="UPSTREAM_BURST", gt=0)
+    upstream_concurrency_initial: int = Field(8, alias="UPSTREAM_CONCURRENCY_INITIAL", gt=0)
+    upstream_concurrency_min: int = Field(1, alias="UPSTREAM_CONCURRENCY_MIN", gt=0)
+    upstream_concurrency_max: int = Field(20, alias="UPSTREAM_CONCURRENCY_MAX", gt=0)
+    upstream_retry_after_max_s: float = Field(10.0, alias="UPSTREAM_RETRY_AFTER_MAX_S", gt=0)
+    # Optional state file: all workers on the host share one token bucket (rate/burst are host-wide).
+    upstream_quota_file: Optional[str] = Field(None, alias="UPSTREAM_QUOTA_FILE")
+
+    # Local mirror of new acquisitions (/GetNewTitles), synced in the background (unset = off).
+    mirror_path: Optional[str] = Field(None, alias="MIRROR_PATH")
+    mirror_sync_interval_s: float = Field(6 * 3600, alias="MIRROR_SYNC_INTERVAL_S", gt=0)
+    mirror_max_pages: int = Field(100, alias="MIRROR_MAX_PAGES", gt=0)
+
+    # Checkout-trend snapshots the checkout_trends tool answers from. Off by default (each
+    # worker would spend 72 requests of quota per refresh); a snapshot is then fetched on first
+    # request and again once older than TRENDS_REFRESH_INTERVAL_S. On, every branch and
+    # duration is refreshed in the background, starting at a random point in the first 5 min.
+    trends_refresh_enabled: bool = Field(False, alias="TRENDS_REFRESH_ENABLED")
+    trends_refresh_interval_s: float = Field(12 * 3600, alias="TRENDS_REFRESH_INTERVAL_S", gt=0)
+    trends_refresh_concurrency: int = Field(4, alias="TRENDS_REFRESH_CONCURRENCY", gt=0)
+
+    # Local BM25 index over titles already fetched: search_titles answers from it once recent
+    # upstream searches show it holds SEARCH_INDEX_MIN_COVERAGE of their matches. A share of
+    # those queries (SEARCH_INDEX_AUDIT_RATE) still goes upstream to keep that estimate current.
+    search_index_enabled: bool = Field(False, alias="SEARCH_INDEX_ENABLED")
+    search_index_path: Optional[str] = Field(None, alias="SEARCH_INDEX_PATH")
+    search_index_min_coverage: float = Field(0.9, alias="SEARCH_INDEX_MIN_COVERAGE", gt=0, le=1)
+    search_index_audit_rate: float = Field(0.05, alias="SEARCH_INDEX_AUDIT_RATE", ge=0, le=1)
+
+    # Per-endpoint circuit breaker: consecutive failed attempts that open it (0 = off), and how
+    # long it stays open before a single probe request is let through.
+    breaker_failure_threshold: int = Field(5, alias="BREAKER_FAILURE_THRESHOLD", ge=0)
+    breaker_reset_s: float = Field(30.0, alias="BREAKER_RESET_S", gt=0)
+
+    # Deadline per tool call (0 = none): upstream retries, backoff and limiter waits stop at it.
+    tool_deadline_s: float = Field(20.0, alias="TOOL_DEADLINE_S", ge=0)
+    # Hedged GETs: once HEDGE_MIN_SAMPLES attempts are recorded for a path, a request still
+    # unanswered after that path's HEDGE_QUANTILE latency (at least HEDGE_MIN_DELAY_MS) gets
+    # one duplicate; the first answer wins. Only sent while the token bucket has spare tokens.
+    hedge_enabled: bool = Field(False, alias="HEDGE_ENABLED")
+    hedge_quantile: float = Field(0.95, alias="HEDGE_QUANTILE", gt=0, lt=1)
+    hedge_min_delay_ms: float = Field(50, alias="HEDGE_MIN_DELAY_MS", ge=0)
+    hedge_min_samples: int = Field(50, alias="HEDGE_MIN_SAMPLES", gt=0)
+
+    # Batch tools: max parallel upstream lookups per call and max identifiers accepted.
+    bulk_concurrency: int = Field(8, alias="BULK_CONCURRENCY", gt=0)
+    bulk_max_items: int = Field(100, alias="BULK_MAX_ITEMS", gt=0)
+
+    # Availability tools follow pagination up to this many items per title.
+    availability_max_items: int = Field(500, alias="AVAILABILITY_MAX_ITEMS", gt=0)
+
+    # Decode upstream JSON straight into typed structs when msgspec is installed.
+    fast_decode: bool = Field(True, alias="FAST_DECODE")
+
+    # Logging: level, line format (json|text) and per-event sample rates ("event=rate,...").
+    log_level: str = Field("INFO", alias="LOG_LEVEL", pattern=r"(?i)^(debug|info|warning|error|critical)$")
+    log_format: str = Field("json", alias="LOG_FORMAT", pattern=r"^(json|text)$")
+    log_sample_rates: str = Field("", alias="LOG_SAMPLE_RATES")
+
+    # Tracing: fraction of tool calls traced, and where finished spans go (memory|otlp).
+    trace_sample_rate: float = Field(0.0, alias="TRACE_SAMPLE_RATE", ge=0, le=1)
+    trace_exporter: str = Field("memory", alias="TRACE_EXPORTER", pattern=r"^(memory|otlp)$")
+    trace_memory_spans: int = Field(2048, alias="TRACE_MEMORY_SPANS", gt=0)
+    trace_otlp_endpoint: str = Field("http://localhost:4318/v1/traces", alias="OTEL_EXPORTER_OTLP_TRACES_ENDPOINT")
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
 
-# Singleton settings instance
-settings = Settings()
+_settings: Optional[Settings] = None
+
+
+def get_settings() -> Settings:
+    """Build (and validate) the Settings singleton on first use rather than at import."""
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+
+class _LazySettings:
+    """Module-level `settings` handle; forwards attribute reads and writes to get_settings()."""
+
+    __slots__ = ()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(get_settings(), name, value)
+
+    def __repr__(self) -> str:
+        return repr(get_settings()) if _settings is not None else "<settings (not loaded)>"
+
+
+# Singleton settings handle (loaded from env on first attribute access)
+settings: Settings = _LazySettings()  # type: ignore[assignment]
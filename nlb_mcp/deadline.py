@@ -0,0 +1,37 @@
+"""Per-call deadline budgets carried in a context variable (tool handler -> nlb_client -> get_json)."""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# Absolute time.monotonic() by which the current call must finish; None = unbounded.
+_deadline: ContextVar[Optional[float]] = ContextVar("nlb_mcp_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Bound upstream work awaited inside the block to `seconds` from now.
+
+    Nested blocks can only shorten an outer deadline, never extend it; None or 0 leaves
+    the current deadline unchanged.
+    """
+    if not seconds:
+        yield
+        return
+    until = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(until if outer is None else min(outer, until))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current deadline (may be negative), or None when unbounded."""
+    until = _deadline.get()
+    return None if until is None else until - time.monotonic()
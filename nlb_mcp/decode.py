@@ -0,0 +1,121 @@
+"""Fast JSON decoding of upstream responses, optionally into typed msgspec structs.
+
+msgspec and orjson are optional: typed decoding needs msgspec, generic decoding uses
+msgspec, then orjson, then the stdlib, whichever is installed.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import typing
+from typing import Any, Dict, List, Optional
+
+from nlb_mcp import schemas
+from nlb_mcp.config import settings
+from nlb_mcp.keys import is_struct
+
+try:
+    import msgspec
+except ImportError:  # optional dependency
+    msgspec = None  # type: ignore[assignment]
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None  # type: ignore[assignment]
+
+
+def decode_json(content: bytes) -> Any:
+    """Decode JSON bytes into plain dicts/lists with the fastest available parser."""
+    if msgspec is not None:
+        return msgspec.json.decode(content)
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def encode_json(value: Any) -> bytes:
+    if msgspec is not None:
+        return msgspec.json.encode(value)
+    if orjson is not None:
+        return orjson.dumps(value, default=str)
+    return json.dumps(value, separators=(",", ":"), default=str).encode()
+
+
+def to_builtins(value: Any) -> Any:
+    """Convert decoded structs (and containers of them) to plain JSON-ready values."""
+    if msgspec is not None and (is_struct(value) or isinstance(value, (list, dict))):
+        return msgspec.to_builtins(value)
+    return value
+
+
+def _build_structs() -> Dict[str, Any]:
+    """Generate compact msgspec structs from the TypedDicts in schemas.py."""
+    structs: Dict[str, Any] = {}
+    typed_dicts = {
+        name: obj
+        for name, obj in vars(schemas).items()
+        if isinstance(obj, type) and issubclass(obj, dict) and hasattr(obj, "__total__")
+    }
+
+    def convert(tp: Any) -> Any:
+        origin = typing.get_origin(tp)
+        if origin in (list, List):
+            return List[convert(typing.get_args(tp)[0])]  # type: ignore[misc]
+        if isinstance(tp, type) and tp.__name__ in typed_dicts and typed_dicts[tp.__name__] is tp:
+            return build(tp.__name__)
+        return tp
+
+    def build(name: str) -> Any:
+        if name not in structs:
+            hints = typing.get_type_hints(typed_dicts[name], globalns=vars(schemas))
+            fields = [(field, Optional[convert(tp)], None) for field, tp in hints.items()]
+            structs[name] = msgspec.defstruct(name, fields, kw_only=True, omit_defaults=True)
+        return structs[name]
+
+    for name in typed_dicts:
+        build(name)
+    return structs
+
+
+# Typed response decoders per endpoint.
+_RESPONSE_TYPES = {
+    "/SearchTitles": "SearchTitlesResponseV2",
+    "/GetTitles": "GetTitlesResponseV2",
+    "/GetTitleDetails": "GetTitleDetailsResponseV2",
+    "/GetAvailabilityInfo": "GetAvailabilityInfoResponseV2",
+    "/GetNewTitles": "SearchNewTitlesResponseV2",
+    "/GetMostCheckoutsTrendsTitles": "SearchMostCheckoutsTitlesResponse",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def structs() -> Dict[str, Any]:
+    """msgspec structs for schemas.py, generated on first use (empty without msgspec)."""
+    return _build_structs() if msgspec is not None else {}
+
+
+@functools.lru_cache(maxsize=None)
+def _decoders() -> Dict[str, Any]:
+    built = structs()
+    return {path: msgspec.json.Decoder(built[name]) for path, name in _RESPONSE_TYPES.items() if name in built}
+
+
+def decode_response(path: str, content: bytes) -> Any:
+    """
+    Decode an upstream body for `path`.
+
+    With FAST_DECODE and msgspec installed, known endpoints decode straight into typed
+    structs (unknown keys skipped). Bodies that don't fit the v2 schema, such as legacy
+    `Result`-wrapped payloads, fall back to plain dicts so nothing is lost.
+    """
+    decoder = _decoders().get(path) if settings.fast_decode else None
+    if decoder is not None:
+        try:
+            value = decoder.decode(content)
+        except msgspec.DecodeError:
+            return decode_json(content)
+        if any(getattr(value, f) is not None for f in value.__struct_fields__):
+            return value
+    return decode_json(content)
@@ -0,0 +1,203 @@
+"""SQLite (WAL) response cache shared by server processes on one host and across restarts."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import os
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from nlb_mcp.config import settings
+from nlb_mcp.decode import decode_response, encode_json
+from nlb_mcp.logging import get_logger
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    value BLOB NOT NULL,
+    fresh_until REAL NOT NULL,
+    stale_until REAL NOT NULL,
+    touched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_touched ON entries (touched_at);
+"""
+
+# Reads refresh `touched_at` (for approximate LRU eviction) at most this often per entry.
+_TOUCH_INTERVAL_S = 60.0
+# Size is checked every N writes rather than on each one.
+_EVICT_CHECK_EVERY = 64
+
+
+class DiskCache:
+    """
+    Second-tier cache for `(path, params)` keys holding decoded upstream responses.
+
+    Values are stored as zlib-compressed JSON and decoded again with `decode_response`, so
+    a hit has the same shape (typed structs or dicts) as a fresh upstream call. Expiry uses
+    wall-clock time so entries written by one process are valid in another. Any SQLite
+    error degrades to a miss; the disk tier must never fail a tool call. A path that
+    cannot be opened at all (an OSError) turns the tier off for the process, with one warning.
+
+    Every SQLite call (and the zlib work) runs on one cache thread, so the event loop
+    never waits on the file lock or the disk: `aget` awaits a read there, `set_later`
+    queues a write and returns, and eviction runs after the write that triggers it.
+    """
+
+    def __init__(self, path: str, max_bytes: int, compress_level: int = 6, namespace: Optional[str] = None) -> None:
+        self.path = path
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.compress_level = compress_level
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid = 0
+        self._writes = 0
+        self._used: Optional[int] = None
+        self.disabled = False
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.evictions = 0
+
+    def _db(self) -> sqlite3.Connection:
+        # One connection per process (a forked worker must not reuse its parent's).
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.path))
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except OSError:
+                # Retrying on every call would not help, and would log each time.
+                self.disabled = True
+                raise
+            conn = sqlite3.connect(self.path, timeout=2.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+            self._used = self.used_bytes()
+        return self._conn
+
+    def _thread(self) -> ThreadPoolExecutor:
+        # A single worker keeps calls on the connection serialized; rebuilt after fork.
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="nlb-disk-cache")
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    async def aget(self, key: Hashable, include_expired: bool = False) -> Optional[Tuple[Any, float, float]]:
+        """`get` on the cache thread."""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._thread(), functools.partial(self.get, key, include_expired)
+        )
+
+    def set_later(self, key: Hashable, value: Any, ttl: float, stale_ttl: float = 0.0) -> None:
+        """Queue `set` on the cache thread without waiting for it. `value` must not be mutated afterwards."""
+        self._thread().submit(self.set, key, value, ttl, stale_ttl)
+
+    async def flush(self) -> None:
+        """Wait until every queued write has run."""
+        await asyncio.get_running_loop().run_in_executor(self._thread(), lambda: None)
+
+    def _key(self, key: Hashable) -> str:
+        # Namespaced (by default on the upstream base URL) so processes pointed at different
+        # upstreams never mix entries.
+        namespace = self.namespace if self.namespace is not None else str(settings.nlb_api_base)
+        return namespace + " " + json.dumps(key, separators=(",", ":"))
+
+    def get(self, key: Hashable, include_expired: bool = False) -> Optional[Tuple[Any, float, float]]:
+        """Return `(value, fresh_for_s, stale_for_s)` for a live (or, if asked, expired) entry, else None."""
+        if self.disabled:
+            self.misses += 1
+            return None
+        now = time.time()
+        try:
+            db = self._db()
+            row = db.execute(
+                "SELECT path, value, fresh_until, stale_until, touched_at FROM entries WHERE key = ?",
+                (self._key(key),),
+            ).fetchone()
+            if row is None or (row[3] <= now and not include_expired):
+                self.misses += 1
+                return None
+            path, blob, fresh_until, stale_until, touched_at = row
+            value = decode_response(path, zlib.decompress(blob))
+            if now - touched_at > _TOUCH_INTERVAL_S:
+                db.execute("UPDATE entries SET touched_at = ? WHERE key = ?", (now, self._key(key)))
+        except (sqlite3.Error, OSError, zlib.error, ValueError) as exc:
+            self._failed("read", exc)
+            return None
+        self.hits += 1
+        fresh_for = max(fresh_until - now, 0.0)
+        return value, fresh_for, max(stale_until - now - fresh_for, 0.0)
+
+    def set(self, key: Hashable, value: Any, ttl: float, stale_ttl: float = 0.0) -> None:
+        if self.disabled:
+            return
+        now = time.time()
+        try:
+            blob = zlib.compress(encode_json(value), self.compress_level)
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, path, value, fresh_until, stale_until, touched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (self._key(key), str(key[0]), blob, now + ttl, now + ttl + stale_ttl, now),  # type: ignore[index]
+            )
+            self._writes += 1
+            if self._writes % _EVICT_CHECK_EVERY == 1:
+                self._evict(db, now)
+        except (sqlite3.Error, OSError, TypeError, ValueError) as exc:
+            self._failed("write", exc)
+
+    def used_bytes(self) -> int:
+        db = self._db()
+        pages = db.execute("PRAGMA page_count").fetchone()[0] - db.execute("PRAGMA freelist_count").fetchone()[0]
+        return pages * db.execute("PRAGMA page_size").fetchone()[0]
+
+    def _evict(self, db: sqlite3.Connection, now: float) -> None:
+        # Expired entries first, then the least recently touched tenth until under budget.
+        self._used = self.used_bytes()
+        if self._used <= self.max_bytes:
+            return
+        self.evictions += db.execute("DELETE FROM entries WHERE stale_until <= ?", (now,)).rowcount
+        while (used := self.used_bytes()) > self.max_bytes:
+            rows = db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            if not rows:
+                break
+            self.evictions += db.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY touched_at LIMIT ?)",
+                (max(rows // 10, 1),),
+            ).rowcount
+        self._used = used
+
+    def clear(self) -> None:
+        if self.disabled:
+            return
+        try:
+            self._db().execute("DELETE FROM entries")
+        except (sqlite3.Error, OSError) as exc:
+            self._failed("clear", exc)
+
+    def _failed(self, op: str, exc: Exception) -> None:
+        self.errors += 1
+        event = "disk cache disabled" if self.disabled else "disk cache error"
+        get_logger().warning(event, extra={"op": op, "path": self.path, "error": repr(exc)})
+
+    def stats(self) -> Dict[str, Any]:
+        # Size as of the last eviction check on the cache thread; stats never touch the file.
+        return {
+            "path": self.path,
+            "bytes": self._used,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            **({"disabled": True} if self.disabled else {}),
+        }
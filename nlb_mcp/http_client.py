@@ -3,39 +3,297 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Dict, Optional
-
-import httpx
-from tenacity import AsyncRetrying, RetryError, retry_if_exception_type, stop_after_attempt, wait_exponential
+import functools
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncGenerator, AsyncIterator, Dict, Hashable, Optional, Tuple
 
+from nlb_mcp.breaker import HALF_OPEN, breakers
 from nlb_mcp.config import settings
-from nlb_mcp.logging import get_logger, redact_headers
+from nlb_mcp.deadline import remaining
+from nlb_mcp.decode import decode_response
+from nlb_mcp.logging import get_logger, redact_headers, should_log
+from nlb_mcp.metrics import UPSTREAM_ATTEMPTS, UPSTREAM_HEDGES, UPSTREAM_RESPONSES, UPSTREAM_RETRIES, UPSTREAM_SECONDS
+from nlb_mcp.ratelimit import parse_retry_after, upstream_limiter
+from nlb_mcp.tracing import KIND_CLIENT, current_span, start_span
+
+# httpx and tenacity are imported on first use (client build / first request), not at
+# module import, to keep server cold start cheap.
+if TYPE_CHECKING:
+    import httpx
 
 
 class UpstreamError(RuntimeError):
     """Raised when the upstream NLB API returns an error."""
 
 
+class RateLimitedError(UpstreamError):
+    """Raised when NLB answers 429 (API calls quota exceeded)."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(UpstreamError):
+    """Raised without calling upstream while the endpoint's circuit breaker is open."""
+
+    def __init__(self, path: str, retry_in: float) -> None:
+        super().__init__(f"Upstream {path} unavailable (circuit open, retry in {retry_in:.0f}s)")
+        self.retry_in = retry_in
+
+
+class DeadlineExceededError(UpstreamError):
+    """Raised when the caller's deadline (see nlb_mcp.deadline) runs out before upstream answers."""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(f"Deadline exceeded waiting for upstream {path}")
+
+
+def is_outage(exc: BaseException) -> bool:
+    """True for failures that mean upstream is unavailable rather than the request being bad."""
+    if isinstance(exc, UpstreamError):
+        return True
+    import httpx
+
+    return isinstance(exc, httpx.RequestError)
+
+
+@functools.lru_cache(maxsize=None)
+def _backoff() -> Any:
+    from tenacity import wait_exponential
+
+    return wait_exponential(multiplier=0.3, min=0.3, max=2.0)
+
+
+def _wait_for_retry(retry_state: Any) -> float:
+    # Honor Retry-After on 429; otherwise exponential backoff.
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    if isinstance(exc, RateLimitedError) and exc.retry_after is not None:
+        return min(exc.retry_after, settings.upstream_retry_after_max_s)
+    return _backoff()(retry_state)
+
+
+def _out_of_budget(retry_state: Any) -> bool:
+    # Stop retrying when the backoff sleep alone would use up the caller's deadline. The wait
+    # is deterministic, so it is computed here rather than read from `upcoming_sleep`, which
+    # older tenacity releases (and all of them, before the wait has run) do not set.
+    left = remaining()
+    return left is not None and left <= _wait_for_retry(retry_state)
+
+
+# Process-wide pooled client; reused across tool calls and retry attempts so
+# keep-alive connections (and their TLS sessions) are not rebuilt per request.
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_client_closer: Optional[AsyncGenerator[None, None]] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_client() -> httpx.AsyncClient:
+    import httpx
+
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry_s,
+    )
+    http2 = settings.http2_enabled
+    if http2 and not _http2_available():
+        get_logger().warning("HTTP2_ENABLED set but 'h2' is not installed; falling back to HTTP/1.1")
+        http2 = False
+    return httpx.AsyncClient(
+        timeout=settings.request_timeout_ms / 1000,
+        limits=limits,
+        http2=http2,
+        headers={
+            "X-Api-Key": settings.nlb_api_key,
+            "X-App-Code": settings.nlb_app_code,
+        },
+    )
+
+
+async def _close_with_loop(client: httpx.AsyncClient) -> AsyncGenerator[None, None]:
+    # Parked at its first yield; the loop finalizes it in shutdown_asyncgens() (asyncio.run
+    # does this before closing the loop), so the pool is closed while its loop still runs.
+    try:
+        yield
+    finally:
+        if not client.is_closed:
+            await client.aclose()
+
+
+def _park_closer(client: httpx.AsyncClient) -> AsyncGenerator[None, None]:
+    closer = _close_with_loop(client)
+    try:
+        closer.asend(None).send(None)
+    except StopIteration:
+        pass
+    return closer
+
+
+def _retire(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    # A client left on another loop: close it there if that loop still runs (another
+    # thread). A finished asyncio.run() loop has already closed it through its closer.
+    if client.is_closed or loop is None or loop.is_closed():
+        return
+    if loop.is_running():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily on the running event loop."""
+    global _client, _client_loop, _client_closer
+    loop = asyncio.get_running_loop()
+    # A client is bound to the loop it was first used on; rebuild if the loop changed
+    # (e.g. repeated asyncio.run() calls in scripts or `fastmcp inspect`).
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        if _client is not None:
+            _retire(_client, _client_loop)
+        _client = _build_client()
+        _client_loop = loop
+        _client_closer = _park_closer(_client)
+    return _client
+
+
+async def aclose_client() -> None:
+    global _client, _client_loop, _client_closer
+    client, _client, _client_loop = _client, None, None
+    closer, _client_closer = _client_closer, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+    if closer is not None:
+        await closer.aclose()
+
+
+@asynccontextmanager
+async def lifespan(_server: Any = None) -> AsyncIterator[None]:
+    """Open the pooled client for the server lifetime and close it on shutdown."""
+    get_client()
+    try:
+        yield
+    finally:
+        await aclose_client()
+
+
+class _Flight:
+    """One shared upstream request plus the number of callers awaiting it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[Any]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+# In-flight upstream requests keyed on (path, canonical params) for single-flight coalescing.
+_inflight: Dict[Hashable, _Flight] = {}
+
+
+def request_key(path: str, params: Optional[Dict[str, Any]]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    if not params:
+        return path, ()
+    return path, tuple(sorted((k, str(v)) for k, v in params.items() if v is not None))
+
+
+def _abandon_flight(key: Hashable, flight: _Flight) -> None:
+    # Called as a waiter gives up; the last one cancels the request.
+    if flight.waiters == 1 and not flight.task.done():
+        # Drop the flight first so new callers start a fresh request.
+        if _inflight.get(key) is flight:
+            del _inflight[key]
+        flight.task.cancel()
+
+
+def _forget_flight(key: Hashable, flight: _Flight) -> None:
+    if _inflight.get(key) is flight:
+        del _inflight[key]
+    # Mark the exception as retrieved; waiters re-raise it themselves.
+    if not flight.task.cancelled():
+        flight.task.exception()
+
+
 async def get_json(path: str, params: Optional[Dict[str, str]] = None) -> Any:
+    """
+    GET an NLB endpoint, coalescing identical concurrent requests into one upstream call.
+
+    Every caller receives the shared result or exception. Cancelling one caller does not
+    affect the others; the upstream request is only cancelled once every caller has gone.
+    A caller whose deadline runs out while waiting gets DeadlineExceededError the same way.
+    The request itself (retries included) runs under the deadline of the caller that started it.
+    """
+    key = request_key(path, params)
+    flight = _inflight.get(key)
+    if flight is not None:
+        current_span().set_attribute("nlb.coalesced", True)
+    else:
+        flight = _Flight(asyncio.ensure_future(_get_json_uncoalesced(path, params)))
+        _inflight[key] = flight
+        flight.task.add_done_callback(lambda _task, f=flight: _forget_flight(key, f))
+    flight.waiters += 1
+    try:
+        left = remaining()
+        if left is None:
+            return await asyncio.shield(flight.task)
+        # asyncio.wait neither cancels the shared task on timeout nor raises its exception.
+        await asyncio.wait((flight.task,), timeout=max(left, 0.0))
+        if flight.task.done():
+            return flight.task.result()
+        _abandon_flight(key, flight)
+        raise DeadlineExceededError(path)
+    except asyncio.CancelledError:
+        _abandon_flight(key, flight)
+        raise
+    finally:
+        flight.waiters -= 1
+
+
+async def _get_json_uncoalesced(path: str, params: Optional[Dict[str, str]] = None) -> Any:
+    import httpx
+    from tenacity import (
+        AsyncRetrying,
+        RetryError,
+        retry_if_exception_type,
+        retry_if_not_exception_type,
+        stop_after_attempt,
+    )
+
     base = str(settings.nlb_api_base).rstrip("/")
     url = base + path
-    timeout = settings.request_timeout_ms / 1000
-
-    headers = {
-        "X-Api-Key": settings.nlb_api_key,
-        "X-App-Code": settings.nlb_app_code,
-    }
     log = get_logger()
+    client = get_client()
+    breaker = breakers.get(path)
 
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        try:
-            async for attempt in AsyncRetrying(
-                reraise=True,
-                retry=retry_if_exception_type((httpx.RequestError, httpx.TimeoutException, UpstreamError)),
-                stop=stop_after_attempt(3),
-                wait=wait_exponential(multiplier=0.3, min=0.3, max=2.0),
-            ):
-                with attempt:
+    try:
+        async for attempt in AsyncRetrying(
+            reraise=True,
+            # An open breaker ends the retry loop at once instead of sleeping through backoff.
+            retry=retry_if_exception_type((httpx.RequestError, httpx.TimeoutException, UpstreamError))
+            & retry_if_not_exception_type((CircuitOpenError, DeadlineExceededError)),
+            stop=stop_after_attempt(3) | _out_of_budget,
+            wait=_wait_for_retry,
+        ):
+            # One span per attempt, so retries and the backoff gaps between them are visible.
+            with attempt, start_span(
+                "GET " + path,
+                {"http.request.method": "GET", "url.path": path, "nlb.attempt": attempt.retry_state.attempt_number},
+                kind=KIND_CLIENT,
+            ) as span:
+                left = remaining()
+                if left is not None and left <= 0:
+                    raise DeadlineExceededError(path)
+                if not breaker.allow():
+                    span.set_attribute("nlb.breaker", breaker.state)
+                    raise CircuitOpenError(path, breaker.retry_in())
+                probe = breaker.state == HALF_OPEN
+                if should_log("nlb request start"):
                     log.info(
                         "nlb request start",
                         extra={
@@ -44,10 +302,50 @@ async def get_json(path: str, params: Optional[Dict[str, str]] = None) -> Any:
                             "attempt": attempt.retry_state.attempt_number,
                         },
                     )
-                    response = await client.get(url, params=params, headers=headers)
-                    if response.status_code >= 500:
-                        raise UpstreamError(f"Upstream {response.status_code}")
-                    response.raise_for_status()
+                UPSTREAM_ATTEMPTS.inc(path)
+                if attempt.retry_state.attempt_number > 1:
+                    UPSTREAM_RETRIES.inc(path)
+                queued = time.perf_counter()
+                try:
+                    # The deadline covers limiter queueing as well as the request itself.
+                    async with asyncio.timeout(left), upstream_limiter.slot():
+                        span.set_attribute("nlb.limiter_wait_ms", round((time.perf_counter() - queued) * 1000, 3))
+                        response = await _send(client, url, params, path)
+                except TimeoutError:
+                    # Our budget ran out, not upstream's timeout: no breaker/limiter penalty.
+                    UPSTREAM_RESPONSES.inc(path, "deadline")
+                    raise DeadlineExceededError(path) from None
+                except httpx.TimeoutException:
+                    UPSTREAM_RESPONSES.inc(path, "timeout")
+                    upstream_limiter.record(None)
+                    breaker.record_failure()
+                    raise
+                except httpx.RequestError:
+                    UPSTREAM_RESPONSES.inc(path, "error")
+                    upstream_limiter.record(None)
+                    breaker.record_failure()
+                    raise
+                finally:
+                    if probe:
+                        # A cancelled probe must not leave the breaker half-open with no probe slot.
+                        breaker.release()
+                UPSTREAM_RESPONSES.inc(path, str(response.status_code))
+                span.set_attribute("http.response.status_code", response.status_code)
+                span.set_attribute("http.response.body.size", len(response.content))
+                # Only 5xx counts against the breaker: 429 and other 4xx show the endpoint is up.
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                if response.status_code == 429:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    upstream_limiter.record(429, retry_after)
+                    raise RateLimitedError("Upstream 429: API calls quota exceeded", retry_after)
+                upstream_limiter.record(response.status_code)
+                if response.status_code >= 500:
+                    raise UpstreamError(f"Upstream {response.status_code}")
+                response.raise_for_status()
+                if should_log("nlb request ok"):
                     log.info(
                         "nlb request ok",
                         extra={
@@ -57,10 +355,65 @@ async def get_json(path: str, params: Optional[Dict[str, str]] = None) -> Any:
                             "headers": redact_headers(dict(response.headers)),
                         },
                     )
-                    return response.json()
-        except RetryError as exc:  # type: ignore[assignment]
-            # Surface the last exception for clarity.
-            raise exc.last_attempt.result()  # type: ignore[misc]
+                return decode_response(path, response.content)
+    except RetryError as exc:  # type: ignore[assignment]
+        # Surface the last exception for clarity.
+        raise exc.last_attempt.result()  # type: ignore[misc]
+
+
+async def _timed_get(client: httpx.AsyncClient, url: str, params: Optional[Dict[str, str]], path: str) -> httpx.Response:
+    # Timed inside the limiter slot so queueing is not counted as upstream latency. Cancelled
+    # (hedged-out) requests are recorded too, so the histogram keeps the slow tail it lost.
+    start = time.perf_counter()
+    try:
+        return await client.get(url, params=params)
+    finally:
+        UPSTREAM_SECONDS.observe(time.perf_counter() - start, path)
+
+
+async def _hedge(client: httpx.AsyncClient, url: str, params: Optional[Dict[str, str]]) -> httpx.Response:
+    async with upstream_limiter.slot():
+        return await client.get(url, params=params)
+
+
+def _hedge_delay(path: str) -> Optional[float]:
+    """Seconds to wait before hedging a request to `path`, or None to not hedge it."""
+    if not settings.hedge_enabled or UPSTREAM_SECONDS.count(path) < settings.hedge_min_samples:
+        return None
+    # Hedges spend quota; never let them queue behind (or delay) first attempts.
+    if upstream_limiter.bucket.tokens < 1:
+        return None
+    tail = UPSTREAM_SECONDS.quantile(settings.hedge_quantile, path)
+    return None if tail is None else max(tail, settings.hedge_min_delay_ms / 1000)
+
+
+async def _send(client: httpx.AsyncClient, url: str, params: Optional[Dict[str, str]], path: str) -> httpx.Response:
+    """
+    Send one GET; if it is still unanswered after the hedge delay, send a duplicate and
+    return whichever succeeds first (NLB catalogue GETs are idempotent).
+    """
+    delay = _hedge_delay(path)
+    if delay is None:
+        return await _timed_get(client, url, params, path)
+    tasks = [asyncio.ensure_future(_timed_get(client, url, params, path))]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            UPSTREAM_HEDGES.inc(path)
+            current_span().set_attribute("nlb.hedged", True)
+            tasks.append(asyncio.ensure_future(_hedge(client, url, params)))
+        pending = set(tasks)
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            succeeded = [t for t in done if t.exception() is None]
+            if succeeded:
+                return succeeded[0].result()
+            if not pending:
+                return done.pop().result()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
 
 
 async def health_check() -> Dict[str, Any]:
@@ -69,4 +422,12 @@ async def health_check() -> Dict[str, Any]:
         "status": "ok",
         "baseUrl": str(settings.nlb_api_base),
         "timeoutMs": settings.request_timeout_ms,
+        "pool": {
+            "maxConnections": settings.http_max_connections,
+            "maxKeepalive": settings.http_max_keepalive_connections,
+            "http2": settings.http2_enabled,
+            "open": _client is not None and not _client.is_closed,
+        },
+        "limiter": upstream_limiter.stats(),
+        "breakers": breakers.stats(),
     }
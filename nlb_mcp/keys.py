@@ -0,0 +1,144 @@
+"""Compiled key resolvers mapping upstream PascalCase/camelCase variants to canonical names."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+
+_UNKNOWN: Any = object()
+
+
+def is_struct(value: Any) -> bool:
+    """True for typed structs produced by nlb_mcp.decode (attribute access, canonical names)."""
+    return hasattr(type(value), "__struct_fields__")
+
+
+def is_object(value: Any) -> bool:
+    """True for a decoded JSON object: a plain dict or a typed struct."""
+    return isinstance(value, dict) or is_struct(value)
+
+
+def field(obj: Any, *names: str) -> Any:
+    """First non-None of `names` on a dict or struct (structs only carry canonical names)."""
+    if isinstance(obj, dict):
+        for name in names:
+            value = obj.get(name)
+            if value is not None:
+                return value
+        return None
+    for name in names:
+        value = getattr(obj, name, None)
+        if value is not None:
+            return value
+    return None
+
+
+class KeyResolver:
+    """
+    Alias table built once per schema.
+
+    `resolve` scans a raw dict once and returns {canonical: value}. Only None counts as
+    missing, so falsy values such as `False`/`0` are kept. When several variants of one
+    field are present, the canonical spelling wins over aliases.
+    """
+
+    # Cap on memoized unknown keys so hostile payloads cannot grow the table unbounded.
+    _MAX_LEARNED = 512
+
+    def __init__(self, fields: Iterable[str], aliases: Optional[Mapping[str, Sequence[str]]] = None) -> None:
+        self.fields: Tuple[str, ...] = tuple(fields)
+        aliases = aliases or {}
+        # key -> (canonical, priority); priority 0 is the canonical spelling.
+        self._table: Dict[str, Optional[Tuple[str, int]]] = {}
+        self._folded: Dict[str, Tuple[str, int]] = {}
+        for name in self.fields:
+            self._table[name] = (name, 0)
+            self._folded.setdefault(name.lower(), (name, 1))
+            for alias in aliases.get(name, ()):
+                self._table.setdefault(alias, (name, 1))
+                self._folded.setdefault(alias.lower(), (name, 1))
+        self._learned = 0
+        # Direct-lookup spellings per field: canonical, PascalCase, then explicit aliases.
+        self._lookups: Dict[str, Tuple[str, ...]] = {
+            name: tuple(dict.fromkeys((name, name[:1].upper() + name[1:], *aliases.get(name, ()))))
+            for name in self.fields
+        }
+
+    def _classify(self, key: str) -> Optional[Tuple[str, int]]:
+        hit = self._folded.get(key.lower())
+        if self._learned < self._MAX_LEARNED:
+            self._table[key] = hit
+            self._learned += 1
+        return hit
+
+    def resolve(self, raw: Any) -> Dict[str, Any]:
+        if not isinstance(raw, dict):
+            # Typed structs already use canonical names; just drop unset fields.
+            return {
+                name: value
+                for name in raw.__struct_fields__
+                if (value := getattr(raw, name)) is not None and name in self._lookups
+            }
+        table = self._table
+        out: Dict[str, Any] = {}
+        for key, value in raw.items():
+            if value is None:
+                continue
+            hit = table.get(key, _UNKNOWN)
+            if hit is _UNKNOWN:
+                hit = self._classify(key)
+            if hit is None:
+                continue
+            name, priority = hit
+            # Canonical spelling always wins; otherwise the first alias seen is kept.
+            if priority == 0 or name not in out:
+                out[name] = value
+        return out
+
+    def get(self, raw: Any, name: str, default: Any = None) -> Any:
+        """Read one field via its known spellings; cheaper than `resolve` for a few fields."""
+        if not isinstance(raw, dict):
+            value = getattr(raw, name, None)
+            return default if value is None else value
+        for key in self._lookups[name]:
+            value = raw.get(key)
+            if value is not None:
+                return value
+        return default
+
+
+RECORD_KEYS = KeyResolver(
+    (
+        "brn", "digitalId", "otherTitles", "nativeOtherTitles", "variantTitles", "nativeVariantTitles",
+        "otherAuthors", "nativeOtherAuthors", "isbns", "issns", "format", "edition", "nativeEdition",
+        "publisher", "nativePublisher", "publishDate", "subjects", "physicalDescription",
+        "nativePhysicalDescription", "summary", "nativeSummary", "contents", "nativeContents", "thesis",
+        "nativeThesis", "notes", "nativeNotes", "allowReservation", "isRestricted", "activeReservationsCount",
+        "audience", "audienceImda", "language", "serial", "volumeNote", "nativeVolumeNote", "frequency",
+        "nativeFrequency", "credits", "nativeCredits", "performers", "nativePerformers", "availability",
+        "source", "volumes",
+    ),
+    {
+        "brn": ("BRN",),
+        "digitalId": ("DigitalId", "DigitalID"),
+        "isbns": ("ISBNs", "ISBN"),
+        "issns": ("ISSNs", "ISSN"),
+    },
+)
+
+TITLE_KEYS = KeyResolver(
+    ("title", "nativeTitle", "seriesTitle", "nativeSeriesTitle", "author", "nativeAuthor", "coverUrl", "records"),
+    {"title": ("TitleName",), "author": ("AuthorName",), "records": ("Records",)},
+)
+
+COVER_KEYS = KeyResolver(("small", "medium", "large"))
+FACET_KEYS = KeyResolver(("id", "name", "values"))
+FACET_VALUE_KEYS = KeyResolver(("id", "data", "count"))
+BIB_FORMAT_KEYS = KeyResolver(("code", "name"))
+TREND_KEYS = KeyResolver(("language", "ageLevel", "fiction", "singaporeCollection", "checkoutsTitles"))
+CHECKOUTS_TITLE_KEYS = KeyResolver(("title", "nativeTitle", "author", "nativeAuthor", "isbns", "checkoutsCount"))
+
+AVAILABILITY_KEYS = KeyResolver(
+    ("branchId", "branchName", "brn", "callNumber", "status", "available", "total", "location"),
+    {"branchId": ("BranchID",), "brn": ("BRN",)},
+)
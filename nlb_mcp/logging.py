@@ -1,25 +1,121 @@
-"""Lightweight logging setup with basic redaction."""
+"""Non-blocking structured logging with basic redaction."""
 
 from __future__ import annotations
 
+import atexit
+import json
 import logging
-from typing import Any, Dict
+import logging.handlers
+import queue
+import random
+import sys
+import time
+from typing import Any, Dict, Optional
 
+from nlb_mcp.config import settings
+
+# Attributes every LogRecord has; anything else on a record came from `extra=`.
+_RESERVED = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
 
 _logger = logging.getLogger("nlb_mcp")
-if not _logger.handlers:
-    handler = logging.StreamHandler()
-    formatter = logging.Formatter("%(asctime)s %(levelname)s %(message)s")
-    handler.setFormatter(formatter)
-    _logger.addHandler(handler)
-_logger.setLevel(logging.INFO)
 _logger.propagate = False
+_listener: Optional[logging.handlers.QueueListener] = None
+_sample_rates: Dict[str, float] = {}
+
+
+def _extras(record: logging.LogRecord) -> Dict[str, Any]:
+    return {k: v for k, v in record.__dict__.items() if k not in _RESERVED and not k.startswith("_")}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, event, then the record's `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        out.update(_extras(record))
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, default=str, separators=(",", ":"))
+
+
+class TextFormatter(logging.Formatter):
+    """The original `asctime level message` line, with `extra` fields appended as key=value."""
+
+    def __init__(self) -> None:
+        super().__init__("%(asctime)s %(levelname)s %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extras = _extras(record)
+        if extras:
+            line += " " + " ".join(f"{k}={v}" for k, v in extras.items())
+        return line
+
+
+class _EnqueueHandler(logging.handlers.QueueHandler):
+    # Hand the record over untouched; the stock prepare() formats and copies it on the caller's thread.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _parse_sample_rates(spec: str) -> Dict[str, float]:
+    # "nlb request start=0.1,nlb request ok=0.25" -> {event: rate}
+    rates: Dict[str, float] = {}
+    for part in spec.split(","):
+        event, sep, rate = part.rpartition("=")
+        if sep and event.strip():
+            rates[event.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+def _configure() -> None:
+    global _listener, _sample_rates
+    _logger.setLevel(settings.log_level.upper())
+    _sample_rates = _parse_sample_rates(settings.log_sample_rates)
+    if _logger.handlers:
+        return
+    # The event loop only enqueues records; formatting and the stderr write happen on the
+    # listener thread so slow terminals/pipes never stall tool calls.
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(JsonFormatter() if settings.log_format == "json" else TextFormatter())
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _logger.addHandler(_EnqueueHandler(records))
+    _listener = logging.handlers.QueueListener(records, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(flush_logging)
 
 
 def get_logger() -> logging.Logger:
+    if _listener is None and not _logger.handlers:
+        _configure()
     return _logger
 
 
+def should_log(event: str, level: int = logging.INFO) -> bool:
+    """
+    Level and sampling gate for hot-path events; check it before building `extra` dicts.
+
+    Rates come from LOG_SAMPLE_RATES; events without a rate are always logged.
+    """
+    if not get_logger().isEnabledFor(level):
+        return False
+    rate = _sample_rates.get(event)
+    return rate is None or random.random() < rate
+
+
+def flush_logging() -> None:
+    """Drain queued records and stop the writer thread (registered at exit)."""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
 def redact_headers(headers: Dict[str, Any]) -> Dict[str, Any]:
     # Remove or mask secret-bearing headers before logging.
     redacted = {}
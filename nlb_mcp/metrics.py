@@ -0,0 +1,260 @@
+"""In-process metrics: counters, gauges and histograms with Prometheus text exposition."""
+
+from __future__ import annotations
+
+import functools
+import re
+import time
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+LabelValues = Tuple[str, ...]
+
+# Latency buckets (seconds) covering cache hits through slow upstream retries.
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.label_names: Tuple[str, ...] = tuple(labels)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        for labels, value in self.values.items():
+            yield self.name + "_total", _labels(self.label_names, labels), value
+
+    def snapshot(self) -> Any:
+        return [{"labels": dict(zip(self.label_names, k)), "value": v} for k, v in self.values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        self.values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) - amount
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        for labels, value in self.values.items():
+            yield self.name, _labels(self.label_names, labels), value
+
+    def snapshot(self) -> Any:
+        return [{"labels": dict(zip(self.label_names, k)), "value": v} for k, v in self.values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labels: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]; cumulative only at exposition time.
+        self.values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        row = self.values.get(labels)
+        if row is None:
+            row = self.values[labels] = [0.0] * (len(self.buckets) + 2)
+        row[bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def count(self, *labels: str) -> float:
+        row = self.values.get(labels)
+        return sum(row[:-1]) if row is not None else 0.0
+
+    def quantile(self, q: float, *labels: str) -> Optional[float]:
+        """Estimate the q-quantile by interpolating linearly inside its bucket (None if unknown or in +Inf)."""
+        row = self.values.get(labels)
+        if row is None:
+            return None
+        target, running, lower = q * sum(row[:-1]), 0.0, 0.0
+        for bound, n in zip(self.buckets, row):
+            if n and running + n >= target:
+                return lower + (bound - lower) * (target - running) / n
+            running += n
+            lower = bound
+        return None
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        for labels, row in self.values.items():
+            running = 0.0
+            for bound, count in zip(self.buckets, row):
+                running += count
+                yield self.name + "_bucket", _labels(self.label_names, labels, f'le="{bound:g}"'), running
+            running += row[len(self.buckets)]
+            yield self.name + "_bucket", _labels(self.label_names, labels, 'le="+Inf"'), running
+            yield self.name + "_sum", _labels(self.label_names, labels), row[-1]
+            yield self.name + "_count", _labels(self.label_names, labels), running
+
+    def snapshot(self) -> Any:
+        out = []
+        for labels, row in self.values.items():
+            count = sum(row[:-1])
+            out.append(
+                {
+                    "labels": dict(zip(self.label_names, labels)),
+                    "count": count,
+                    "sum": row[-1],
+                    "mean": row[-1] / count if count else 0.0,
+                    "p50": self._quantile(row, count, 0.5),
+                    "p95": self._quantile(row, count, 0.95),
+                    "p99": self._quantile(row, count, 0.99),
+                }
+            )
+        return out
+
+    def _quantile(self, row: List[float], count: float, q: float) -> Optional[float]:
+        # Upper bucket bound containing the q-th observation (None if it is in +Inf).
+        if not count:
+            return None
+        target, running = q * count, 0.0
+        for bound, n in zip(self.buckets, row):
+            running += n
+            if running >= target:
+                return bound
+        return None
+
+
+Collector = Callable[[], Iterable[Tuple[str, str, Dict[str, str], float]]]
+
+
+class Registry:
+    """Holds metrics plus collectors that report externally-owned stats at scrape time."""
+
+    def __init__(self) -> None:
+        self.metrics: List[_Metric] = []
+        self.collectors: List[Collector] = []
+
+    def register(self, metric: Any) -> Any:
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Collector) -> None:
+        """`collector()` yields (name, help, labels, value) gauge samples."""
+        self.collectors.append(collector)
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():  # type: ignore[attr-defined]
+                lines.append(f"{name}{labels} {value:g}")
+        seen = set()
+        for collector in self.collectors:
+            for name, help, labels, value in collector():
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {help}")
+                    lines.append(f"# TYPE {name} gauge")
+                names = tuple(labels)
+                lines.append(f"{name}{_labels(names, tuple(labels[n] for n in names))} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {m.name: m.snapshot() for m in self.metrics}  # type: ignore[attr-defined]
+        for collector in self.collectors:
+            for name, _help, labels, value in collector():
+                out.setdefault(name, []).append({"labels": labels, "value": value})
+        return out
+
+
+_CAMEL = re.compile(r"(?<!^)(?=[A-Z])")
+
+
+def stats_collector(prefix: str, help: str, stats: Callable[[], Dict[str, Any]]) -> Collector:
+    """Expose the numeric fields of an existing `stats()` dict as `<prefix>_<snake_key>` gauges."""
+
+    def collect() -> Iterable[Tuple[str, str, Dict[str, str], float]]:
+        for key, value in stats().items():
+            if isinstance(value, (int, float)):
+                yield f"{prefix}_{_CAMEL.sub('_', key).lower()}", f"{help} ({key})", {}, float(value)
+
+    return collect
+
+
+REGISTRY = Registry()
+
+UPSTREAM_SECONDS = REGISTRY.register(
+    Histogram("nlb_upstream_request_seconds", "Upstream HTTP attempt latency by path.", ("path",))
+)
+UPSTREAM_ATTEMPTS = REGISTRY.register(Counter("nlb_upstream_attempts", "Upstream HTTP attempts by path.", ("path",)))
+UPSTREAM_RETRIES = REGISTRY.register(
+    Counter("nlb_upstream_retries", "Upstream attempts after the first, by path.", ("path",))
+)
+UPSTREAM_HEDGES = REGISTRY.register(
+    Counter("nlb_upstream_hedges", "Duplicate (hedged) upstream requests sent after the hedge delay, by path.", ("path",))
+)
+UPSTREAM_RESPONSES = REGISTRY.register(
+    Counter(
+        "nlb_upstream_responses",
+        "Upstream outcomes by path and status code (or 'timeout'/'error' for transport failures).",
+        ("path", "status"),
+    )
+)
+TOOL_SECONDS = REGISTRY.register(Histogram("nlb_tool_seconds", "MCP tool handler latency.", ("tool",)))
+TOOL_CALLS = REGISTRY.register(
+    Counter("nlb_tool_calls", "MCP tool calls by outcome ('ok' or 'error').", ("tool", "outcome"))
+)
+TOOL_IN_FLIGHT = REGISTRY.register(Gauge("nlb_tool_in_flight", "MCP tool calls currently executing.", ("tool",)))
+
+T = TypeVar("T")
+
+
+def timed_tool(name: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Wrap a tool handler with latency/outcome/in-flight metrics; keeps its signature for FastMCP."""
+
+    def decorate(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            TOOL_IN_FLIGHT.inc(name)
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = await fn(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                TOOL_SECONDS.observe(time.perf_counter() - start, name)
+                TOOL_CALLS.inc(name, outcome)
+                TOOL_IN_FLIGHT.dec(name)
+
+        return wrapper
+
+    return decorate
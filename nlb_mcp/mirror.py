@@ -0,0 +1,350 @@
+"""Local mirror of recently acquired titles, synced incrementally from /GetNewTitles."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import os
+import sqlite3
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing, asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+from nlb_mcp.config import settings
+from nlb_mcp.decode import decode_json, encode_json
+from nlb_mcp.keys import TITLE_KEYS, is_object
+from nlb_mcp.logging import get_logger
+from nlb_mcp.metrics import REGISTRY, stats_collector
+from nlb_mcp.models import TitleSummary, normalize_titles
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS titles (
+    brn INTEGER PRIMARY KEY,
+    body BLOB NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# /GetNewTitles windows (DateRange) and the acquisition days each covers, narrowest first.
+WINDOWS = (("Weekly", 7), ("Monthly", 30), ("Quarterly", 91))
+# Acquisition dates are whole days; a window must cover the gap since the last sync plus this.
+_WINDOW_SLACK_S = 86400.0
+
+# Record fields kept per title: enough to search and identify it (and to answer search_titles
+# from the search index), not the long notes.
+MIRROR_RECORD_FIELDS = ("brn", "isbns", "format", "subjects", "publishDate", "publisher", "language", "availability")
+
+_PAGE_SIZE = 200  # /GetNewTitles maximum
+
+# A sync lease outlives a crashed holder by at most this long.
+_LEASE_S = 900.0
+# How often a worker that found the lease taken checks again.
+_LEASE_POLL_S = 30.0
+
+T = TypeVar("T")
+
+
+def normalize_new_titles(items: Iterable[Any]) -> List[TitleSummary]:
+    """
+    Normalize raw /GetNewTitles entries with `normalize_titles`.
+
+    A new-arrival entry is one record with its title fields inlined, so each is wrapped
+    as a title holding that single record first.
+    """
+    wrapped = []
+    for item in items:
+        if is_object(item):
+            title = TITLE_KEYS.resolve(item)
+            title["records"] = [item]
+            wrapped.append(title)
+    if not wrapped:
+        return []
+    return normalize_titles({"titles": wrapped}, fields=MIRROR_RECORD_FIELDS)[0].get("titles", [])
+
+
+def window_for(since_s: Optional[float]) -> str:
+    """Narrowest DateRange covering `since_s` seconds since the last sync (None = first sync)."""
+    if since_s is not None:
+        for name, days in WINDOWS:
+            if since_s + _WINDOW_SLACK_S <= days * 86400:
+                return name
+    return WINDOWS[-1][0]
+
+
+class TitleMirror:
+    """
+    SQLite (WAL) store of normalized titles, one zlib-compressed JSON row per BRN, plus
+    the sync checkpoint. Shared by the workers on a host like the disk cache.
+
+    The methods are blocking; async code calls them through `run`, which uses one mirror
+    thread, so a busy lock held by another worker never stalls the event loop.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid = 0
+        self._stats: Dict[str, Any] = {}
+
+    def _db(self) -> sqlite3.Connection:
+        # One connection per process (a forked worker must not reuse its parent's).
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+            self._refresh_stats()
+        return self._conn
+
+    def _thread(self) -> ThreadPoolExecutor:
+        # A single worker keeps calls on the connection serialized; rebuilt after fork.
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="nlb-mirror")
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Call `fn(*args)` (one of these methods) on the mirror thread."""
+        return await asyncio.get_running_loop().run_in_executor(self._thread(), functools.partial(fn, *args))
+
+    def upsert(self, titles: Iterable[TitleSummary], seen_at: float) -> int:
+        """Store titles (keyed on their record's BRN); returns how many were new."""
+        rows = {}
+        for title in titles:
+            records = title.get("records") or []
+            brn = records[0].get("brn") if records else None
+            if brn is not None:
+                rows[int(brn)] = (int(brn), zlib.compress(encode_json(title)), seen_at, seen_at)
+        if not rows:
+            return 0
+        db = self._db()
+        db.execute("BEGIN")
+        try:
+            # Primary-key lookups for this batch only, not a count of the whole table.
+            marks = ",".join("?" * len(rows))
+            known = db.execute(f"SELECT COUNT(*) FROM titles WHERE brn IN ({marks})", list(rows)).fetchone()[0]
+            db.executemany(
+                "INSERT INTO titles (brn, body, first_seen, last_seen) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(brn) DO UPDATE SET body = excluded.body, last_seen = excluded.last_seen",
+                rows.values(),
+            )
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+        added = len(rows) - known
+        if "titles" in self._stats:
+            self._stats["titles"] += added
+        return added
+
+    def get(self, brn: int) -> Optional[TitleSummary]:
+        row = self._db().execute("SELECT body FROM titles WHERE brn = ?", (int(brn),)).fetchone()
+        return decode_json(zlib.decompress(row[0])) if row else None
+
+    def titles(self) -> Iterator[TitleSummary]:
+        """Every stored title, newest acquisition first."""
+        for (body,) in self._db().execute("SELECT body FROM titles ORDER BY first_seen DESC, brn DESC"):
+            yield decode_json(zlib.decompress(body))
+
+    def count(self) -> int:
+        return self._db().execute("SELECT COUNT(*) FROM titles").fetchone()[0]
+
+    def used_bytes(self) -> int:
+        db = self._db()
+        pages = db.execute("PRAGMA page_count").fetchone()[0] - db.execute("PRAGMA freelist_count").fetchone()[0]
+        return pages * db.execute("PRAGMA page_size").fetchone()[0]
+
+    def checkpoint(self) -> Dict[str, Any]:
+        row = self._db().execute("SELECT value FROM sync_state WHERE key = 'checkpoint'").fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def save_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        self._db().execute(
+            "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('checkpoint', ?)", (json.dumps(checkpoint),)
+        )
+        self._refresh_stats()
+
+    def try_lease(self, owner: str, duration_s: float = _LEASE_S) -> bool:
+        """Take (or extend) the sync lease unless another owner holds an unexpired one."""
+        db = self._db()
+        now = time.time()
+        # IMMEDIATE takes the write lock up front, so two workers cannot both see it free.
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT value FROM sync_state WHERE key = 'lease'").fetchone()
+            lease = json.loads(row[0]) if row else {}
+            if lease.get("owner", owner) != owner and lease.get("until", 0.0) > now:
+                db.execute("ROLLBACK")
+                return False
+            db.execute(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('lease', ?)",
+                (json.dumps({"owner": owner, "until": now + duration_s}),),
+            )
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+        return True
+
+    def release_lease(self, owner: str) -> None:
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT value FROM sync_state WHERE key = 'lease'").fetchone()
+            if row and json.loads(row[0]).get("owner") == owner:
+                db.execute("DELETE FROM sync_state WHERE key = 'lease'")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _refresh_stats(self) -> None:
+        # On open and after each sync; stats never touch the file.
+        try:
+            self._stats = {"titles": self.count(), "bytes": self.used_bytes(), **self.checkpoint()}
+        except sqlite3.Error as exc:
+            self._stats = {"error": repr(exc)}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": self.path, **self._stats}
+
+
+async def sync_once(mirror: TitleMirror, max_pages: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Pull titles acquired since the last checkpoint into `mirror`.
+
+    The checkpoint only advances when the whole window was read, so a failed run, or
+    one cut short by `max_pages`, is covered again (by an equal or wider window) next
+    time. A cut-short run records `lastAttempt` so the next one still waits an interval.
+    """
+    from nlb_mcp.nlb_client import PageLimitReached, iter_new_titles
+
+    started = time.time()
+    last = (await mirror.run(mirror.checkpoint)).get("lastSync")
+    window = window_for(None if last is None else started - last)
+    index = None
+    if settings.search_index_enabled:
+        from nlb_mcp.search_index import get_search_index
+
+        index = get_search_index()
+    seen = added = 0
+    batch: List[Any] = []
+
+    async def store() -> int:
+        titles = normalize_new_titles(batch)
+        if index is not None:
+            index.add_titles(titles)
+        return await mirror.run(mirror.upsert, titles, started)
+
+    truncated = False
+    async with aclosing(iter_new_titles(date_range=window, page_size=_PAGE_SIZE, max_pages=max_pages)) as items:
+        try:
+            async for item in items:
+                batch.append(item)
+                if len(batch) >= _PAGE_SIZE:
+                    seen += len(batch)
+                    added += await store()
+                    batch = []
+        except PageLimitReached:
+            truncated = True
+    if batch:
+        seen += len(batch)
+        added += await store()
+    result = {
+        "lastSync": started,
+        "window": window,
+        "seen": seen,
+        "added": added,
+        "durationS": round(time.time() - started, 3),
+    }
+    if truncated:
+        # Keep the old lastSync: the rest of the window was never read.
+        result = {**result, "lastSync": last, "lastAttempt": started, "truncated": True}
+        await mirror.run(mirror.save_checkpoint, {k: v for k, v in result.items() if v is not None})
+        get_logger().warning("mirror sync stopped at MIRROR_MAX_PAGES; checkpoint kept", extra=result)
+        return result
+    await mirror.run(mirror.save_checkpoint, result)
+    get_logger().info("mirror sync done", extra=result)
+    return result
+
+
+async def _due_in(mirror: TitleMirror, interval_s: float) -> float:
+    checkpoint = await mirror.run(mirror.checkpoint)
+    last = checkpoint.get("lastAttempt", checkpoint.get("lastSync"))
+    return 0.0 if last is None else last + interval_s - time.time()
+
+
+async def run_sync(mirror: TitleMirror, interval_s: float, max_pages: Optional[int] = None) -> None:
+    """
+    Sync every `interval_s`. Workers sharing the file take turns: a due sync runs only in
+    the worker holding the lease, and the others pick up its checkpoint.
+    """
+    log = get_logger()
+    owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+    while True:
+        try:
+            due = await _due_in(mirror, interval_s)
+            if due > 0:
+                await asyncio.sleep(due)
+                continue
+            if not await mirror.run(mirror.try_lease, owner):
+                await asyncio.sleep(min(interval_s, _LEASE_POLL_S))
+                continue
+            try:
+                # Another worker may have finished a sync between our check and the lease.
+                if await _due_in(mirror, interval_s) <= 0:
+                    await sync_once(mirror, max_pages)
+            except Exception as exc:  # keep the server up; retry after a short pause
+                log.warning("mirror sync failed", extra={"error": repr(exc)})
+                # Still holding the lease, so other workers do not retry a failing upstream meanwhile.
+                await asyncio.sleep(min(interval_s, 300.0))
+            finally:
+                await mirror.run(mirror.release_lease, owner)
+        except Exception as exc:
+            # Checkpoint or lease I/O failed (e.g. "database is locked" while another worker
+            # writes); an unreleased lease expires on its own.
+            log.warning("mirror sync state unavailable", extra={"error": repr(exc)})
+            await asyncio.sleep(min(interval_s, _LEASE_POLL_S))
+
+
+_mirror: Optional[TitleMirror] = None
+
+
+def get_mirror() -> Optional[TitleMirror]:
+    """The mirror configured by MIRROR_PATH, or None when the mirror is off."""
+    global _mirror
+    if _mirror is None and settings.mirror_path:
+        _mirror = TitleMirror(settings.mirror_path)
+        REGISTRY.add_collector(stats_collector("nlb_mirror", "Local title mirror", _mirror.stats))
+    return _mirror
+
+
+@asynccontextmanager
+async def background_sync(_server: Any = None) -> AsyncIterator[None]:
+    """Run the mirror sync for the server lifetime when MIRROR_PATH is set."""
+    mirror = get_mirror()
+    task = None
+    if mirror is not None:
+        task = asyncio.create_task(run_sync(mirror, settings.mirror_sync_interval_s, settings.mirror_max_pages))
+    try:
+        yield
+    finally:
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
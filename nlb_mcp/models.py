@@ -2,8 +2,23 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, TypedDict
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple, TypedDict
 
+from nlb_mcp.keys import (
+    AVAILABILITY_KEYS,
+    BIB_FORMAT_KEYS,
+    CHECKOUTS_TITLE_KEYS,
+    COVER_KEYS,
+    FACET_KEYS,
+    FACET_VALUE_KEYS,
+    RECORD_KEYS,
+    TITLE_KEYS,
+    TREND_KEYS,
+    field,
+    is_object,
+    is_struct,
+)
 from nlb_mcp.schemas import (
     Facet,
     FacetData,
@@ -22,7 +37,17 @@ class NormalizedAvailability(TypedDict, total=False):
     brn: str
 
 
-def normalize_titles(response: Dict[str, Any]) -> List[SearchTitlesResponseV2]:
+def normalize_titles(
+    response: Dict[str, Any],
+    fields: Optional[Iterable[str]] = None,
+    max_titles: Optional[int] = None,
+) -> List[SearchTitlesResponseV2]:
+    """
+    Normalize a titles payload into the v2 camelCase shape.
+
+    `fields` projects each record to the named record fields (see RECORD_FIELD_NAMES);
+    None keeps the full record. `max_titles` normalizes only the leading titles.
+    """
     titles_raw: List[Dict[str, Any]] = []
     total_records = None
     count = None
@@ -45,27 +70,37 @@ def normalize_titles(response: Dict[str, Any]) -> List[SearchTitlesResponseV2]:
             has_more = response.get("hasMoreRecords")
             next_offset = response.get("nextRecordsOffset")
         facets_raw = response.get("facets") or response.get("Facets") or []
+    elif is_struct(response):
+        # Typed response from nlb_mcp.decode.
+        titles_raw = field(response, "titles") or []
+        total_records = field(response, "totalRecords")
+        count = field(response, "count")
+        has_more = field(response, "hasMoreRecords")
+        next_offset = field(response, "nextRecordsOffset")
+        facets_raw = field(response, "facets") or []
 
+    if max_titles is not None:
+        titles_raw = titles_raw[:max_titles]
     titles: List[TitleSummary] = []
     for item in titles_raw:
-        title = item.get("title") or item.get("TitleName")
-        native_title = item.get("nativeTitle")
-        series_title = item.get("seriesTitle") or []
-        native_series_title = item.get("nativeSeriesTitle") or []
-        author = item.get("author") or item.get("AuthorName")
-        native_author = item.get("nativeAuthor")
-        cover_url = item.get("coverUrl") or {}
-        records = _normalize_records(item.get("records") or item.get("Records"))
+        if not is_object(item):
+            continue
+        raw = TITLE_KEYS.resolve(item)
+        series_title = raw.get("seriesTitle")
+        native_series_title = raw.get("nativeSeriesTitle")
+        cover_url = raw.get("coverUrl")
+        if is_struct(cover_url):
+            cover_url = COVER_KEYS.resolve(cover_url)
 
         entry: TitleSummary = {
-            "title": title,
-            "nativeTitle": native_title,
+            "title": raw.get("title"),
+            "nativeTitle": raw.get("nativeTitle"),
             "seriesTitle": series_title if isinstance(series_title, list) else [],
             "nativeSeriesTitle": native_series_title if isinstance(native_series_title, list) else [],
-            "author": author,
-            "nativeAuthor": native_author,
+            "author": raw.get("author"),
+            "nativeAuthor": raw.get("nativeAuthor"),
             "coverUrl": cover_url if isinstance(cover_url, dict) else {},
-            "records": records,
+            "records": _normalize_records(raw.get("records"), fields),
         }
         titles.append(_strip_nones(entry))
 
@@ -90,19 +125,18 @@ def normalize_availability(response: Dict[str, Any]) -> List[NormalizedAvailabil
             items = response["Result"].get("Items") or []
         if not items:
             items = response.get("items") or []
+    elif is_struct(response):
+        items = field(response, "items") or []
     normalized: List[NormalizedAvailability] = []
     for item in items:
-        branch = (
-            item.get("branchName")
-            or item.get("BranchName")
-            or item.get("branchId")
-            or item.get("BranchID")
-            or "Unknown branch"
-        )
-        call_number = item.get("callNumber") or item.get("CallNumber")
-        status = item.get("status") or item.get("Status")
-        available = item.get("available") if "available" in item else item.get("Available")
-        total = item.get("total") if "total" in item else item.get("Total")
+        if not is_object(item):
+            continue
+        raw = AVAILABILITY_KEYS.resolve(item)
+        branch = raw.get("branchName") or raw.get("branchId") or "Unknown branch"
+        call_number = raw.get("callNumber")
+        status = raw.get("status")
+        available = raw.get("available")
+        total = raw.get("total")
 
         entry: NormalizedAvailability = {
             "branch": branch,
@@ -115,79 +149,139 @@ def normalize_availability(response: Dict[str, Any]) -> List[NormalizedAvailabil
     return normalized
 
 
+def normalize_title_details(response: Any, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Flatten a /GetTitleDetails payload into title fields plus record fields (camelCase).
+
+    `fields` projects the record part as in `normalize_titles`; None keeps all of it.
+    """
+    if not is_object(response):
+        return {}
+    title = TITLE_KEYS.resolve(response)
+    entry = _strip_nones(
+        {
+            "title": title.get("title"),
+            "nativeTitle": title.get("nativeTitle"),
+            "author": title.get("author"),
+            "nativeAuthor": title.get("nativeAuthor"),
+            "seriesTitle": title.get("seriesTitle"),
+        }
+    )
+    records = _normalize_records([response], fields)
+    if records:
+        entry.update(records[0])
+    return entry
+
+
+def normalize_checkout_trends(response: Any) -> List[Dict[str, Any]]:
+    """
+    Flatten a /GetMostCheckoutsTrendsTitles payload: one entry per trend group (language,
+    age level, fiction, Singapore collection), its titles ordered by checkouts.
+    """
+    groups = field(response, "checkoutsTrends", "CheckoutsTrends") if is_object(response) else None
+    trends: List[Dict[str, Any]] = []
+    for group in groups or []:
+        if not is_object(group):
+            continue
+        raw = TREND_KEYS.resolve(group)
+        titles = []
+        for item in raw.get("checkoutsTitles") or []:
+            if not is_object(item):
+                continue
+            title = CHECKOUTS_TITLE_KEYS.resolve(item)
+            titles.append(
+                _strip_nones(
+                    {
+                        "title": title.get("title"),
+                        "author": title.get("author"),
+                        "isbns": list(title.get("isbns") or []),
+                        "checkouts": title.get("checkoutsCount"),
+                    }
+                )
+            )
+        titles.sort(key=lambda t: t.get("checkouts") or 0, reverse=True)
+        trends.append(
+            _strip_nones(
+                {
+                    "language": raw.get("language"),
+                    "ageLevel": raw.get("ageLevel"),
+                    "fiction": raw.get("fiction"),
+                    "singaporeCollection": raw.get("singaporeCollection"),
+                    "titles": titles,
+                }
+            )
+        )
+    return trends
+
+
 def _strip_nones(obj: Dict[str, Any]) -> Dict[str, Any]:
     """Return a copy without None values to satisfy strict JSON schema validators."""
     return {k: v for k, v in obj.items() if v is not None}
 
 
 def _extract_brn_from_records(item: Dict[str, Any]) -> Any:
-    records = item.get("records") or item.get("Records")
+    records = TITLE_KEYS.get(item, "records")
     if not isinstance(records, list) or not records:
         return None
     first = records[0]
-    if not isinstance(first, dict):
+    if not is_object(first):
         return None
-    return first.get("brn") or first.get("BRN")
+    return RECORD_KEYS.get(first, "brn")
+
+
+# Record fields in output order; list-valued fields default to [] when absent.
+RECORD_FIELD_NAMES: Tuple[str, ...] = RECORD_KEYS.fields
+_SCALAR_RECORD_FIELDS = frozenset(
+    {
+        "brn", "digitalId", "format", "publishDate", "allowReservation", "isRestricted",
+        "activeReservationsCount", "language", "serial", "availability", "source",
+    }
+)
+
+# Projection used by the search tools (they only return these record fields).
+BASIC_RECORD_FIELDS: Tuple[str, ...] = ("brn", "format", "availability")
+
+# Default projection for title details. Live fields (availability, reservations) are left
+# out because details are cached for days; the availability tools give current status.
+DETAIL_RECORD_FIELDS: Tuple[str, ...] = (
+    "brn", "isbns", "format", "otherAuthors", "publisher", "publishDate", "edition", "language",
+    "subjects", "summary", "physicalDescription",
+)
+
+
+@lru_cache(maxsize=32)
+def _projection(fields: FrozenSet[str]) -> Tuple[Tuple[str, bool], ...]:
+    unknown = fields.difference(RECORD_FIELD_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown record fields: {sorted(unknown)}")
+    return tuple((name, name not in _SCALAR_RECORD_FIELDS) for name in RECORD_FIELD_NAMES if name in fields)
 
 
-def _normalize_records(records: Any) -> List[Dict[str, Any]]:
+_FULL_RECORD = _projection(frozenset(RECORD_FIELD_NAMES))
+
+
+def _normalize_records(records: Any, fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
     if not isinstance(records, list):
         return []
+    spec = _FULL_RECORD if fields is None else _projection(frozenset(fields))
+    # A full record is cheapest as one scan of the raw keys; a small projection as direct lookups.
+    scan = len(spec) > 8
     normalized: List[Dict[str, Any]] = []
     for rec in records:
-        if not isinstance(rec, dict):
+        if not is_object(rec):
             continue
-        normalized.append(
-            _strip_nones(
-                {
-                    "brn": rec.get("brn") or rec.get("BRN"),
-                    "digitalId": rec.get("digitalId") or rec.get("DigitalId") or rec.get("DigitalID"),
-                    "otherTitles": rec.get("otherTitles") or rec.get("OtherTitles") or [],
-                    "nativeOtherTitles": rec.get("nativeOtherTitles") or rec.get("NativeOtherTitles") or [],
-                    "variantTitles": rec.get("variantTitles") or rec.get("VariantTitles") or [],
-                    "nativeVariantTitles": rec.get("nativeVariantTitles") or rec.get("NativeVariantTitles") or [],
-                    "otherAuthors": rec.get("otherAuthors") or rec.get("OtherAuthors") or [],
-                    "nativeOtherAuthors": rec.get("nativeOtherAuthors") or rec.get("NativeOtherAuthors") or [],
-                    "isbns": rec.get("isbns") or rec.get("ISBNs") or rec.get("ISBN") or [],
-                    "issns": rec.get("issns") or rec.get("ISSNs") or rec.get("ISSN") or [],
-                    "format": _format_to_bib_format(rec.get("format") or rec.get("Format")),
-                    "edition": rec.get("edition") or rec.get("Edition") or [],
-                    "nativeEdition": rec.get("nativeEdition") or rec.get("NativeEdition") or [],
-                    "publisher": rec.get("publisher") or rec.get("Publisher") or [],
-                    "nativePublisher": rec.get("nativePublisher") or rec.get("NativePublisher") or [],
-                    "publishDate": rec.get("publishDate") or rec.get("PublishDate"),
-                    "subjects": rec.get("subjects") or rec.get("Subjects") or [],
-                    "physicalDescription": rec.get("physicalDescription") or rec.get("PhysicalDescription") or [],
-                    "nativePhysicalDescription": rec.get("nativePhysicalDescription") or rec.get("NativePhysicalDescription") or [],
-                    "summary": rec.get("summary") or rec.get("Summary") or [],
-                    "nativeSummary": rec.get("nativeSummary") or rec.get("NativeSummary") or [],
-                    "contents": rec.get("contents") or rec.get("Contents") or [],
-                    "nativeContents": rec.get("nativeContents") or rec.get("NativeContents") or [],
-                    "thesis": rec.get("thesis") or rec.get("Thesis") or [],
-                    "nativeThesis": rec.get("nativeThesis") or rec.get("NativeThesis") or [],
-                    "notes": rec.get("notes") or rec.get("Notes") or [],
-                    "nativeNotes": rec.get("nativeNotes") or rec.get("NativeNotes") or [],
-                    "allowReservation": rec.get("allowReservation") or rec.get("AllowReservation"),
-                    "isRestricted": rec.get("isRestricted") or rec.get("IsRestricted"),
-                    "activeReservationsCount": rec.get("activeReservationsCount") or rec.get("ActiveReservationsCount"),
-                    "audience": rec.get("audience") or rec.get("Audience") or [],
-                    "audienceImda": rec.get("audienceImda") or rec.get("AudienceImda") or [],
-                    "language": rec.get("language") or rec.get("Language"),
-                    "serial": rec.get("serial") or rec.get("Serial"),
-                    "volumeNote": rec.get("volumeNote") or rec.get("VolumeNote") or [],
-                    "nativeVolumeNote": rec.get("nativeVolumeNote") or rec.get("NativeVolumeNote") or [],
-                    "frequency": rec.get("frequency") or rec.get("Frequency") or [],
-                    "nativeFrequency": rec.get("nativeFrequency") or rec.get("NativeFrequency") or [],
-                    "credits": rec.get("credits") or rec.get("Credits") or [],
-                    "nativeCredits": rec.get("nativeCredits") or rec.get("NativeCredits") or [],
-                    "performers": rec.get("performers") or rec.get("Performers") or [],
-                    "nativePerformers": rec.get("nativePerformers") or rec.get("NativePerformers") or [],
-                    "availability": rec.get("availability") or rec.get("Availability"),
-                    "source": rec.get("source") or rec.get("Source"),
-                    "volumes": rec.get("volumes") or rec.get("Volumes") or [],
-                }
-            )
-        )
+        raw = RECORD_KEYS.resolve(rec) if scan else None
+        out: Dict[str, Any] = {}
+        for name, is_list in spec:
+            value = raw.get(name) if raw is not None else RECORD_KEYS.get(rec, name)
+            if name == "format":
+                value = _format_to_bib_format(value)
+            elif value is None:
+                if not is_list:
+                    continue
+                value = []
+            out[name] = value
+        normalized.append(out)
     return normalized
 
 
@@ -196,28 +290,21 @@ def _normalize_facets(facets: Any) -> List[Facet]:
         return []
     normalized: List[Facet] = []
     for fac in facets:
-        if not isinstance(fac, dict):
+        if not is_object(fac):
             continue
-        values_raw = fac.get("values") or fac.get("Values") or []
+        raw = FACET_KEYS.resolve(fac)
+        values_raw = raw.get("values") or []
         values: List[FacetData] = []
         if isinstance(values_raw, list):
             for val in values_raw:
-                if not isinstance(val, dict):
+                if not is_object(val):
                     continue
-                values.append(
-                    _strip_nones(
-                        {
-                            "id": val.get("id") or val.get("Id"),
-                            "data": val.get("data") or val.get("Data"),
-                            "count": val.get("count") or val.get("Count"),
-                        }
-                    )
-                )
+                values.append(FACET_VALUE_KEYS.resolve(val))
         normalized.append(
             _strip_nones(
                 {
-                    "id": fac.get("id") or fac.get("Id"),
-                    "name": fac.get("name") or fac.get("Name"),
+                    "id": raw.get("id"),
+                    "name": raw.get("name"),
                     "values": values,
                 }
             )
@@ -226,8 +313,8 @@ def _normalize_facets(facets: Any) -> List[Facet]:
 
 
 def _format_to_bib_format(fmt: Any) -> Dict[str, Any]:
-    if isinstance(fmt, dict):
-        return _strip_nones({"code": fmt.get("code") or fmt.get("Code"), "name": fmt.get("name") or fmt.get("Name")})
+    if is_object(fmt):
+        return BIB_FORMAT_KEYS.resolve(fmt)
     if fmt is None:
         return {}
     # If string, treat it as name only.
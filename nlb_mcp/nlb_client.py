@@ -2,9 +2,107 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
 
-from nlb_mcp.http_client import get_json
+from nlb_mcp.cache import ResponseCache
+from nlb_mcp.config import settings
+from nlb_mcp.http_client import get_json, is_outage
+from nlb_mcp.keys import RECORD_KEYS, field, is_struct
+from nlb_mcp.logging import get_logger
+from nlb_mcp.metrics import REGISTRY, stats_collector
+from nlb_mcp.tracing import start_span
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """The process-wide response cache, created from settings on first use."""
+    global _response_cache
+    if _response_cache is None:
+        store = None
+        if settings.cache_disk_path:
+            # Optional host-wide tier: shared by every worker on the host and kept across restarts.
+            from nlb_mcp.disk_cache import DiskCache
+
+            store = DiskCache(settings.cache_disk_path, settings.cache_disk_max_bytes)
+        _response_cache = ResponseCache(settings.cache_max_entries, settings.cache_max_bytes, store=store)
+        REGISTRY.add_collector(stats_collector("nlb_cache", "Response cache state", _response_cache.stats))
+    return _response_cache
+
+
+def __getattr__(name: str) -> Any:
+    # Keeps `nlb_client.response_cache` working without building the cache at import.
+    if name == "response_cache":
+        return get_response_cache()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Paths answered from an expired cache entry during an outage, collected per tool call.
+_stale_paths: ContextVar[Optional[List[str]]] = ContextVar("nlb_mcp_stale_paths", default=None)
+
+
+@contextmanager
+def track_stale() -> Iterator[List[str]]:
+    """Collect the endpoints served stale (last known response) by calls made inside the block."""
+    paths: List[str] = []
+    token = _stale_paths.set(paths)
+    try:
+        yield paths
+    finally:
+        _stale_paths.reset(token)
+
+
+def _ttls(path: str) -> Tuple[float, float]:
+    if path == "/GetAvailabilityInfo":
+        return settings.cache_availability_ttl_s, settings.cache_availability_stale_s
+    if path == "/GetTitleDetails":
+        return settings.cache_details_ttl_s, settings.cache_details_stale_s
+    if path in ("/GetNewTitles", "/GetMostCheckoutsTrendsTitles"):
+        # Read by the mirror sync and the trends refresher, which keep their own copies.
+        return 0.0, 0.0
+    return settings.cache_titles_ttl_s, settings.cache_titles_stale_s
+
+
+def _cache_key(path: str, params: Dict[str, str]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    return path, tuple(sorted(params.items()))
+
+
+async def _cached_get(path: str, params: Dict[str, str]) -> Dict[str, Any]:
+    ttl, stale_ttl = _ttls(path)
+    with start_span("nlb_client " + path, {"url.path": path}) as span:
+        if not settings.cache_enabled or ttl <= 0:
+            span.set_attribute("nlb.cache_hit", False)
+            return await get_json(path, params)
+        key = _cache_key(path, params)
+        fetched = False
+
+        def fetch() -> Awaitable[Any]:
+            nonlocal fetched
+            fetched = True
+            return get_json(path, params)
+
+        cache = get_response_cache()
+        try:
+            value = await cache.get_or_fetch(key, fetch, ttl, stale_ttl)
+        except Exception as exc:
+            # Upstream down (or its breaker open): answer with the last response we saw, if any.
+            if not is_outage(exc):
+                raise
+            value = await cache.last_known(key)
+            if value is None:
+                raise
+            span.set_attribute("nlb.stale_fallback", True)
+            get_logger().warning("serving last known response", extra={"path": path, "error": str(exc)})
+            paths = _stale_paths.get()
+            if paths is not None:
+                paths.append(path)
+            return value
+        # Stale hits refresh in the background after this returns, so they still count as hits.
+        span.set_attribute("nlb.cache_hit", not fetched)
+        return value
 
 
 async def search_titles(
@@ -18,7 +116,7 @@ async def search_titles(
     if sort_fields:
         params["SortFields"] = sort_fields
 
-    return await get_json("/SearchTitles", params)
+    return await _cached_get("/SearchTitles", params)
 
 
 async def get_titles(
@@ -53,11 +151,58 @@ async def get_titles(
     if offset is not None:
         params["Offset"] = str(offset)
 
-    return await get_json("/GetTitles", params)
+    return await _cached_get("/GetTitles", params)
+
+
+def isbn_key(value: str) -> str:
+    """Canonical ISBN for lookups and cache keys: first token, digits and X only."""
+    token = value.strip().split(" ", 1)[0]
+    return "".join(c for c in token if c.isdigit() or c in "xX").upper()
+
+
+async def get_title_details(*, brn: Optional[str] = None, isbn: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Full bibliographic record for one title by BRN (preferred) or ISBN.
+
+    The response is also cached under the title's BRN and each of its ISBNs, so a later
+    lookup by any of them is a hit.
+    """
+    if brn:
+        params = {"BRN": str(brn).strip()}
+    elif isbn:
+        params = {"ISBN": isbn_key(isbn)}
+    else:
+        raise ValueError("Provide brn or isbn")
+    value = await _cached_get("/GetTitleDetails", params)
+    _alias_title_details(value, params)
+    return value
+
+
+def _alias_title_details(value: Any, looked_up: Dict[str, str]) -> None:
+    ttl, stale_ttl = _ttls("/GetTitleDetails")
+    if not settings.cache_enabled or ttl <= 0:
+        return
+    aliases = [{"BRN": str(brn)}] if (brn := RECORD_KEYS.get(value, "brn")) is not None else []
+    isbns = RECORD_KEYS.get(value, "isbns")
+    if isinstance(isbns, list):
+        aliases += [{"ISBN": isbn_key(i)} for i in isbns if isinstance(i, str) and i.strip()]
+    cache = get_response_cache()
+    for params in aliases:
+        key = _cache_key("/GetTitleDetails", params)
+        # Memory only, and skipped when the alias already holds this very response (cache hits).
+        if params != looked_up and cache.peek(key) is not value:
+            cache.set(key, value, ttl, stale_ttl)
 
 
 async def get_availability(
-    *, brn: Optional[str] = None, isbn: Optional[str] = None, control_no: Optional[str] = None, branch_id: Optional[str] = None
+    *,
+    brn: Optional[str] = None,
+    isbn: Optional[str] = None,
+    control_no: Optional[str] = None,
+    branch_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    set_id: Optional[int] = None,
+    offset: Optional[int] = None,
 ) -> Dict[str, Any]:
     params: Dict[str, str] = {}
     if brn:
@@ -67,6 +212,145 @@ async def get_availability(
     if control_no:
         params["ControlNo"] = control_no
     if branch_id:
-        params["BranchID"] = branch_id
+        params["LocationCode"] = branch_id
+    if limit:
+        params["Limit"] = str(limit)
+    if set_id is not None:
+        params["SetId"] = str(set_id)
+    if offset is not None:
+        params["Offset"] = str(offset)
+
+    return await _cached_get("/GetAvailabilityInfo", params)
+
+
+async def get_new_titles(
+    *,
+    date_range: str = "Weekly",
+    limit: Optional[int] = None,
+    sort_fields: Optional[str] = None,
+    set_id: Optional[int] = None,
+    offset: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Titles acquired within `date_range` (Weekly, Monthly or Quarterly)."""
+    params: Dict[str, str] = {"DateRange": date_range}
+    if limit:
+        params["Limit"] = str(limit)
+    if sort_fields:
+        params["SortFields"] = sort_fields
+    if set_id is not None:
+        params["SetId"] = str(set_id)
+    if offset is not None:
+        params["Offset"] = str(offset)
+
+    return await _cached_get("/GetNewTitles", params)
+
+
+async def get_checkout_trends(*, location_code: str, duration: str = "past30days") -> Dict[str, Any]:
+    """Most borrowed titles at a location over `duration` (past30days or pastmonth)."""
+    return await _cached_get("/GetMostCheckoutsTrendsTitles", {"LocationCode": location_code, "Duration": duration})
+
+
+PageFetcher = Callable[[Optional[int], Optional[int]], Awaitable[Dict[str, Any]]]
+
+
+def _page_info(page: Any, items_key: str) -> Tuple[List[Any], Optional[int], bool, Optional[int]]:
+    """Return (items, setId, hasMoreRecords, nextRecordsOffset) for v2 or legacy `Result` pages."""
+    if is_struct(page):
+        # Typed v2 page from nlb_mcp.decode.
+        items = field(page, items_key) or []
+        return items, field(page, "setId"), bool(field(page, "hasMoreRecords")), field(page, "nextRecordsOffset")
+    if not isinstance(page, dict):
+        return [], None, False, None
+    body = page["Result"] if isinstance(page.get("Result"), dict) else page
+    pascal = items_key[0].upper() + items_key[1:]
+    items = body.get(items_key) or body.get(pascal) or []
+    set_id = body.get("setId", body.get("SetId"))
+    has_more = body.get("hasMoreRecords", body.get("HasMoreRecords"))
+    next_offset = body.get("nextRecordsOffset", body.get("NextRecordsOffset"))
+    return items if isinstance(items, list) else [], set_id, bool(has_more), next_offset
+
+
+class PageLimitReached(RuntimeError):
+    """Raised by a paginated iterator, after the last allowed page's items, when `max_pages` cut it short."""
+
+    def __init__(self, pages: int) -> None:
+        super().__init__(f"Stopped after {pages} pages with more records upstream")
+        self.pages = pages
+
+
+async def _paginate(
+    fetch_page: PageFetcher, items_key: str, prefetch: bool = True, max_pages: Optional[int] = None
+) -> AsyncIterator[Any]:
+    """
+    Yield items across pages, following setId/nextRecordsOffset while hasMoreRecords.
+
+    With `prefetch`, the next page is requested before the current page's items are
+    yielded, overlapping upstream latency with consumer work. Stopping iteration early
+    (break / aclose) cancels any outstanding prefetch. Hitting `max_pages` while upstream
+    has more records raises PageLimitReached once the last page has been yielded.
+    """
+    pending: Optional[asyncio.Future] = asyncio.ensure_future(fetch_page(None, None))
+    pages = 0
+    last_offset: Optional[int] = None
+    try:
+        while pending is not None:
+            page = await pending
+            pending = None
+            pages += 1
+            items, set_id, has_more, next_offset = _page_info(page, items_key)
+            follow: Optional[Tuple[Optional[int], int]] = None
+            truncated = False
+            # Stop on an empty page or a non-advancing offset to avoid paging forever.
+            if has_more and items and next_offset is not None and next_offset != last_offset:
+                if max_pages is None or pages < max_pages:
+                    follow = (set_id, next_offset)
+                    last_offset = next_offset
+                else:
+                    truncated = True
+            if follow is not None and prefetch:
+                pending = asyncio.ensure_future(fetch_page(*follow))
+            for item in items:
+                yield item
+            if truncated:
+                raise PageLimitReached(pages)
+            if follow is not None and not prefetch:
+                pending = asyncio.ensure_future(fetch_page(*follow))
+    finally:
+        if pending is not None:
+            if not pending.done():
+                pending.cancel()
+            elif not pending.cancelled():
+                pending.exception()  # unconsumed prefetch; don't warn about its error
+
+
+def iter_titles(
+    *, page_size: Optional[int] = None, prefetch: bool = True, max_pages: Optional[int] = None, **filters: Any
+) -> AsyncIterator[Dict[str, Any]]:
+    """Stream raw `/GetTitles` title entries across pages; `filters` are get_titles keywords."""
+
+    def fetch(set_id: Optional[int], offset: Optional[int]) -> Awaitable[Dict[str, Any]]:
+        return get_titles(limit=page_size, set_id=set_id, offset=offset, **filters)
+
+    return _paginate(fetch, "titles", prefetch=prefetch, max_pages=max_pages)
+
+
+def iter_availability(
+    *, page_size: Optional[int] = None, prefetch: bool = True, max_pages: Optional[int] = None, **filters: Any
+) -> AsyncIterator[Dict[str, Any]]:
+    """Stream raw `/GetAvailabilityInfo` items across pages; `filters` are get_availability keywords."""
+
+    def fetch(set_id: Optional[int], offset: Optional[int]) -> Awaitable[Dict[str, Any]]:
+        return get_availability(limit=page_size, set_id=set_id, offset=offset, **filters)
+
+    return _paginate(fetch, "items", prefetch=prefetch, max_pages=max_pages)
+
+
+def iter_new_titles(
+    *, page_size: Optional[int] = None, prefetch: bool = True, max_pages: Optional[int] = None, **filters: Any
+) -> AsyncIterator[Dict[str, Any]]:
+    """Stream raw `/GetNewTitles` entries across pages; `filters` are get_new_titles keywords."""
+
+    def fetch(set_id: Optional[int], offset: Optional[int]) -> Awaitable[Dict[str, Any]]:
+        return get_new_titles(limit=page_size, set_id=set_id, offset=offset, **filters)
 
-    return await get_json("/GetAvailabilityInfo", params)
+    return _paginate(fetch, "titles", prefetch=prefetch, max_pages=max_pages)
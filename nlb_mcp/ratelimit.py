@@ -0,0 +1,279 @@
+"""Client-side token bucket and AIMD concurrency limit for upstream calls."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import math
+import os
+import struct
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Union
+
+from nlb_mcp.config import settings
+from nlb_mcp.logging import get_logger
+from nlb_mcp.metrics import REGISTRY, stats_collector
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+
+class TokenBucket:
+    """
+    Token bucket with reservations: callers take a token immediately (possibly going
+    negative) and sleep until it would have been refilled, which keeps waiters FIFO.
+    A caller cancelled while sleeping returns its token. A rate of 0 disables throttling.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        if self.rate <= 0 and not self._blocked_until:
+            return
+        now = time.monotonic()
+        delay = max(0.0, self._blocked_until - now)
+        if self.rate > 0:
+            self._refill(now)
+            self._tokens -= 1
+            if self._tokens < 0:
+                delay = max(delay, -self._tokens / self.rate)
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                # Cancelled (e.g. by a tool deadline) before using the reservation: give it back.
+                if self.rate > 0:
+                    self._refill(time.monotonic())
+                    self._tokens = min(self.burst, self._tokens + 1)
+                raise
+
+    def block_for(self, seconds: float) -> None:
+        # Upstream asked us to back off (429 Retry-After); pause every caller.
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    @property
+    def tokens(self) -> float:
+        self._refill(time.monotonic())
+        return self._tokens
+
+
+class SharedTokenBucket:
+    """
+    TokenBucket whose state lives in a small file guarded by flock, so every worker
+    process on the host draws from one budget (and a 429 Retry-After seen by one
+    worker pauses them all). Same reservation semantics as TokenBucket; the lock is
+    held only for a read-modify-write of 24 bytes, never while sleeping.
+    """
+
+    _STATE = struct.Struct("<ddd")  # tokens, updated (wall clock), blocked_until
+
+    def __init__(self, path: str, rate: float, burst: int) -> None:
+        self.path = path
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._fd: Optional[int] = None
+        self._pid = 0
+
+    def _file(self) -> int:
+        # Reopen after fork: flock locks belong to the open file description.
+        if self._fd is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            self._pid = os.getpid()
+        return self._fd
+
+    @contextmanager
+    def _state(self) -> Iterator[List[float]]:
+        fd = self._file()
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            raw = os.pread(fd, self._STATE.size, 0)
+            now = time.time()
+            state = list(self._STATE.unpack(raw)) if len(raw) == self._STATE.size else [float(self.burst), now, 0.0]
+            # Refill; clamp the elapsed time in case the wall clock stepped backwards.
+            state[0] = min(self.burst, state[0] + max(now - state[1], 0.0) * self.rate)
+            state[1] = now
+            yield state
+            os.pwrite(fd, self._STATE.pack(*state), 0)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    async def acquire(self) -> None:
+        with self._state() as state:
+            delay = max(0.0, state[2] - state[1])
+            if self.rate > 0:
+                state[0] -= 1
+                if state[0] < 0:
+                    delay = max(delay, -state[0] / self.rate)
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                if self.rate > 0:
+                    with self._state() as state:
+                        state[0] = min(self.burst, state[0] + 1)
+                raise
+
+    def block_for(self, seconds: float) -> None:
+        with self._state() as state:
+            state[2] = max(state[2], state[1] + seconds)
+
+    @property
+    def tokens(self) -> float:
+        with self._state() as state:
+            return state[0]
+
+
+def _build_bucket() -> Union[TokenBucket, SharedTokenBucket]:
+    path = settings.upstream_quota_file
+    if path:
+        if fcntl is not None:
+            return SharedTokenBucket(path, settings.upstream_rate_per_s, settings.upstream_burst)
+        get_logger().warning("UPSTREAM_QUOTA_FILE needs fcntl (POSIX); using a per-process token bucket")
+    return TokenBucket(settings.upstream_rate_per_s, settings.upstream_burst)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit: +1/limit per success, multiplicative decrease on overload.
+
+    The decrease happens once per congestion event: failures arriving within one round
+    trip (a moving average of slot hold times) of the last decrease belong to requests
+    sent before it, so they do not cut the limit again.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, decrease: float = 0.5) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.decrease = decrease
+        self.in_flight = 0
+        self.rtt: Optional[float] = None
+        self._decreased_at = -math.inf
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        while self.in_flight >= int(self.limit):
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters.append(fut)
+            try:
+                await fut
+            except asyncio.CancelledError:
+                if fut in self._waiters:
+                    self._waiters.remove(fut)
+                else:
+                    # We were woken but are leaving; pass the wake-up on.
+                    self._wake()
+                raise
+        self.in_flight += 1
+
+    def release(self, held_s: Optional[float] = None) -> None:
+        self.in_flight -= 1
+        if held_s is not None:
+            self.rtt = held_s if self.rtt is None else 0.8 * self.rtt + 0.2 * held_s
+        self._wake()
+
+    def on_success(self) -> None:
+        self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+        self._wake()
+
+    def on_overload(self) -> None:
+        now = time.monotonic()
+        if now - self._decreased_at < (self.rtt or 0.0):
+            return
+        self._decreased_at = now
+        self.limit = max(self.minimum, self.limit * self.decrease)
+
+    def _wake(self) -> None:
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                free -= 1
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class UpstreamLimiter:
+    """Token bucket plus adaptive concurrency in front of every upstream attempt."""
+
+    def __init__(self) -> None:
+        self.throttled = 0
+
+    # Built on first use so importing this module does not load settings.
+    @functools.cached_property
+    def bucket(self) -> Union[TokenBucket, SharedTokenBucket]:
+        return _build_bucket()
+
+    @functools.cached_property
+    def concurrency(self) -> AdaptiveConcurrency:
+        return AdaptiveConcurrency(
+            settings.upstream_concurrency_initial,
+            settings.upstream_concurrency_min,
+            settings.upstream_concurrency_max,
+        )
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.bucket.acquire()
+        await self.concurrency.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.concurrency.release(time.monotonic() - started)
+
+    def record(self, status: Optional[int], retry_after: Optional[float] = None) -> None:
+        """Feed an attempt outcome back; `status=None` means a timeout/transport failure."""
+        if status == 429:
+            self.throttled += 1
+            self.concurrency.on_overload()
+            fallback = 1.0 / settings.upstream_rate_per_s if settings.upstream_rate_per_s > 0 else 1.0
+            self.bucket.block_for(min(retry_after if retry_after is not None else fallback, settings.upstream_retry_after_max_s))
+        elif status is None or status >= 500:
+            self.concurrency.on_overload()
+        else:
+            self.concurrency.on_success()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ratePerSec": self.bucket.rate,
+            "tokens": round(self.bucket.tokens, 2),
+            "concurrencyLimit": round(self.concurrency.limit, 2),
+            "rttMs": None if self.concurrency.rtt is None else round(self.concurrency.rtt * 1000, 1),
+            "inFlight": self.concurrency.in_flight,
+            "throttled": self.throttled,
+            "shared": isinstance(self.bucket, SharedTokenBucket),
+        }
+
+
+upstream_limiter = UpstreamLimiter()
+REGISTRY.add_collector(stats_collector("nlb_limiter", "Upstream limiter state", upstream_limiter.stats))
@@ -0,0 +1,501 @@
+"""In-process BM25 index over titles already fetched, used to answer search_titles locally."""
+
+from __future__ import annotations
+
+import heapq
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter, OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, List, Optional, Tuple
+
+from nlb_mcp.config import settings
+from nlb_mcp.decode import decode_json, encode_json
+from nlb_mcp.logging import get_logger
+from nlb_mcp.metrics import REGISTRY, stats_collector
+from nlb_mcp.models import BASIC_RECORD_FIELDS, TitleSummary, normalize_titles
+from nlb_mcp.nlb_client import isbn_key
+
+# BM25 parameters (the usual defaults).
+_K1 = 1.2
+_B = 0.75
+
+_TOKEN = re.compile(r"\w+")
+# Too common in titles to narrow a search; dropped from documents and queries alike.
+_STOPWORDS = frozenset("a an and at by for from in of on or the to with".split())
+
+# Record fields read when indexing an upstream response. Answers keep the ones search_titles
+# returns (BASIC_RECORD_FIELDS), so a local answer has the same shape as an upstream one;
+# `availability` is as of the last upstream response that listed the record.
+INDEX_RECORD_FIELDS = BASIC_RECORD_FIELDS + ("isbns", "subjects")
+
+# Terms whose postings are longer than this are ranked from (tf, length) groups instead of a scan.
+_SCAN_LIMIT = 1024
+
+# Coverage is estimated from this many recent upstream searches, once at least _MIN_SAMPLES are in.
+_COVERAGE_WINDOW = 50
+_MIN_SAMPLES = 10
+# Queries already sampled, remembered so a popular query (or a cached response) counts once.
+_SAMPLED_QUERIES = 10_000
+# Candidates scored per local answer (p99 ~10 ms at 1M titles); past it the query goes upstream.
+_ANSWER_MAX_DOCS = 3_000
+
+_MAGIC = b"NLBIDX1\n"
+
+
+def tokenize(text: Any) -> List[str]:
+    if not isinstance(text, str):
+        return []
+    return [t for t in _TOKEN.findall(text.casefold()) if t not in _STOPWORDS and (len(t) > 1 or t.isdigit())]
+
+
+def _as_isbn(query: str) -> Optional[int]:
+    # A query that is one ISBN (hyphens and spaces allowed), as the integer key used for lookups.
+    key = isbn_key(query)
+    if len(key) not in (10, 13) or len(key) * 2 < len(query.strip()):
+        return None
+    return _isbn_int(key)
+
+
+def _isbn_int(key: str) -> Optional[int]:
+    # Integer keys keep the ISBN map compact; a trailing X check digit maps to the negatives.
+    if not key[:-1].isdigit():
+        return None
+    if key[-1] == "X":
+        return -int(key[:-1]) - 1
+    return int(key) if key[-1].isdigit() else None
+
+
+class SearchIndex:
+    """
+    Inverted index over title, author and subjects with BM25 ranking, plus an ISBN map.
+
+    Documents are titles keyed by their records' BRNs. Postings are per-term pairs of
+    `array` columns (doc ids ascending, term frequencies), so inserts are appends and a
+    snapshot is a handful of contiguous buffers. A title inserted again replaces its old
+    document, which stays as a tombstone until the next snapshot compacts it away.
+    Answer payloads (title, author, record brn/format) are kept as JSON in one bytearray.
+    """
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, array] = {}
+        self._tfs: Dict[str, array] = {}
+        self._lengths = array("I")
+        self._live = bytearray()
+        self._offsets = array("Q", [0])
+        self._blob = bytearray()
+        # Common terms' docs grouped by (tf, length), built on first query and kept up to date.
+        self._impact: Dict[str, Dict[Tuple[int, int], array]] = {}
+        self._doc_of: Dict[int, int] = {}
+        self._isbns: Dict[int, int] = {}
+        self._live_count = 0
+        self._total_len = 0
+        self._samples: Deque[Tuple[int, int]] = deque(maxlen=_COVERAGE_WINDOW)
+        self._sampled: "OrderedDict[str, None]" = OrderedDict()
+        self.local_answers = 0
+        self.upstream_answers = 0
+
+    def __len__(self) -> int:
+        return self._live_count
+
+    # --- inserts ----------------------------------------------------------------------
+
+    def _doc(self, doc: int) -> Dict[str, Any]:
+        return decode_json(bytes(self._blob[self._offsets[doc] : self._offsets[doc + 1]]))
+
+    def _current(self, doc: int) -> Optional[int]:
+        # A replaced document's ISBNs still point at it; follow its first BRN to the live one.
+        if self._live[doc]:
+            return doc
+        records = self._doc(doc)["records"]
+        return self._doc_of.get(records[0]["brn"]) if records else None
+
+    def add_title(self, title: TitleSummary) -> bool:
+        """Index (or re-index) one normalized title; returns False when nothing changed."""
+        records = [r for r in title.get("records") or [] if r.get("brn") is not None]
+        if not records:
+            return False
+        brns = {int(r["brn"]) for r in records}
+        old = sorted({self._doc_of[b] for b in brns if b in self._doc_of})
+        kept = [{**{f: r.get(f) for f in BASIC_RECORD_FIELDS}, "brn": int(r["brn"])} for r in records]
+        for doc in old:
+            # Records of the old document this title does not list stay with it.
+            kept += [r for r in self._doc(doc)["records"] if r["brn"] not in brns]
+        body = encode_json({"title": title.get("title"), "author": title.get("author"), "records": kept})
+        if len(old) == 1 and self._blob[self._offsets[old[0]] : self._offsets[old[0] + 1]] == body:
+            return False
+
+        tokens = tokenize(title.get("title")) + tokenize(title.get("author"))
+        for rec in records:
+            for subject in rec.get("subjects") or []:
+                tokens += tokenize(subject)
+        doc, length = len(self._lengths), len(tokens)
+        for term, tf in Counter(tokens).items():
+            tf = min(tf, 0xFFFF)
+            ids = self._ids.get(term)
+            if ids is None:
+                ids = self._ids[term] = array("I")
+                self._tfs[term] = array("H")
+            ids.append(doc)
+            self._tfs[term].append(tf)
+            table = self._impact.get(term)
+            if table is not None:
+                group = table.get((tf, length))
+                if group is None:
+                    group = table[(tf, length)] = array("I")
+                group.append(doc)
+        for rec in records:
+            for isbn in rec.get("isbns") or []:
+                key = _isbn_int(isbn_key(isbn)) if isinstance(isbn, str) and isbn.strip() else None
+                if key is not None:
+                    self._isbns[key] = doc
+        self._lengths.append(length)
+        self._live.append(1)
+        self._blob += body
+        self._offsets.append(len(self._blob))
+        self._live_count += 1
+        self._total_len += length
+        for stale in old:
+            self._live[stale] = 0
+            self._live_count -= 1
+            self._total_len -= self._lengths[stale]
+        for rec in kept:
+            self._doc_of[rec["brn"]] = doc
+        return True
+
+    def add_titles(self, titles: Iterable[TitleSummary]) -> int:
+        return sum(self.add_title(t) for t in titles)
+
+    # --- queries ----------------------------------------------------------------------
+
+    def search(self, query: str, k: int = 10, max_docs: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Top `k` titles matching every query term, best BM25 score first (or the one ISBN match).
+
+        Candidates come from the rarest term. When its postings are short they are all
+        scored, checking the other terms by binary search from a moving cursor. Otherwise
+        its (tf, length) groups are visited best bound first, and the scan stops once no
+        remaining group can beat the k-th score found. With `max_docs`, a query that would
+        score more candidates than that returns None instead.
+        """
+        if k <= 0 or not self._live_count:
+            return []
+        isbn = _as_isbn(query)
+        if isbn is not None:
+            doc = self._isbns.get(isbn)
+            doc = None if doc is None else self._current(doc)
+            return [] if doc is None else [self._doc(doc)]
+        terms = []
+        for term in dict.fromkeys(tokenize(query)):
+            ids = self._ids.get(term)
+            if ids is None:
+                return []
+            terms.append(term)
+        if not terms:
+            return []
+        terms.sort(key=lambda t: len(self._ids[t]))
+        n = self._live_count
+        # Document frequency counts tombstones too; close enough between compactions.
+        idfs = [math.log(1 + (n - len(self._ids[t]) + 0.5) / (len(self._ids[t]) + 0.5)) for t in terms]
+        base = _K1 * (1 - _B)
+        per_len = _K1 * _B * n / self._total_len if self._total_len else 0.0
+
+        def weight(idf: float, tf: int, length: int) -> float:
+            return idf * tf * (_K1 + 1) / (tf + base + per_len * length)
+
+        rest = [(self._ids[t], self._tfs[t], idf) for t, idf in zip(terms[1:], idfs[1:])]
+        heap: List[Tuple[float, int]] = []
+        budget = max_docs
+
+        def scan(docs: array, tfs: Optional[array], fixed: Optional[Tuple[float, int]]) -> bool:
+            nonlocal budget
+            if budget is not None:
+                budget -= len(docs)
+                if budget < 0:
+                    return False
+            lengths, live = self._lengths, self._live
+            cursors = [0] * len(rest)
+            for pos, doc in enumerate(docs):
+                if not live[doc]:
+                    continue
+                if fixed is None:
+                    length = lengths[doc]
+                    score = weight(idfs[0], tfs[pos], length)  # type: ignore[index]
+                else:
+                    score, length = fixed
+                for j, (ids, other_tfs, idf) in enumerate(rest):
+                    i = bisect_left(ids, doc, cursors[j])
+                    cursors[j] = i
+                    if i == len(ids) or ids[i] != doc:
+                        break
+                    score += weight(idf, other_tfs[i], length)
+                else:
+                    if len(heap) < k:
+                        heapq.heappush(heap, (score, doc))
+                    elif score > heap[0][0]:
+                        heapq.heapreplace(heap, (score, doc))
+            return True
+
+        if len(self._ids[terms[0]]) <= _SCAN_LIMIT:
+            if not scan(self._ids[terms[0]], self._tfs[terms[0]], None):
+                return None
+        else:
+            # Every term here is common, so each has an impact table to read its top tf from.
+            max_tfs = [max(tf for tf, _ in self._impact_table(t)) for t in terms[1:]]
+            plan = []
+            for (tf, length), docs in self._impact_table(terms[0]).items():
+                own = weight(idfs[0], tf, length)
+                bound = own + sum(weight(idf, top, length) for (_, _, idf), top in zip(rest, max_tfs))
+                plan.append((bound, own, length, docs))
+            plan.sort(key=lambda p: p[0], reverse=True)
+            for bound, own, length, docs in plan:
+                if len(heap) >= k and bound <= heap[0][0]:
+                    break
+                if not scan(docs, None, (own, length)):
+                    return None
+        return [self._doc(doc) for _, doc in sorted(heap, reverse=True)]
+
+    def _impact_table(self, term: str) -> Dict[Tuple[int, int], array]:
+        table = self._impact.get(term)
+        if table is None:
+            table = {}
+            lengths = self._lengths
+            for doc, tf in zip(self._ids[term], self._tfs[term]):
+                group = table.get((tf, lengths[doc]))
+                if group is None:
+                    group = table[(tf, lengths[doc])] = array("I")
+                group.append(doc)
+            self._impact[term] = table
+        return table
+
+    def coverage(self) -> Optional[float]:
+        """Share of the titles in recent upstream search results that the index already held."""
+        if len(self._samples) < _MIN_SAMPLES:
+            return None
+        return sum(held for held, _ in self._samples) / sum(seen for _, seen in self._samples)
+
+    def answer(self, query: str, wanted: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Top `wanted` titles for `query` from the index, or None to go upstream instead.
+
+        Local answers need the estimated coverage to reach SEARCH_INDEX_MIN_COVERAGE and at
+        least `wanted` matches; SEARCH_INDEX_AUDIT_RATE of them still go upstream so the
+        estimate keeps up with the catalogue. Scoring runs on the event loop, so a query
+        needing more than _ANSWER_MAX_DOCS candidates goes upstream too. A query that is
+        one ISBN the index holds is answered with that title alone, whatever the coverage:
+        there are no other matches to miss.
+        """
+        if _as_isbn(query) is not None:
+            titles = self.search(query, 1)
+            if not titles:
+                return None
+            self.local_answers += 1
+            return titles
+        coverage = self.coverage()
+        if coverage is None or coverage < settings.search_index_min_coverage:
+            return None
+        if random.random() < settings.search_index_audit_rate:
+            return None
+        titles = self.search(query, wanted, max_docs=_ANSWER_MAX_DOCS)
+        if titles is None or len(titles) < wanted:
+            return None
+        self.local_answers += 1
+        return titles
+
+    def observe(self, query: str, response: Any) -> None:
+        """
+        Record how many of an upstream search's titles the index held, then index them.
+
+        Each distinct query is sampled once: a repeat (often a response-cache hit) would
+        find its own titles held and push the estimate towards 1.
+        """
+        titles = normalize_titles(response, fields=INDEX_RECORD_FIELDS)[0].get("titles") or []
+        brns = [[int(r["brn"]) for r in t.get("records") or [] if r.get("brn") is not None] for t in titles]
+        brns = [b for b in brns if b]
+        key = " ".join(sorted(set(tokenize(query)))) or query.strip().lower()
+        if brns and key not in self._sampled:
+            self._sampled[key] = None
+            if len(self._sampled) > _SAMPLED_QUERIES:
+                self._sampled.popitem(last=False)
+            held = sum(1 for b in brns if any(brn in self._doc_of for brn in b))
+            self._samples.append((held, len(brns)))
+        self.upstream_answers += 1
+        self.add_titles(titles)
+
+    # --- snapshots --------------------------------------------------------------------
+
+    def _compact(self) -> None:
+        # Rebuild without tombstones (doc ids renumbered in order).
+        if self._live_count == len(self._lengths):
+            return
+        remap = array("i", [-1]) * len(self._lengths)
+        new_id = 0
+        for doc, alive in enumerate(self._live):
+            if alive:
+                remap[doc] = new_id
+                new_id += 1
+        for term in list(self._ids):
+            ids, tfs = self._ids[term], self._tfs[term]
+            keep = [i for i, doc in enumerate(ids) if remap[doc] >= 0]
+            if not keep:
+                del self._ids[term], self._tfs[term]
+                continue
+            self._ids[term] = array("I", (remap[ids[i]] for i in keep))
+            self._tfs[term] = array("H", (tfs[i] for i in keep))
+        # Resolve ISBNs of replaced documents while the old ids and blob are still in place.
+        isbns = {}
+        for key, doc in self._isbns.items():
+            current = self._current(doc)
+            if current is not None:
+                isbns[key] = remap[current]
+        lengths, offsets, blob = array("I"), array("Q", [0]), bytearray()
+        for doc, alive in enumerate(self._live):
+            if alive:
+                lengths.append(self._lengths[doc])
+                blob += self._blob[self._offsets[doc] : self._offsets[doc + 1]]
+                offsets.append(len(blob))
+        self._lengths, self._offsets, self._blob = lengths, offsets, blob
+        self._isbns = isbns
+        self._live = bytearray(b"\x01") * new_id
+        self._doc_of = {brn: remap[doc] for brn, doc in self._doc_of.items()}
+        self._impact.clear()
+
+    def save(self, path: str) -> None:
+        """Write a snapshot (compacting first); replaced atomically, so readers never see half a file."""
+        self._compact()
+        terms = list(self._ids)
+        all_ids, all_tfs = array("I"), array("H")
+        for term in terms:
+            all_ids.extend(self._ids[term])
+            all_tfs.extend(self._tfs[term])
+        brns = array("q", self._doc_of.keys())
+        brn_docs = array("I", self._doc_of.values())
+        isbns = array("q", self._isbns.keys())
+        isbn_docs = array("I", self._isbns.values())
+        header = json.dumps(
+            {
+                "byteorder": sys.byteorder,
+                "terms": terms,
+                "counts": [len(self._ids[t]) for t in terms],
+                "docs": len(self._lengths),
+                "blobBytes": len(self._blob),
+                "brns": len(brns),
+                "isbns": len(isbns),
+                "totalLen": self._total_len,
+            }
+        ).encode()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(_MAGIC + len(header).to_bytes(8, "little") + header)
+            for section in (self._lengths, self._offsets, all_ids, all_tfs, brns, brn_docs, isbns, isbn_docs):
+                section.tofile(fh)
+            fh.write(self._blob)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SearchIndex":
+        with open(path, "rb") as fh:
+            data = memoryview(fh.read())
+        if bytes(data[: len(_MAGIC)]) != _MAGIC:
+            raise ValueError(f"{path} is not a search index snapshot")
+        pos = len(_MAGIC) + 8
+        size = int.from_bytes(data[len(_MAGIC) : pos], "little")
+        header = json.loads(bytes(data[pos : pos + size]))
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written on a {header['byteorder']}-endian host")
+        pos += size
+
+        def take(typecode: str, count: int) -> array:
+            nonlocal pos
+            out = array(typecode)
+            end = pos + count * out.itemsize
+            out.frombytes(data[pos:end])
+            pos = end
+            return out
+
+        index = cls()
+        docs = header["docs"]
+        index._lengths = take("I", docs)
+        index._offsets = take("Q", docs + 1)
+        total = sum(header["counts"])
+        all_ids, all_tfs = take("I", total), take("H", total)
+        brns, brn_docs = take("q", header["brns"]), take("I", header["brns"])
+        isbns, isbn_docs = take("q", header["isbns"]), take("I", header["isbns"])
+        index._blob = bytearray(data[pos : pos + header["blobBytes"]])
+        start = 0
+        for term, count in zip(header["terms"], header["counts"]):
+            index._ids[term] = all_ids[start : start + count]
+            index._tfs[term] = all_tfs[start : start + count]
+            start += count
+        index._doc_of = dict(zip(brns, brn_docs))
+        index._isbns = dict(zip(isbns, isbn_docs))
+        index._live = bytearray(b"\x01") * docs
+        index._live_count = docs
+        index._total_len = header["totalLen"]
+        return index
+
+    def stats(self) -> Dict[str, Any]:
+        coverage = self.coverage()
+        return {
+            "titles": self._live_count,
+            "tombstones": len(self._lengths) - self._live_count,
+            "terms": len(self._ids),
+            "coverage": round(coverage, 3) if coverage is not None else None,
+            "localAnswers": self.local_answers,
+            "upstreamAnswers": self.upstream_answers,
+        }
+
+
+_index: Optional[SearchIndex] = None
+
+
+def get_search_index() -> SearchIndex:
+    """The process-wide index, loaded from SEARCH_INDEX_PATH on first use when a snapshot exists."""
+    global _index
+    if _index is None:
+        index = None
+        path = settings.search_index_path
+        if path and os.path.exists(path):
+            started = time.perf_counter()
+            try:
+                index = SearchIndex.load(path)
+            except (OSError, ValueError, KeyError) as exc:
+                get_logger().warning("search index snapshot unreadable", extra={"path": path, "error": repr(exc)})
+            else:
+                get_logger().info(
+                    "search index loaded",
+                    extra={"path": path, "titles": len(index), "ms": round((time.perf_counter() - started) * 1000, 1)},
+                )
+        _index = index or SearchIndex()
+        REGISTRY.add_collector(stats_collector("nlb_search_index", "Local search index", _index.stats))
+    return _index
+
+
+@asynccontextmanager
+async def persisted(_server: Any = None) -> AsyncIterator[None]:
+    """Load the index at startup (seeded from the mirror if empty) and snapshot it on shutdown."""
+    if not settings.search_index_enabled:
+        yield
+        return
+    index = get_search_index()
+    if not len(index) and settings.mirror_path:
+        from nlb_mcp.mirror import get_mirror
+
+        mirror = get_mirror()
+        index.add_titles(await mirror.run(lambda: list(mirror.titles())))  # type: ignore[union-attr]
+    try:
+        yield
+    finally:
+        if settings.search_index_path:
+            try:
+                index.save(settings.search_index_path)
+            except Exception as exc:  # a lost snapshot is rebuilt from traffic; never fail shutdown
+                get_logger().warning("search index snapshot failed", extra={"error": repr(exc)})
@@ -3,26 +3,51 @@
 from __future__ import annotations
 
 # Ensure package root is on sys.path when invoked as a file (e.g., fastmcp inspect /app/nlb_mcp/server.py).
+import functools
 import json
 import sys
+from contextlib import aclosing, asynccontextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
 ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from fastmcp import FastMCP
-
-from nlb_mcp.config import settings
+from nlb_mcp.branches import DIRECTORY
+from nlb_mcp.config import get_settings, settings
 from nlb_mcp.http_client import health_check as basic_health
-from nlb_mcp.logging import get_logger
+from nlb_mcp.http_client import lifespan
+from nlb_mcp.deadline import deadline
+from nlb_mcp.decode import to_builtins
+from nlb_mcp.keys import AVAILABILITY_KEYS, field, is_object, is_struct
+from nlb_mcp.logging import get_logger, should_log
+from nlb_mcp.metrics import REGISTRY, timed_tool
 from nlb_mcp.models import (
+    BASIC_RECORD_FIELDS,
+    DETAIL_RECORD_FIELDS,
+    RECORD_FIELD_NAMES,
     NormalizedAvailability,
     SearchTitlesResponseV2,
+    normalize_title_details,
     normalize_titles,
 )
-from nlb_mcp.nlb_client import get_availability, get_titles, search_titles
+from nlb_mcp.nlb_client import (
+    get_response_cache,
+    get_title_details,
+    get_titles,
+    iter_availability,
+    isbn_key,
+    search_titles,
+    track_stale,
+)
+from nlb_mcp.tracing import InMemoryExporter, get_exporter, traced
+from nlb_mcp.trends import DURATIONS, background_refresh, get_trends
+
+# fastmcp (and anyio) are imported where first needed so importing this module stays cheap;
+# the server itself is built by create_server() or on first access to `server`/`mcp`/`app`.
+if TYPE_CHECKING:
+    from fastmcp import FastMCP
 
 def _clamp_limit(value: Optional[int]) -> Optional[int]:
     if value is None:
@@ -45,7 +70,20 @@ def _validate_identifiers(brn: Optional[str], isbn: Optional[str], control_no: O
 
 async def health_check() -> dict:
     # FastMCP handles OAuth2; this only verifies configuration is loaded.
-    return await basic_health()
+    health = await basic_health()
+    health["cache"] = get_response_cache().stats()
+    if settings.mirror_path:
+        from nlb_mcp.mirror import get_mirror
+
+        health["mirror"] = get_mirror().stats()  # type: ignore[union-attr]
+    if settings.search_index_enabled:
+        from nlb_mcp.search_index import get_search_index
+
+        health["searchIndex"] = get_search_index().stats()
+    health["trends"] = get_trends().stats()
+    if any(b["state"] != "closed" for b in health["breakers"].values()):
+        health["status"] = "degraded"
+    return health
 
 
 async def tool_search_titles(
@@ -54,18 +92,32 @@ async def tool_search_titles(
     sort_fields: Optional[str] = None,
     source: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
-    log = get_logger()
-    log.info(
-        "tool search_titles called",
-        extra={"has_keywords": bool(keywords and keywords.strip()), "has_source": bool(source)},
-    )
+    if should_log("tool search_titles called"):
+        get_logger().info(
+            "tool search_titles called",
+            extra={"has_keywords": bool(keywords and keywords.strip()), "has_source": bool(source)},
+        )
+    keywords = keywords.strip()
+    limit = _clamp_limit(limit)
+    sort_fields = _validate_sort(sort_fields)
+    index = None
+    # The local index ranks by relevance over all sources; sorted or per-source searches go upstream.
+    if settings.search_index_enabled and not (sort_fields or source):
+        from nlb_mcp.search_index import get_search_index
+
+        index = get_search_index()
+        local = index.answer(keywords, min(limit or 5, 5))
+        if local is not None:
+            return _basic_titles([{"titles": local}])
     response = await search_titles(
-        keywords=keywords.strip(),
-        limit=_clamp_limit(limit),
-        sort_fields=_validate_sort(sort_fields),
+        keywords=keywords,
+        limit=limit,
+        sort_fields=sort_fields,
         source=source.strip() if source else None,
     )
-    return _basic_titles(_limit_titles(normalize_titles(response), 5))
+    if index is not None:
+        index.observe(keywords, response)
+    return _basic_titles(_limit_titles(normalize_titles(response, fields=BASIC_RECORD_FIELDS, max_titles=5), 5))
 
 
 async def tool_get_titles(
@@ -79,17 +131,17 @@ async def tool_get_titles(
     set_id: Optional[int] = None,
     offset: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
-    log = get_logger()
-    log.info(
-        "tool search_titles_advanced called",
-        extra={
-            "has_keywords": bool(keywords and keywords.strip()),
-            "has_title": bool(title and title.strip()),
-            "has_author": bool(author and author.strip()),
-            "has_subject": bool(subject and subject.strip()),
-            "has_isbn": bool(isbn and isbn.strip()),
-        },
-    )
+    if should_log("tool search_titles_advanced called"):
+        get_logger().info(
+            "tool search_titles_advanced called",
+            extra={
+                "has_keywords": bool(keywords and keywords.strip()),
+                "has_title": bool(title and title.strip()),
+                "has_author": bool(author and author.strip()),
+                "has_subject": bool(subject and subject.strip()),
+                "has_isbn": bool(isbn and isbn.strip()),
+            },
+        )
     response = await get_titles(
         keywords=keywords.strip() if keywords else None,
         title=title.strip() if title else None,
@@ -101,7 +153,7 @@ async def tool_get_titles(
         set_id=set_id,
         offset=offset,
     )
-    return _basic_titles(_limit_titles(normalize_titles(response), 5))
+    return _basic_titles(_limit_titles(normalize_titles(response, fields=BASIC_RECORD_FIELDS, max_titles=5), 5))
 
 
 async def tool_availability(
@@ -110,19 +162,19 @@ async def tool_availability(
     control_no: Optional[str] = None,
     branch_id: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
-    log = get_logger()
     _validate_identifiers(brn, isbn, control_no)
-    log.info(
-        "tool availability_by_title called",
-        extra={
-            "has_brn": bool(brn),
-            "has_isbn": bool(isbn),
-            "has_control": bool(control_no),
-            "has_branch": bool(branch_id),
-        },
-    )
+    if should_log("tool availability_by_title called"):
+        get_logger().info(
+            "tool availability_by_title called",
+            extra={
+                "has_brn": bool(brn),
+                "has_isbn": bool(isbn),
+                "has_control": bool(control_no),
+                "has_branch": bool(branch_id),
+            },
+        )
 
-    response = await get_availability(
+    response = await _collect_availability(
         brn=brn.strip() if brn else None,
         isbn=isbn.strip() if isbn else None,
         control_no=control_no.strip() if control_no else None,
@@ -141,18 +193,18 @@ async def tool_availability_at_branch(
     if not branch_id:
         raise ValueError("branch_id is required")
     _validate_identifiers(brn, isbn, control_no)
-    log = get_logger()
-    log.info(
-        "tool availability_at_branch called",
-        extra={
-            "has_brn": bool(brn),
-            "has_isbn": bool(isbn),
-            "has_control": bool(control_no),
-            "branch": branch_id,
-        },
-    )
+    if should_log("tool availability_at_branch called"):
+        get_logger().info(
+            "tool availability_at_branch called",
+            extra={
+                "has_brn": bool(brn),
+                "has_isbn": bool(isbn),
+                "has_control": bool(control_no),
+                "branch": branch_id,
+            },
+        )
 
-    response = await get_availability(
+    response = await _collect_availability(
         brn=brn.strip() if brn else None,
         isbn=isbn.strip() if isbn else None,
         control_no=control_no.strip() if control_no else None,
@@ -161,6 +213,229 @@ async def tool_availability_at_branch(
     return _basic_availability(response, brn, branch_id)
 
 
+async def tool_availability_bulk(
+    brns: Optional[List[str]] = None,
+    isbns: Optional[List[str]] = None,
+    branch_ids: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    # One upstream call per identifier (all branches), filtered to `branch_ids` locally.
+    idents = _bulk_identifiers(brns, isbns)
+    branches = set(_branch_codes(branch_ids))
+    if should_log("tool availability_bulk called"):
+        get_logger().info(
+            "tool availability_bulk called",
+            extra={"identifiers": len(idents), "branches": len(branches)},
+        )
+
+    async def lookup(kind: str, value: str) -> Dict[str, Any]:
+        response = await _collect_availability(**{kind: value})
+        items = _basic_availability(response, value if kind == "brn" else None)
+        if branches:
+            items = [i for i in items if str(i.get("branchId", "")).upper() in branches]
+        return {"items": items}
+
+    return await _run_bulk(idents, lookup)
+
+
+async def tool_title_details(
+    brns: Optional[List[str]] = None,
+    isbns: Optional[List[str]] = None,
+    fields: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    # One entry per distinct title identifier; cached titles cost no upstream call and the
+    # misses are fetched concurrently.
+    idents = list(
+        dict.fromkeys((kind, isbn_key(value) if kind == "isbn" else value) for kind, value in _bulk_identifiers(brns, isbns))
+    )
+    record_fields = tuple(dict.fromkeys(f.strip() for f in fields if f and f.strip())) if fields else DETAIL_RECORD_FIELDS
+    unknown = set(record_fields).difference(RECORD_FIELD_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown fields: {sorted(unknown)}; choose from {list(RECORD_FIELD_NAMES)}")
+    if should_log("tool title_details called"):
+        get_logger().info("tool title_details called", extra={"identifiers": len(idents), "fields": len(record_fields)})
+
+    async def lookup(kind: str, value: str) -> Dict[str, Any]:
+        details = await get_title_details(**{kind: value})
+        return {"details": normalize_title_details(details, record_fields)}
+
+    return await _run_bulk(idents, lookup)
+
+
+# find_copy: book records checked for availability (in search rank order; each costs one or
+# more /GetAvailabilityInfo requests), and branches listed besides the preferred ones.
+_FIND_MAX_RECORDS = 3
+_FIND_MAX_BRANCHES = 10
+# Item status names that mean a copy is on the shelf.
+_ON_SHELF = frozenset({"not on loan", "available"})
+
+
+async def tool_find_copy(
+    title: str,
+    author: Optional[str] = None,
+    branch_ids: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    # search -> top physical book records -> concurrent availability -> ranked branches, in one
+    # call. The availability lookups go out in one wave once the search returns: two upstream
+    # round trips, or one when the search is answered locally (the response cache, e.g. from an
+    # earlier search_titles call with the same keywords, or the search index).
+    if not title or not title.strip():
+        raise ValueError("title is required")
+    preferred = _branch_codes(branch_ids)
+    if should_log("tool find_copy called"):
+        get_logger().info(
+            "tool find_copy called", extra={"has_author": bool(author and author.strip()), "branches": len(preferred)}
+        )
+
+    keywords = " ".join(v.strip() for v in (title, author) if v and v.strip())
+    titles = None
+    index = None
+    if settings.search_index_enabled:
+        from nlb_mcp.search_index import get_search_index
+
+        index = get_search_index()
+        titles = index.answer(keywords, 5)
+    if titles is None:
+        # Same arguments as search_titles(keywords) so either call can reuse the other's cache entry.
+        response = await search_titles(keywords=keywords)
+        if index is not None:
+            index.observe(keywords, response)
+        titles = normalize_titles(response, fields=("brn", "digitalId", "format"))[0].get("titles") or []
+    books: Dict[str, Dict[str, Any]] = {}
+    for entry in titles:
+        for rec in entry.get("records", []):
+            if _is_physical_book(rec) and len(books) < _FIND_MAX_RECORDS:
+                books.setdefault(str(rec["brn"]), {"title": entry.get("title"), "author": entry.get("author")})
+    matched = [_strip_nones({**info, "brn": brn}) for brn, info in books.items()]
+    if not books:
+        return {"titles": matched, "branches": []}
+
+    async def lookup(kind: str, value: str) -> Dict[str, Any]:
+        response = await _collect_availability(brn=value)
+        return {"items": _basic_availability(response, value)}
+
+    branches: Dict[str, Dict[str, Any]] = {}
+    errors = []
+    for result in await _run_bulk([("brn", brn) for brn in books], lookup):
+        if "error" in result:
+            errors.append(result)
+            continue
+        for item in result["items"]:
+            code = str(item.get("branchId") or "").upper()
+            if not code:
+                continue
+            branch = branches.setdefault(code, {"branchId": code, "available": 0, "total": 0, "brns": []})
+            copies = _on_shelf(item)
+            branch["available"] += copies
+            branch["total"] += item.get("total") if isinstance(item.get("total"), int) else 1
+            if copies and result["brn"] not in branch["brns"]:
+                branch["brns"].append(result["brn"])
+
+    def rank(code: str) -> Dict[str, Any]:
+        branch = branches.get(code) or {"branchId": code, "available": 0, "total": 0, "brns": []}
+        known = DIRECTORY.find(code)
+        return {"name": known["name"] if known else None, **branch, "preferred": code in preferred}
+
+    others = sorted(
+        (c for c, b in branches.items() if b["available"] and c not in preferred),
+        key=lambda c: branches[c]["available"],
+        reverse=True,
+    )
+    ranked = [rank(c) for c in preferred] + [rank(c) for c in others[:_FIND_MAX_BRANCHES]]
+    out: Dict[str, Any] = {"titles": matched, "branches": [_strip_nones(b) for b in ranked]}
+    if errors:
+        out["errors"] = errors
+    return out
+
+
+def _branch_codes(values: Optional[List[str]]) -> List[str]:
+    # Branch codes or names, each resolved strictly, in order and without repeats.
+    codes: List[str] = []
+    for value in values or []:
+        if value and value.strip():
+            entry = DIRECTORY.resolve(value)
+            if entry is None:
+                raise ValueError(f"Unknown or ambiguous branch {value!r}; use list_branches for valid codes")
+            codes.append(entry["code"])
+    return list(dict.fromkeys(codes))
+
+
+def _is_physical_book(record: Dict[str, Any]) -> bool:
+    fmt = record.get("format") or {}
+    if record.get("digitalId") or record.get("brn") is None:
+        return False
+    code, name = str(fmt.get("code") or "").upper(), str(fmt.get("name") or "").upper()
+    return code == "BK" or name in ("BOOK", "BOOKS")
+
+
+def _on_shelf(item: Dict[str, Any]) -> int:
+    # Copies on the shelf for one availability item: its count when given, else from its status.
+    available = item.get("available")
+    if isinstance(available, bool) or isinstance(available, int):
+        return int(available)
+    status = item.get("status")
+    name = status.get("name") if isinstance(status, dict) else status
+    return int(isinstance(name, str) and name.strip().lower() in _ON_SHELF)
+
+
+def _bulk_identifiers(brns: Optional[List[str]], isbns: Optional[List[str]]) -> List[Tuple[str, str]]:
+    idents = [("brn", v.strip()) for v in brns or [] if v and v.strip()]
+    idents += [("isbn", v.strip()) for v in isbns or [] if v and v.strip()]
+    idents = list(dict.fromkeys(idents))
+    if not idents:
+        raise ValueError("Provide at least one brn or isbn")
+    if len(idents) > settings.bulk_max_items:
+        raise ValueError(f"Too many identifiers; max {settings.bulk_max_items}")
+    return idents
+
+
+async def _run_bulk(
+    idents: List[Tuple[str, str]], lookup: Callable[[str, str], Awaitable[Dict[str, Any]]]
+) -> List[Dict[str, Any]]:
+    """
+    Run `lookup(kind, value)` for every identifier, at most BULK_CONCURRENCY at a time.
+
+    Each result entry is `{kind: value, **lookup result}`. A failed lookup sets "error"
+    on its own entry instead of failing the batch, and one answered from a last-known
+    response is flagged "stale".
+    """
+    import anyio
+
+    results: List[Dict[str, Any]] = [{} for _ in idents]
+    limiter = anyio.CapacityLimiter(settings.bulk_concurrency)
+
+    async def run(index: int, kind: str, value: str) -> None:
+        entry: Dict[str, Any] = {kind: value}
+        try:
+            async with limiter:
+                with track_stale() as stale:
+                    entry.update(await lookup(kind, value))
+            if stale:
+                entry["stale"] = True
+        except Exception as exc:  # per-item failure must not fail the batch
+            status = getattr(getattr(exc, "response", None), "status_code", None)
+            entry["error"] = "Not found" if status == 404 else str(exc) or type(exc).__name__
+        results[index] = entry
+
+    async with anyio.create_task_group() as tg:
+        for index, (kind, value) in enumerate(idents):
+            tg.start_soon(run, index, kind, value)
+    return results
+
+
+_AVAILABILITY_PAGE_SIZE = 100  # /GetAvailabilityInfo maximum (default 20): most titles fit in one page
+
+
+async def _collect_availability(page_size: int = _AVAILABILITY_PAGE_SIZE, **filters: Any) -> Dict[str, Any]:
+    # Follow availability pages (popular titles span several) up to the configured cap.
+    items: List[Dict[str, Any]] = []
+    async with aclosing(iter_availability(page_size=page_size, **filters)) as pages:
+        async for item in pages:
+            items.append(item)
+            if len(items) >= settings.availability_max_items:
+                break
+    return {"items": items}
+
+
 def _limit_titles(results: List[SearchTitlesResponseV2], max_titles: int) -> List[SearchTitlesResponseV2]:
     if not results:
         return results
@@ -213,15 +488,20 @@ def _basic_availability(response: dict, brn: Optional[str], branch_id: Optional[
             items = response["Result"].get("Items") or []
         if not items:
             items = response.get("items") or []
+    elif is_struct(response):
+        items = field(response, "items") or []
 
     basics: List[Dict[str, Any]] = []
     for item in items:
-        loc = item.get("location") or item.get("Location") or {}
-        resolved_branch = item.get("BranchID") or item.get("branchId") or loc.get("code") or branch_id
-        resolved_brn = item.get("brn") or item.get("BRN")
-        available = item.get("available") if "available" in item else item.get("Available")
-        total = item.get("total") if "total" in item else item.get("Total")
-        status = item.get("status") or item.get("Status")
+        if not is_object(item):
+            continue
+        raw = AVAILABILITY_KEYS.resolve(item)
+        loc = raw.get("location")
+        resolved_branch = raw.get("branchId") or (field(loc, "code") if is_object(loc) else None) or branch_id
+        resolved_brn = raw.get("brn")
+        available = raw.get("available")
+        total = raw.get("total")
+        status = to_builtins(raw.get("status"))
         basics.append(
             _strip_nones(
                 {
@@ -240,11 +520,59 @@ def _strip_nones(obj: Dict[str, Any]) -> Dict[str, Any]:
     return {k: v for k, v in obj.items() if v is not None}
 
 async def tool_list_branches(filter: Optional[str] = None) -> list[dict]:
-    # Return branch code/name pairs; optional substring filter on code or name.
-    if not filter:
-        return BRANCHES
-    term = filter.lower()
-    return [b for b in BRANCHES if term in b["code"].lower() or term in b["name"].lower()]
+    # Return branch code/name pairs; optional filter on code or name (prefix/fuzzy match).
+    return DIRECTORY.search(filter)
+
+
+async def tool_checkout_trends(location: str, duration: str = "past30days") -> Dict[str, Any]:
+    # Served from a snapshot: background-refreshed, or fetched here when missing or too old.
+    entry = DIRECTORY.resolve(location)
+    if entry is None:
+        raise ValueError(f"Unknown or ambiguous branch {location!r}; use list_branches for valid codes")
+    if duration not in DURATIONS:
+        raise ValueError(f"duration must be one of {', '.join(DURATIONS)}")
+    # With the background refresh on, leave it a full interval of slack before refetching here.
+    max_age = settings.trends_refresh_interval_s * (2 if settings.trends_refresh_enabled else 1)
+    snapshot = await get_trends().current(entry["code"], duration, max_age)
+    return dict(snapshot)
+
+
+def _mark_stale(result: Any) -> Any:
+    # Flag records built from a last-known response (upstream outage) with "stale": true.
+    if isinstance(result, dict):
+        result.setdefault("stale", True)
+    elif isinstance(result, list):
+        for item in result:
+            if isinstance(item, dict):
+                item.setdefault("stale", True)
+    return result
+
+
+def _guarded(handler: Any) -> Any:
+    # Runs the handler under the TOOL_DEADLINE_S budget and flags stale records in its result.
+    @functools.wraps(handler)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with deadline(settings.tool_deadline_s), track_stale() as stale:
+            result = await handler(*args, **kwargs)
+        return _mark_stale(result) if stale else result
+
+    return wrapper
+
+
+def _instrumented(name: str, handler: Any) -> Any:
+    # Latency/outcome/in-flight metrics around a (sampled) root span for the tool call.
+    return timed_tool(name)(traced("tool " + name)(_guarded(handler)))
+
+
+@asynccontextmanager
+async def _lifespan(server: Any) -> AsyncIterator[None]:
+    # Pooled upstream client, the local search index (loaded/saved when enabled), the
+    # checkout-trend refresher and the background mirror sync when MIRROR_PATH is set.
+    from nlb_mcp.mirror import background_sync
+    from nlb_mcp.search_index import persisted
+
+    async with lifespan(server), persisted(server), background_refresh(server), background_sync(server):
+        yield
 
 
 def create_server() -> FastMCP:
@@ -253,54 +581,121 @@ def create_server() -> FastMCP:
 
     Kept synchronous to avoid event loop issues during `fastmcp inspect`.
     """
+    from fastmcp import FastMCP
+
     # Initialize settings early to fail fast on missing env vars.
-    _ = settings
+    get_settings()
 
     server = FastMCP(
         name="nlb-mcp",
         version="0.1.0",
+        # Pooled upstream client (and mirror sync) start with the server and stop on shutdown.
+        lifespan=_lifespan,
     )
 
     # Register tools. The decorator form is not used to keep explicit names/handlers clear.
-    server.tool(name="health_check", description="Validate config and startup readiness.")(health_check)
+    # Each handler is wrapped for metrics and a root tracing span (see _instrumented).
+    server.tool(name="health_check", description="Validate config and startup readiness.")(_instrumented("health_check", health_check))
     server.tool(
         name="search_titles",
         description="Search NLB catalogue by keyword (BRN/ISBN/Title/Author/Subject).",
-    )(tool_search_titles)
+    )(_instrumented("search_titles", tool_search_titles))
     server.tool(
         name="search_titles_advanced",
         description="Fielded search for titles with optional author/subject/ISBN filters and pagination.",
-    )(tool_get_titles)
+    )(_instrumented("search_titles_advanced", tool_get_titles))
     server.tool(
         name="availability_by_title",
         description="Get item availability for a title/ISBN with branch breakdown.",
-    )(tool_availability)
+    )(_instrumented("availability_by_title", tool_availability))
     server.tool(
         name="availability_at_branch",
         description="Get item availability for a title/ISBN at a specific branch.",
-    )(tool_availability_at_branch)
+    )(_instrumented("availability_at_branch", tool_availability_at_branch))
+    server.tool(
+        name="availability_bulk",
+        description="Get availability for many BRNs/ISBNs at once, optionally limited to a list of branch codes or names.",
+    )(_instrumented("availability_bulk", tool_availability_bulk))
+    server.tool(
+        name="title_details",
+        description=(
+            "Get bibliographic details (summary, subjects, publisher, ISBNs, ...) for many BRNs/ISBNs in one call. "
+            "Optional 'fields' picks record fields. Prefer this over searching when the BRN or ISBN is known."
+        ),
+    )(_instrumented("title_details", tool_title_details))
+    server.tool(
+        name="find_copy",
+        description=(
+            "Find where a book can be borrowed now: searches by title (and optional author), checks every "
+            "physical-book record's availability concurrently and returns branches ranked by copies on the shelf. "
+            "Optional 'branch_ids' (codes or names) are listed first. Replaces search -> list_branches -> "
+            "availability_at_branch."
+        ),
+    )(_instrumented("find_copy", tool_find_copy))
+    server.tool(
+        name="checkout_trends",
+        description=(
+            "Most borrowed titles at a branch (code or name) over 'past30days' or 'pastmonth', grouped by "
+            "language, age level and fiction. Served from a periodically refreshed snapshot; 'asOf' gives its time."
+        ),
+    )(_instrumented("checkout_trends", tool_checkout_trends))
     server.tool(
         name="list_branches",
         description="List branch codes and names (C005 Library Location). Optional substring filter via 'filter'.",
-    )(tool_list_branches)
+    )(_instrumented("list_branches", tool_list_branches))
 
-    # Resources: lightweight wrappers exposing static files.
-    usage_path = Path(__file__).resolve().parent.parent / "resources" / "usage.md"
-    branches_path = Path(__file__).resolve().parent.parent / "resources" / "branches.json"
+    # Resources: static files read once here and served from memory.
+    usage_text = (Path(__file__).resolve().parent.parent / "resources" / "usage.md").read_text()
+    branches_json = DIRECTORY.resource_json
     resource_api = getattr(server, "resource", None)
     if callable(resource_api):
-        @resource_api("nlb-mcp://usage")
+        @resource_api("nlb-mcp://usage", mime_type="text/markdown")
         def resource_usage() -> str:
-            return usage_path.read_text()
+            return usage_text
 
-        @resource_api("nlb-mcp://branches")
-        def resource_branches() -> Dict[str, Any]:
-            return {"branches": json.loads(branches_path.read_text())}
+        @resource_api("nlb-mcp://branches", mime_type="application/json")
+        def resource_branches() -> str:
+            return branches_json
+
+        # Metrics are rendered per read (not cached) so they reflect the current process state.
+        @resource_api("nlb-mcp://metrics", mime_type="application/json")
+        def resource_metrics() -> str:
+            return json.dumps(REGISTRY.snapshot())
+
+        @resource_api("nlb-mcp://metrics/prometheus", mime_type="text/plain")
+        def resource_metrics_prometheus() -> str:
+            return REGISTRY.render_prometheus()
+
+        @resource_api("nlb-mcp://traces", mime_type="application/json")
+        def resource_traces() -> str:
+            # Recent sampled traces when TRACE_EXPORTER=memory (empty for otlp).
+            exporter = get_exporter()
+            return json.dumps(exporter.traces() if isinstance(exporter, InMemoryExporter) else [])
+
+    # Prometheus scrape endpoint when served over HTTP transports (ignored for stdio).
+    custom_route = getattr(server, "custom_route", None)
+    if callable(custom_route):
+        from starlette.responses import PlainTextResponse
+
+        @custom_route("/metrics", methods=["GET"])
+        async def metrics_endpoint(_request: Any) -> PlainTextResponse:
+            return PlainTextResponse(REGISTRY.render_prometheus(), media_type="text/plain; version=0.0.4")
 
     return server
 
 
-# Eagerly create the server object for discovery without starting event loops.
-server = mcp = app = create_server()
+_default_server: Optional[FastMCP] = None
+
+
+def __getattr__(name: str) -> Any:
+    # `server`/`mcp`/`app` are built on first access (e.g. `fastmcp run nlb_mcp/server.py`)
+    # rather than at import; all three names refer to the same instance.
+    global _default_server
+    if name in ("server", "mcp", "app"):
+        if _default_server is None:
+            _default_server = create_server()
+        return _default_server
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = ["create_server", "server", "mcp", "app"]
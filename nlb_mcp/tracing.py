@@ -0,0 +1,300 @@
+"""Lightweight head-sampled tracing with in-memory and OTLP/HTTP (JSON) exporters."""
+
+from __future__ import annotations
+
+import atexit
+import functools
+import json
+import queue
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar, Token
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar, Union
+
+from nlb_mcp.config import settings
+
+# OTLP span kinds / status codes.
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_UNSET, STATUS_OK, STATUS_ERROR = 0, 1, 2
+
+
+class Span:
+    """One timed operation; ids and fields follow the OpenTelemetry data model."""
+
+    __slots__ = (
+        "name",
+        "kind",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "status",
+        "status_message",
+        "_token",
+    )
+
+    sampled = True
+
+    def __init__(self, name: str, trace_id: int, parent_id: Optional[int], kind: int, attributes: Dict[str, Any]) -> None:
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = random.getrandbits(64)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self._token: Optional[Token] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, exc: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = str(exc) or type(exc).__name__
+        self.attributes["exception.type"] = type(exc).__name__
+
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Optional[BaseException], _tb: Any) -> None:
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.set_error(exc)
+        if self._token is not None:
+            _current.reset(self._token)
+        get_exporter().export(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "traceId": f"{self.trace_id:032x}",
+            "spanId": f"{self.span_id:016x}",
+            "parentSpanId": f"{self.parent_id:016x}" if self.parent_id else None,
+            "durationMs": round(self.duration_ms, 3),
+            "attributes": dict(self.attributes),
+            "status": {STATUS_UNSET: "unset", STATUS_OK: "ok", STATUS_ERROR: "error"}[self.status],
+            **({"statusMessage": self.status_message} if self.status_message else {}),
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "traceId": f"{self.trace_id:032x}",
+            "spanId": f"{self.span_id:016x}",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in self.attributes.items()],
+            "status": {"code": self.status, **({"message": self.status_message} if self.status_message else {})},
+        }
+        if self.parent_id:
+            out["parentSpanId"] = f"{self.parent_id:016x}"
+        return out
+
+
+class _UnsampledSpan:
+    """Stand-in for a root that lost the sampling draw; marks the context so children skip too."""
+
+    __slots__ = ("_token",)
+
+    sampled = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, exc: BaseException) -> None:
+        pass
+
+    def __enter__(self) -> "_UnsampledSpan":
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        _current.reset(self._token)
+
+
+class _NoopSpan(_UnsampledSpan):
+    # Shared child of an unsampled root: no context changes at all.
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        pass
+
+
+AnySpan = Union[Span, _UnsampledSpan]
+_NOOP = _NoopSpan()
+_current: ContextVar[Optional[AnySpan]] = ContextVar("nlb_mcp_span", default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None, kind: int = KIND_INTERNAL) -> AnySpan:
+    """
+    Start a span under the current one; use as a context manager.
+
+    The sampling decision is made once at the root (TRACE_SAMPLE_RATE) and inherited by
+    children, so an unsampled call costs a context-var lookup per span.
+    """
+    parent = _current.get()
+    if parent is None:
+        rate = settings.trace_sample_rate
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return _UnsampledSpan()
+        return Span(name, random.getrandbits(128), None, kind, attributes or {})
+    if not parent.sampled:
+        return _NOOP
+    return Span(name, parent.trace_id, parent.span_id, kind, attributes or {})  # type: ignore[union-attr]
+
+
+def current_span() -> AnySpan:
+    return _current.get() or _NOOP
+
+
+T = TypeVar("T")
+
+
+def traced(name: str, kind: int = KIND_SERVER) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Run an async handler inside a span; keeps its signature for FastMCP."""
+
+    def decorate(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            with start_span(name, kind=kind):
+                return await fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+class InMemoryExporter:
+    """Keeps the most recent finished spans; backs the nlb-mcp://traces resource and tests."""
+
+    def __init__(self, max_spans: int = 2048) -> None:
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, span: Span) -> None:
+        self._spans.append(span)
+
+    def spans(self, name: Optional[str] = None) -> List[Span]:
+        return [s for s in self._spans if name is None or s.name == name]
+
+    def traces(self, limit: int = 20) -> List[Dict[str, Any]]:
+        # Group the newest spans by trace id, newest trace first.
+        grouped: Dict[int, List[Span]] = {}
+        for span in reversed(self._spans):
+            grouped.setdefault(span.trace_id, []).append(span)
+        out = []
+        for trace_id, spans in list(grouped.items())[:limit]:
+            spans.sort(key=lambda s: s.start_ns)
+            out.append({"traceId": f"{trace_id:032x}", "spans": [s.to_dict() for s in spans]})
+        return out
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+
+class OtlpHttpExporter:
+    """Batches spans on a background thread and POSTs them as OTLP/HTTP JSON."""
+
+    def __init__(self, endpoint: str, batch_size: int = 256, interval_s: float = 2.0, timeout_s: float = 5.0) -> None:
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.interval_s = interval_s
+        self.timeout_s = timeout_s
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=batch_size * 16)
+        self._thread = threading.Thread(target=self._run, name="nlb-mcp-otlp", daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def shutdown(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(self.timeout_s)
+
+    def _run(self) -> None:
+        batch: List[Span] = []
+        deadline = time.monotonic() + self.interval_s
+        while True:
+            try:
+                span = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                pass
+            else:
+                if span is None:
+                    self._send(batch)
+                    return
+                batch.append(span)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._send(batch)
+                batch = []
+                deadline = time.monotonic() + self.interval_s
+
+    def _send(self, batch: List[Span]) -> None:
+        if not batch:
+            return
+        body = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "nlb-mcp"}}]},
+                    "scopeSpans": [{"scope": {"name": "nlb_mcp"}, "spans": [s.to_otlp() for s in batch]}],
+                }
+            ]
+        }
+        import urllib.request
+
+        request = urllib.request.Request(
+            self.endpoint, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            urllib.request.urlopen(request, timeout=self.timeout_s).close()
+        except Exception:  # collector down: drop the batch, never disturb the server
+            self.dropped += len(batch)
+
+
+Exporter = Union[InMemoryExporter, OtlpHttpExporter]
+_exporter: Optional[Exporter] = None
+
+
+def get_exporter() -> Exporter:
+    """Exporter selected by TRACE_EXPORTER, created on first finished span."""
+    global _exporter
+    if _exporter is None:
+        if settings.trace_exporter == "otlp":
+            _exporter = OtlpHttpExporter(settings.trace_otlp_endpoint)
+        else:
+            _exporter = InMemoryExporter(settings.trace_memory_spans)
+    return _exporter
+
+
+def set_exporter(exporter: Exporter) -> None:
+    global _exporter
+    _exporter = exporter
@@ -0,0 +1,155 @@
+"""Checkout-trend snapshots per branch and duration, refreshed in the background."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Tuple
+
+from nlb_mcp.branches import DIRECTORY
+from nlb_mcp.config import settings
+from nlb_mcp.logging import get_logger
+from nlb_mcp.metrics import REGISTRY, stats_collector
+from nlb_mcp.models import normalize_checkout_trends
+
+# /GetMostCheckoutsTrendsTitles Duration values.
+DURATIONS = ("past30days", "pastmonth")
+# The first background refresh starts at a random point within this many seconds, so
+# workers started together do not each spend the same second of upstream quota on it.
+_FIRST_REFRESH_JITTER_S = 300.0
+
+
+class TrendSnapshots:
+    """
+    Latest /GetMostCheckoutsTrendsTitles answer per (location, duration), kept as the
+    finished tool response so serving one is a dict lookup. A failed refresh keeps the
+    previous snapshot; its `asOf` shows how old it is.
+
+    Without the background refresh, `current` fetches a snapshot on first use and again
+    once it is older than the refresh interval.
+    """
+
+    def __init__(self, locations: Iterable[Dict[str, str]]) -> None:
+        self.locations: Dict[str, Optional[str]] = {e["code"]: e.get("name") for e in locations}
+        self._snapshots: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._fetched_at: Dict[Tuple[str, str], float] = {}
+        self.refreshes = 0
+        self.errors = 0
+        self.last_refresh: Optional[float] = None
+        self.last_refresh_s: Optional[float] = None
+
+    def get(self, code: str, duration: str) -> Optional[Dict[str, Any]]:
+        return self._snapshots.get((code, duration))
+
+    async def fetch(self, code: str, duration: str) -> Dict[str, Any]:
+        """Fetch one location/duration from upstream and store it as the current snapshot."""
+        from nlb_mcp.nlb_client import get_checkout_trends
+
+        response = await get_checkout_trends(location_code=code, duration=duration)
+        snapshot = {
+            "location": code,
+            "name": self.locations.get(code),
+            "duration": duration,
+            "asOf": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "trends": normalize_checkout_trends(response),
+        }
+        self._snapshots[(code, duration)] = snapshot
+        self._fetched_at[(code, duration)] = time.monotonic()
+        return snapshot
+
+    async def current(self, code: str, duration: str, max_age_s: float) -> Dict[str, Any]:
+        """The snapshot, fetched when missing or older than `max_age_s`; an older one covers an outage."""
+        snapshot = self._snapshots.get((code, duration))
+        if snapshot is not None and time.monotonic() - self._fetched_at[(code, duration)] < max_age_s:
+            return snapshot
+        try:
+            return await self.fetch(code, duration)
+        except Exception as exc:
+            from nlb_mcp.http_client import is_outage
+
+            if snapshot is None or not is_outage(exc):
+                raise
+            return snapshot
+
+    async def refresh_all(self, concurrency: int) -> Dict[str, Any]:
+        """Refetch every location and duration, `concurrency` requests at a time."""
+        started = time.time()
+        gate = asyncio.Semaphore(concurrency)
+        failed = 0
+
+        async def one(code: str, duration: str) -> None:
+            nonlocal failed
+            async with gate:
+                try:
+                    await self.fetch(code, duration)
+                except Exception as exc:  # keep the old snapshot; the next round retries
+                    failed += 1
+                    get_logger().warning(
+                        "trends refresh failed", extra={"location": code, "duration": duration, "error": repr(exc)}
+                    )
+
+        await asyncio.gather(*(one(code, duration) for code in self.locations for duration in DURATIONS))
+        self.refreshes += 1
+        self.errors += failed
+        self.last_refresh = started
+        self.last_refresh_s = round(time.time() - started, 3)
+        result = {"snapshots": len(self._snapshots), "failed": failed, "durationS": self.last_refresh_s}
+        get_logger().info("trends refresh done", extra=result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "snapshots": len(self._snapshots),
+            "expected": len(self.locations) * len(DURATIONS),
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "lastRefresh": self.last_refresh,
+            "lastRefreshS": self.last_refresh_s,
+        }
+
+
+async def run_refresh(snapshots: TrendSnapshots, interval_s: float, concurrency: int, first_delay_s: float = 0.0) -> None:
+    await asyncio.sleep(first_delay_s)
+    while True:
+        await snapshots.refresh_all(concurrency)
+        await asyncio.sleep(interval_s)
+
+
+_trends: Optional[TrendSnapshots] = None
+
+
+def get_trends() -> TrendSnapshots:
+    """The process-wide snapshots for every branch in resources/branches.json."""
+    global _trends
+    if _trends is None:
+        _trends = TrendSnapshots(DIRECTORY.entries)
+        REGISTRY.add_collector(stats_collector("nlb_trends", "Checkout-trend snapshots", _trends.stats))
+    return _trends
+
+
+@asynccontextmanager
+async def background_refresh(_server: Any = None) -> AsyncIterator[None]:
+    """Refresh the snapshots for the server lifetime when TRENDS_REFRESH_ENABLED is set."""
+    task = None
+    if settings.trends_refresh_enabled:
+        interval = settings.trends_refresh_interval_s
+        task = asyncio.create_task(
+            run_refresh(
+                get_trends(),
+                interval,
+                settings.trends_refresh_concurrency,
+                random.uniform(0.0, min(interval, _FIRST_REFRESH_JITTER_S)),
+            )
+        )
+    try:
+        yield
+    finally:
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass